@@ -0,0 +1,228 @@
+"""
+Benchmarks das funções de busca e do gráfico de combinações
+    - Gera (ou reutiliza) bases sintéticas em várias escalas (synthetic_corpus.py)
+    - Mede cada função com consultas tec/env/anos aleatórias:
+      carga a frio, latência p50/p99, vazão (consultas/s) e pico de memória
+    - Salva os resultados como baseline e compara execuções futuras com ela
+
+Uso:
+    python benchmarks/run_benchmarks.py --scales 10k 100k --save-baseline
+    python benchmarks/run_benchmarks.py --scales 10k 100k --compare     # sai com 1 se houver regressão
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import barplot_st  # noqa: E402
+import columnar_corpus  # noqa: E402
+import corpus_loader  # noqa: E402
+import record_store  # noqa: E402
+import search_mechanism  # noqa: E402
+from consts import SearchParams, data_files  # noqa: E402
+from synthetic_corpus import COMPLETE_FILE, TERMS_FILE, generate, normalize_term  # noqa: E402
+
+SCALES = {
+    "10k": 10_000,
+    "100k": 100_000,
+    "500k": 500_000,
+    "1m": 1_000_000,
+    "3m": 3_000_000,
+}
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+COMPARED_METRICS = ("p50_ms", "p99_ms", "peak_mb")
+
+
+def use_corpus(directory, formats):
+    """Aponta search_mechanism para a base em directory e gera os formatos pedidos"""
+    files = {
+        "terms_by_year": os.path.join(directory, TERMS_FILE),
+        "complete_results": os.path.join(directory, COMPLETE_FILE),
+        "columnar": os.path.join(directory, "corpus.parquet"),
+        "deltas": os.path.join(directory, "deltas"),
+        "record_store": os.path.join(directory, "records.bin"),
+        "record_index": os.path.join(directory, "records.idx.npy"),
+        "text_index": os.path.join(directory, "text-index.npz"),
+        # Snapshot e shards também apontam para a base: os de src/ são de outra base
+        "snapshot": os.path.join(directory, "corpus.snapshot"),
+        "shards": os.path.join(directory, "shards"),
+    }
+    data_files.update(files)
+
+    for key in ("columnar", "record_store", "record_index", "text_index", "snapshot"):
+        if os.path.exists(files[key]):
+            os.remove(files[key])
+    shutil.rmtree(files["shards"], ignore_errors=True)
+    if "parquet" in formats:
+        columnar_corpus.convert(files["terms_by_year"], files["complete_results"], files["columnar"])
+    if "records" in formats:
+        record_store.build(files["complete_results"], files["record_store"], files["record_index"])
+
+    corpus_loader.clear()
+
+
+def corpus_dir(workdir, n_articles, seed):
+    directory = os.path.join(workdir, f"corpus-{n_articles}-{seed}")
+    if not os.path.exists(os.path.join(directory, COMPLETE_FILE)):
+        start = time.perf_counter()
+        generate(directory, n_articles, seed=seed)
+        print(f"  base sintética com {n_articles} artigos gerada em {time.perf_counter() - start:.1f}s")
+    return directory
+
+
+def random_query(rng, vocab, years):
+    tec = list(rng.choice(vocab["tec"], rng.integers(1, 5), replace=False))
+    env = list(rng.choice(vocab["env"], rng.integers(1, 4), replace=False))
+    selected_years = list(rng.choice(years, rng.integers(1, len(years) + 1), replace=False))
+    return tec, env, selected_years
+
+
+def workloads(vocab, years):
+    """(nome, função, gerador de argumentos)"""
+    def query_args(rng):
+        tec, env, _ = random_query(rng, vocab, years)
+        return (tec, env)
+
+    def year_args(rng):
+        return random_query(rng, vocab, years)
+
+    def plot_args(rng):
+        tec, env, selected_years = random_query(rng, vocab, years)
+        return (search_mechanism.find_terms_in_tuples(tec, env, selected_years), int(rng.integers(5, 31)))
+
+    return [
+        ("find_terms", search_mechanism.find_terms, query_args),
+        ("find_complete_articles", search_mechanism.find_complete_articles, query_args),
+        ("year_term_tuples", search_mechanism.year_term_tuples, lambda rng: ()),
+        ("find_terms_in_tuples", search_mechanism.find_terms_in_tuples, year_args),
+        ("especific_tuple_by_terms", search_mechanism.especific_tuple_by_terms, year_args),
+        ("plot_term_tuples", lambda data, top_n: barplot_st.plot_term_tuples(data, top_n=top_n), plot_args),
+    ]
+
+
+def measure(fn, make_args, repeat, rng):
+    args = make_args(rng)
+    start = time.perf_counter()
+    fn(*args)
+    cold = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(repeat):
+        args = make_args(rng)
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - start)
+
+    args = make_args(rng)
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "cold_s": round(cold, 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "mean_ms": round(float(latencies.mean()), 3),
+        "throughput_qps": round(repeat / (latencies.sum() / 1000), 1),
+        "peak_mb": round(peak / 1024 ** 2, 2),
+    }
+
+
+def run(scales, repeat, formats, workdir, seed, only=None):
+    params = SearchParams()
+    vocab = {
+        "tec": [normalize_term(t) for t in params.tec],
+        "env": [normalize_term(t) for t in params.environment],
+    }
+    results = {}
+
+    for scale in scales:
+        n_articles = SCALES.get(scale) or int(scale)
+        print(f"[{scale}] {n_articles} artigos")
+        use_corpus(corpus_dir(workdir, n_articles, seed), formats)
+
+        years = list(search_mechanism.year_term_tuples().keys())
+        corpus_loader.clear()
+        rng = np.random.default_rng(seed)
+
+        results[scale] = {}
+        for name, fn, make_args in workloads(vocab, years):
+            if only and name not in only:
+                continue
+            results[scale][name] = measure(fn, make_args, repeat, rng)
+            print(f"  {name:26s} " + "  ".join(f"{k}={v}" for k, v in results[scale][name].items()))
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Lista de regressões: métricas que pioraram mais que tolerance em relação à baseline"""
+    regressions = []
+    for scale, functions in results.items():
+        for name, metrics in functions.items():
+            reference = baseline.get(scale, {}).get(name)
+            if not reference:
+                continue
+            for metric in COMPARED_METRICS:
+                before, after = reference[metric], metrics[metric]
+                change = (after - before) / before if before else 0.0
+                marker = "REGRESSÃO" if change > tolerance else ""
+                print(f"  [{scale}] {name:26s} {metric:8s} {before:>10} -> {after:<10} {change:+.1%} {marker}")
+                if marker:
+                    regressions.append((scale, name, metric, before, after))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do mecanismo de busca")
+    parser.add_argument("--scales", nargs="+", default=["10k", "100k"],
+                        help=f"Escalas ({', '.join(SCALES)}) ou número de artigos")
+    parser.add_argument("--repeat", type=int, default=30, help="Consultas medidas por função")
+    parser.add_argument("--formats", nargs="*", default=["parquet", "records"],
+                        choices=["parquet", "records"], help="Formatos derivados a gerar (vazio = só JSON)")
+    parser.add_argument("--only", nargs="*", help="Mede apenas estas funções")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "petrobras-benchmarks"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default="default", help="Nome da baseline em benchmarks/baselines/")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Piora relativa aceita (0.2 = 20%%)")
+    parser.add_argument("--output", help="Grava os resultados em JSON")
+    args = parser.parse_args()
+
+    results = run(args.scales, args.repeat, args.formats, args.workdir, args.seed, args.only)
+    baseline_path = os.path.join(BASELINE_DIR, f"{args.baseline}.json")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"Baseline salva em {baseline_path}")
+
+    if args.compare:
+        with open(baseline_path, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regressões acima de {args.tolerance:.0%}")
+            sys.exit(1)
+        print("Nenhuma regressão")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Gerador de bases sintéticas no mesmo formato dos arquivos reais
+    - terms-by-year-complete.json: {ano: {id: {"tec": {termo: contagem}, "env": {...}}}}
+    - complete-unique-results-scopus.json: {id: {"title", "abstract", "url", "year"}}
+
+Esparsidade realista: a probabilidade de cada termo segue uma lei de Zipf
+(poucos termos frequentes, cauda longa de termos raros) e o volume de
+artigos cresce ano a ano. Os arquivos são escritos em streaming, então
+milhões de artigos não precisam caber em memória.
+
+Uso:
+    python benchmarks/synthetic_corpus.py --articles 1000000 --out /tmp/corpus-1m
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from consts import search_keywords  # noqa: E402
+
+TERMS_FILE = "terms-by-year-complete.json"
+COMPLETE_FILE = "complete-unique-results-scopus.json"
+
+WORDS = (
+    "analysis model data environmental impact assessment monitoring learning "
+    "sensing network system approach study results method framework spatial "
+    "digital management risk governance prediction water soil air emissions "
+    "licensing oil gas offshore pipeline biodiversity climate avaliação análise "
+    "monitoramento ambiental modelo dados gestão risco previsão impacto"
+).split()
+
+
+def normalize_term(term):
+    return "_".join(term.lower().split())
+
+
+def term_probabilities(n_terms, top=0.18, exponent=0.9):
+    """Probabilidade de cada termo aparecer num artigo (Zipf)"""
+    return top / np.arange(1, n_terms + 1) ** exponent
+
+
+def year_sizes(n_articles, first_year, last_year, growth, rng):
+    years = np.arange(first_year, last_year + 1)
+    weights = np.exp(growth * (years - first_year))
+    sizes = rng.multinomial(n_articles, weights / weights.sum())
+    return list(zip(years.tolist(), sizes.tolist()))
+
+
+def generate(out_dir, n_articles, seed=0, first_year=2000, last_year=2025,
+             growth=0.15, abstract_words=120, chunk_size=50000):
+    """
+    Escreve os dois arquivos da base em out_dir
+
+    Returns:
+        Caminhos (terms, complete)
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+
+    fields = {
+        "tec": [normalize_term(t) for t in search_keywords["technologies"]],
+        "env": [normalize_term(t) for t in search_keywords["environment"]],
+    }
+    probabilities = {f: rng.permutation(term_probabilities(len(t))) for f, t in fields.items()}
+    words = np.array(WORDS)
+
+    terms_path = os.path.join(out_dir, TERMS_FILE)
+    complete_path = os.path.join(out_dir, COMPLETE_FILE)
+    article = 0
+
+    with open(terms_path, "w", encoding="utf-8") as terms_file, \
+            open(complete_path, "w", encoding="utf-8") as complete_file:
+        terms_file.write("{")
+        complete_file.write("{")
+        first_year_written = True
+
+        for year, size in year_sizes(n_articles, first_year, last_year, growth, rng):
+            if size == 0:
+                continue
+            terms_file.write(("" if first_year_written else ",") + json.dumps(str(year)) + ":{")
+            first_year_written = False
+
+            for start in range(0, size, chunk_size):
+                n = min(chunk_size, size - start)
+                counts = {
+                    f: (rng.random((n, len(terms))) < probabilities[f]) * rng.integers(1, 8, (n, len(terms)))
+                    for f, terms in fields.items()
+                }
+                text = words[rng.integers(0, len(words), (n, abstract_words))]
+
+                for i in range(n):
+                    id = f"2-s2.0-{85000000000 + article}"
+                    entry = {f: dict(zip(terms, counts[f][i].tolist())) for f, terms in fields.items()}
+                    found = [t for f, terms in fields.items() for t, c in zip(terms, counts[f][i]) if c]
+                    record = {
+                        "title": " ".join(text[i, :10]).capitalize(),
+                        "abstract": " ".join([*text[i, 10:], *(t.replace("_", " ") for t in found)]),
+                        "url": f"https://www.scopus.com/record/display.uri?eid={id}",
+                        "year": str(year),
+                    }
+
+                    separator = "" if article == 0 else ","
+                    terms_file.write(("" if start + i == 0 else ",") + json.dumps(id) + ":" + json.dumps(entry))
+                    complete_file.write(separator + json.dumps(id) + ":" + json.dumps(record, ensure_ascii=False))
+                    article += 1
+
+            terms_file.write("}")
+
+        terms_file.write("}")
+        complete_file.write("}")
+
+    return terms_path, complete_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera uma base sintética no formato dos JSON reais")
+    parser.add_argument("--articles", type=int, default=10000)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--abstract-words", type=int, default=120)
+    args = parser.parse_args()
+
+    paths = generate(args.out, args.articles, seed=args.seed, abstract_words=args.abstract_words)
+    print("Base gerada:", *paths)
+
+
+if __name__ == "__main__":
+    main()
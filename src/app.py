@@ -1,9 +1,26 @@
-import streamlit as st
-from consts import SearchParams
-from search_mechanism import find_complete_articles, find_terms_in_tuples
-import pandas as pd
-import plotly.graph_objects as go
-from barplot_st import plot_term_tuples
+import instrumentation
+from instrumentation import span, startup_phase
+with startup_phase("import:streamlit"):
+    import streamlit as st
+with startup_phase("import:search"):
+    from consts import SearchParams
+    from search_mechanism import (
+        cached_top_term_tuples, corpus_token, current_handle, fetch_articles, handle_year_counts,
+        search_handle, start_warm_up, text_search, yearly_series
+    )
+    from year_series import growth_rate, moving_average
+    from exporter import FORMATS, export_file
+    from corpus_loader import load_report
+    import result_cache
+import os
+
+# pandas e plotly só são importados quando há resultado para exibir; a thread de
+# aquecimento os importa em segundo plano enquanto o formulário é exibido
+DEFERRED_IMPORTS = ("pandas", "plotly.graph_objects", "barplot_st", "article_table")
+# Linhas da tabela de combinações (o gráfico mostra no máximo 30)
+COMBINATION_TABLE_ROWS = 100
+# Janela padrão (anos) da média móvel na aba temporal
+MOVING_AVERAGE_WINDOW = 3
 
 # Configuração da página
 st.set_page_config(
@@ -12,6 +29,9 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Carga da base (snapshot binário, se válido) em segundo plano, uma vez por processo
+start_warm_up(DEFERRED_IMPORTS)
+
 # CSS customizado para melhorar visual
 st.markdown("""
     <style>
@@ -29,6 +49,15 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Instrumentação de desempenho (ver instrumentation.py); ligada só nas execuções desta sessão
+show_perf_panel = st.sidebar.checkbox(
+    "⏱️ Painel de desempenho",
+    value=instrumentation.enabled(),
+    key="perf_panel",
+    help="Mostra o tempo de cada etapa da última execução"
+)
+instrumentation.start_request("app", active=show_perf_panel)
+
 # Header
 st.markdown('<div class="main-header">🛢️ Sumário de Tecnologias Petrobras</div>', unsafe_allow_html=True)
 st.markdown('<div class="subtitle">Análise de tecnologias e termos ambientais em artigos científicos</div>', unsafe_allow_html=True)
@@ -43,8 +72,10 @@ if 'tec_terms_processed' not in st.session_state:
     st.session_state.tec_terms_processed = []
 if 'env_terms_processed' not in st.session_state:
     st.session_state.env_terms_processed = []
-if 'all_articles' not in st.session_state:
-    st.session_state.all_articles = None
+# Resultado da busca guardado na sessão: só a chave da consulta e os ordinais (ver search_handle);
+# índices, registros e tabelas ficam nas estruturas compartilhadas por todas as sessões
+if 'search_handle' not in st.session_state:
+    st.session_state.search_handle = None
 
 # Formulário de busca
 with st.form("search_form"):
@@ -76,7 +107,7 @@ if submitted:
     if not tec_terms or not env_terms:
         st.error("⚠️ Por favor, selecione ao menos um termo de cada categoria!")
     else:
-        with st.spinner("🔄 Processando dados..."):
+        with st.spinner("🔄 Processando dados..."), span("render:search"):
             # Processar termos
             tec_terms_processed = ["_".join(s.lower().split()) for s in tec_terms]
             env_terms_processed = ["_".join(s.lower().split()) for s in env_terms]
@@ -86,20 +117,27 @@ if submitted:
             st.session_state.env_terms_processed = env_terms_processed
             
             # Buscar TODOS os artigos (sem filtro de ano)
-            all_articles = find_complete_articles(tec_terms_processed, env_terms_processed)
-            st.session_state.all_articles = all_articles
+            st.session_state.search_handle = search_handle(tec_terms_processed, env_terms_processed)
+            instrumentation.startup_mark("first_result")
             st.session_state.selected_years = []  # Inicializa vazio
 
 # Se já tem dados carregados, permitir filtro dinâmico de anos
-if st.session_state.all_articles is not None:
-    all_articles = st.session_state.all_articles
+if st.session_state.search_handle is not None:
+    import pandas as pd
+    from barplot_st import RankedCombinations, cached_figure, plot_trends, plot_year_series
+    from article_table import PAGE_SIZES, SORT_COLUMNS, cached_frame, page, page_count, sort_frame
+
+    # Refaz a busca se a base mudou desde então (ex.: novos artigos ingeridos)
+    handle = current_handle(st.session_state.search_handle)
+    st.session_state.search_handle = handle
+    year_counts = handle_year_counts(handle)
     
     # Filtro de anos FORA do formulário (para atualização dinâmica)
     st.markdown("---")
     st.subheader("🗓️ Filtro de Período")
     
     # Obter anos disponíveis
-    available_years = sorted(all_articles.keys())
+    available_years = sorted(year_counts.keys())
     
     # Permitir seleção de anos
     col_filter1, col_filter2 = st.columns([3, 1])
@@ -120,27 +158,28 @@ if st.session_state.all_articles is not None:
     selected_years = year_filter if year_filter else available_years
     
     # Filtrar artigos pelos anos selecionados
-    available_articles = {year: articles for year, articles in all_articles.items() if year in selected_years}
+    available_counts = {year: n for year, n in year_counts.items() if year in selected_years}
     
     # Buscar combinações de termos com os anos filtrados
     tec_terms_processed = st.session_state.tec_terms_processed
     env_terms_processed = st.session_state.env_terms_processed
     
-    if selected_years:
-        data = find_terms_in_tuples(tec_terms_processed, env_terms_processed, years=selected_years)
-    else:
-        data = find_terms_in_tuples(tec_terms_processed, env_terms_processed)
+    # Combinações mais frequentes (seleção por heap; modo exato ou Space-Saving, ver COMBINATION_MODE)
+    combinations = cached_top_term_tuples(
+        tec_terms_processed, env_terms_processed, years=selected_years, n=COMBINATION_TABLE_ROWS
+    )
+    data = {key: count for key, count, _ in combinations["items"]}
     
     st.markdown("---")
     
     # Verificar se há resultados
-    if not available_articles:
+    if not available_counts:
         st.warning("🔍 Nenhum artigo encontrado para os anos selecionados.")
     else:
         # Métricas principais
-        total_articles = sum(len(v) for v in available_articles.values())
-        years_range = f"{min(available_articles.keys())} - {max(available_articles.keys())}"
-        avg_per_year = total_articles / len(available_articles) if len(available_articles) > 0 else 0
+        total_articles = sum(available_counts.values())
+        years_range = f"{min(available_counts.keys())} - {max(available_counts.keys())}"
+        avg_per_year = total_articles / len(available_counts) if len(available_counts) > 0 else 0
         
         st.success(f"✅ Análise concluída! {total_articles} artigos encontrados no período selecionado.")
         
@@ -153,77 +192,83 @@ if st.session_state.all_articles is not None:
         with col3:
             st.metric("📊 Média/Ano", f"{avg_per_year:.1f}")
         with col4:
-            st.metric("🔗 Combinações", len(data))
+            st.metric(
+                "🔗 Combinações",
+                f"≥{combinations['distinct']}" if combinations["approximate"] else combinations["distinct"]
+            )
         
         st.markdown("---")
         
         # Tabs para organizar visualizações
         tab1, tab2, tab3 = st.tabs(["📊 Distribuição Temporal", "🎯 Combinações de Termos", "📄 Dados Detalhados"])
         
-        with tab1:
+        with tab1, span("render:temporal"):
             st.subheader("Evolução Temporal dos Artigos")
             
-            # Preparar série temporal (apenas anos filtrados)
-            distrib_arround_years = [len(v) for k, v in available_articles.items()]
-            series = pd.DataFrame({
-                "count": distrib_arround_years[::-1],
-                "year": list(available_articles.keys())[::-1]
-            })
-            
-            # Gráfico de linha melhorado
-            fig = go.Figure()
-            
-            fig.add_trace(go.Scatter(
-                x=series["year"],
-                y=series["count"],
-                mode='lines+markers',
-                line=dict(color='#1f77b4', width=3),
-                marker=dict(color='#1f77b4', size=10, line=dict(color='white', width=2)),
-                fill='tozeroy',
-                fillcolor='rgba(31, 119, 180, 0.1)',
-                name='Artigos',
-                hovertemplate='<b>Ano:</b> %{x}<br><b>Artigos:</b> %{y}<extra></extra>'
-            ))
+            # Séries pré-agregadas (ver year_series.py): somas vetorizadas, anos em ordem cronológica
+            window = st.slider("Média móvel (anos):", 1, 5, MOVING_AVERAGE_WINDOW, key="moving_average_window")
+            series = yearly_series(tec_terms_processed, env_terms_processed, selected_years, window)
+            years, articles = series["years"], series["articles"]
             
-            fig.update_layout(
-                title=f"Distribuição de Artigos por Ano ({len(selected_years)} anos selecionados)",
-                xaxis=dict(
-                    title="Ano",
-                    showgrid=True,
-                    gridcolor='rgba(128, 128, 128, 0.2)',
-                    showline=True,
-                    linecolor='black',
-                    mirror=True
-                ),
-                yaxis=dict(
-                    title="Número de Artigos",
-                    showgrid=True,
-                    gridcolor='rgba(128, 128, 128, 0.2)',
-                    showline=True,
-                    linecolor='black',
-                    mirror=True
-                ),
-                plot_bgcolor='white',
-                paper_bgcolor='white',
-                hovermode='x unified',
-                height=500
+            # Figuras memorizadas por busca, anos e parâmetros (compartilhadas entre sessões)
+            fig = cached_figure(
+                "year_series", tec_terms_processed, env_terms_processed, selected_years, window, corpus_token(),
+                lambda: plot_year_series(
+                    series, f"Distribuição de Artigos por Ano ({len(selected_years)} anos selecionados)"
+                )
             )
-            
             st.plotly_chart(fig, use_container_width=True)
             
             # Estatísticas adicionais
-            if len(series) > 0:
-                col1, col2 = st.columns(2)
+            if len(years) > 0:
+                col1, col2, col3 = st.columns(3)
                 with col1:
-                    max_year = series.loc[series['count'].idxmax(), 'year']
-                    max_count = series['count'].max()
-                    st.info(f"🏆 **Ano com mais artigos**: {max_year} ({max_count} artigos)")
+                    peak = int(articles.argmax())
+                    st.info(f"🏆 **Ano com mais artigos**: {years[peak]} ({articles[peak]} artigos)")
                 with col2:
-                    if len(series) > 1:
-                        trend = "crescente 📈" if series['count'].iloc[-1] > series['count'].iloc[0] else "decrescente 📉"
+                    if len(years) > 1:
+                        trend = "crescente 📈" if articles[-1] > articles[0] else "decrescente 📉"
                         st.info(f"📉 **Tendência**: {trend}")
+                with col3:
+                    latest_growth = series["growth"][-1]
+                    if len(years) > 1 and latest_growth == latest_growth:  # NaN após ano sem artigos
+                        st.info(f"📊 **Crescimento em {years[-1]}**: {latest_growth:+.0%}")
+            
+            # Tendência de cada termo (ou par) selecionado, dos mesmos agregados
+            st.markdown("#### Tendência por termo")
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                trend_view = st.radio("Séries:", ["Termos", "Pares TEC × ENV"], horizontal=True, key="trend_view")
+            with col2:
+                smooth = st.toggle("Média móvel", key="trend_smooth")
+            if trend_view == "Termos":
+                trends = series["terms"]
+            else:
+                trends = {f"{tec} × {env}": values for (tec, env), values in series["pairs"].items()}
+            
+            fig_t = cached_figure(
+                "trends", tec_terms_processed, env_terms_processed, selected_years,
+                (trend_view, smooth, window), corpus_token(),
+                lambda: plot_trends(
+                    years,
+                    {name: moving_average(values, window) if smooth else values for name, values in trends.items()},
+                    "Artigos por ano com cada termo" if trend_view == "Termos" else "Artigos por ano com os dois termos do par"
+                )
+            )
+            st.plotly_chart(fig_t, use_container_width=True)
+            
+            with st.expander("📋 Crescimento anual (%)"):
+                growth_df = pd.DataFrame(
+                    {name: growth_rate(values) * 100 for name, values in trends.items()},
+                    index=pd.Index(years, name="Ano")
+                )
+                st.dataframe(
+                    growth_df,
+                    use_container_width=True,
+                    column_config={name: st.column_config.NumberColumn(format="%+.0f%%") for name in growth_df.columns}
+                )
         
-        with tab2:
+        with tab2, span("render:combinations"):
             st.subheader("Combinações de Termos Mais Frequentes")
             
             if data:
@@ -236,41 +281,48 @@ if st.session_state.all_articles is not None:
                     key="top_n_slider"
                 )
                 
-                fig_b = plot_term_tuples(data, top_n=top_n, title=f"Combinações de Termos ({len(selected_years)} anos)")
+                # Combinações ordenadas e rotuladas uma vez por busca/anos; o slider só troca os dados do traço
+                version = corpus_token()
+                ranked = cached_figure(
+                    "term_tuples", tec_terms_processed, env_terms_processed, selected_years, None, version,
+                    lambda: RankedCombinations(
+                        combinations["items"], f"Combinações de Termos ({len(selected_years)} anos)"
+                    )
+                )
+                fig_b = cached_figure(
+                    "term_tuples", tec_terms_processed, env_terms_processed, selected_years, top_n, version,
+                    lambda: ranked.figure(top_n)
+                )
                 st.plotly_chart(fig_b, use_container_width=True)
                 
-                # Tabela resumida
+                # Tabela resumida (já ordenada pela seleção por heap)
                 with st.expander("📋 Ver tabela de combinações"):
                     combo_df = pd.DataFrame([
                         {
                             "TEC": ", ".join(k[0]),
                             "ENV": ", ".join(k[1]),
-                            "Contagem": v
+                            "Contagem": v,
+                            **({"Erro máx.": e} if combinations["approximate"] else {})
                         }
-                        for k, v in sorted(data.items(), key=lambda x: x[1], reverse=True)
+                        for k, v, e in combinations["items"]
                     ])
                     st.dataframe(combo_df, use_container_width=True, height=400)
+                    if combinations["distinct"] > len(combinations["items"]):
+                        st.caption(f"As {len(combinations['items'])} combinações mais frequentes de {combinations['distinct']}.")
+                    if combinations["approximate"]:
+                        st.caption(
+                            f"Contagens aproximadas (Space-Saving): cada uma excede a real em no máximo o erro indicado; "
+                            f"combinações fora da lista ocorrem no máximo {combinations['bound']} vezes."
+                        )
             else:
                 st.warning("Nenhuma combinação de termos encontrada para o período selecionado.")
         
-        with tab3:
+        with tab3, span("render:details"):
             st.subheader("Artigos Encontrados")
             
-            # Preparar DataFrame (apenas artigos dos anos filtrados)
-            df_data = {}
-            c = 0
-            for year, articles in available_articles.items():
-                for article_id, article_data in articles.items():
-                    df_data[c] = {
-                        "Ano": year,
-                        "Título": article_data.get("title", "N/A"),
-                        "Abstract": article_data.get("abstract", "N/A")[:200] + "...",
-                        "URL": article_data.get("url", "N/A"),
-                        "Termos": ", ".join(article_data.get("terms_founded", []))
-                    }
-                    c += 1
-            
-            df = pd.DataFrame(df_data).transpose()
+            # DataFrame montado uma vez por resultado/anos, no cache compartilhado entre sessões
+            with span("render:details:dataframe"):
+                df = cached_frame(handle, selected_years)
             
             if len(df) > 0:
                 # Filtros adicionais
@@ -283,18 +335,43 @@ if st.session_state.all_articles is not None:
                         key="year_filter_detail"
                     )
                 with col2:
-                    search_text = st.text_input("🔎 Buscar no título:", key="search_text_detail")
+                    search_text = st.text_input("🔎 Buscar no título e abstract:", key="search_text_detail")
                 
                 # Aplicar filtros
                 filtered_df = df[df['Ano'].isin(year_filter_detail)]
                 if search_text:
-                    filtered_df = filtered_df[filtered_df['Título'].str.contains(search_text, case=False, na=False)]
+                    # Índice de texto (BM25), restrito aos artigos já filtrados e ordenado por relevância
+                    ranked_ids = [article_id for article_id, _ in text_search(search_text, ids=filtered_df.index)]
+                    filtered_df = filtered_df.loc[ranked_ids]
                 
-                st.info(f"Mostrando {len(filtered_df)} de {len(df)} artigos")
+                # Ordenação e paginação no servidor: só a página visível é formatada e enviada
+                col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+                with col1:
+                    sort_options = (["Relevância"] if search_text else ["Original"]) + list(SORT_COLUMNS)
+                    sort_by = st.selectbox("Ordenar por:", sort_options, key="sort_detail")
+                with col2:
+                    descending = st.toggle("Decrescente", key="sort_desc_detail")
+                with col3:
+                    page_size = st.selectbox("Por página:", PAGE_SIZES, key="page_size_detail")
+                n_pages = page_count(len(filtered_df), page_size)
+                with col4:
+                    page_number = st.number_input("Página:", 1, n_pages, 1, key="page_detail")
+                
+                if sort_by in SORT_COLUMNS:
+                    filtered_df = sort_frame(filtered_df, sort_by, ascending=not descending)
+                elif descending:
+                    filtered_df = filtered_df.iloc[::-1]
+                page_number = min(page_number, n_pages)
+                page_df = page(filtered_df, page_number, page_size)
+                
+                st.info(
+                    f"Mostrando {len(page_df)} de {len(filtered_df)} artigos filtrados "
+                    f"({len(df)} no total) · página {page_number} de {n_pages}"
+                )
                 
                 # Tabela com configuração de colunas
                 st.dataframe(
-                    filtered_df,
+                    page_df,
                     use_container_width=True,
                     height=500,
                     column_config={
@@ -304,19 +381,47 @@ if st.session_state.all_articles is not None:
                     }
                 )
                 
-                # Download
-                csv = df.to_csv(index=False).encode('utf-8')
-                st.download_button(
-                    "⬇️ Download CSV Completo",
-                    csv,
-                    "artigos_petrobras.csv",
-                    "text/csv",
-                    key='download-csv'
-                )
+                # Download: registros completos, gerados em blocos só quando o usuário pede
+                # (o download_button do streamlit fixado em requirements.txt só aceita dados prontos)
+                col1, col2 = st.columns([1, 3])
+                with col1:
+                    export_format = st.selectbox("Formato:", list(FORMATS), key="export_format")
+                with col2:
+                    export_key = (tuple(tec_terms_processed), tuple(env_terms_processed), tuple(selected_years), export_format)
+                    prepared = st.session_state.get("export_data")
+                    if prepared is not None and prepared[0] != export_key:
+                        # Busca, anos ou formato mudaram: o arquivo preparado não vale mais
+                        prepared = st.session_state.export_data = None
+                    if prepared is None:
+                        if st.button("📦 Preparar Download Completo", key='prepare-export'):
+                            with st.spinner("Gerando arquivo..."):
+                                with export_file(tec_terms_processed, env_terms_processed, selected_years, export_format) as file:
+                                    prepared = st.session_state.export_data = (export_key, file.read())
+                    if prepared is not None:
+                        st.download_button(
+                            "⬇️ Download Completo",
+                            prepared[1],
+                            f"artigos_petrobras.{export_format}",
+                            FORMATS[export_format],
+                            key='download-export'
+                        )
                 
-                # JSON completo em expander
-                with st.expander("🔍 Ver JSON completo dos resultados"):
-                    st.json(available_articles)
+                # Registro completo de um artigo da página (em vez do JSON de todos os resultados)
+                with st.expander("🔍 Ver registro completo"):
+                    if len(page_df) > 0:
+                        record_id = st.selectbox(
+                            "Artigo:",
+                            page_df.index,
+                            format_func=lambda article_id: f"{page_df.at[article_id, 'Título']} ({article_id})",
+                            key="record_detail"
+                        )
+                        record = fetch_articles([record_id])[0] or {}
+                        st.json({
+                            "title": record.get("title"),
+                            "abstract": record.get("abstract"),
+                            "url": record.get("url"),
+                            "terms_founded": df.at[record_id, "Termos"],
+                        })
             else:
                 st.warning("Nenhum artigo disponível para os anos selecionados.")
 
@@ -340,5 +445,54 @@ else:
         - Gráficos interativos com Plotly
         - Filtros dinâmicos por período
         - Busca em tempo real
-        - Download de dados em CSV
-        """)
\ No newline at end of file
+        - Download de dados em CSV, Parquet ou JSON Lines
+        """)
+
+# Informações de carga da base (tempo de parse e memória por arquivo)
+with st.sidebar:
+    st.subheader("⚙️ Base de dados")
+    report = load_report()
+    if not report:
+        st.caption("Nenhum arquivo carregado ainda.")
+    for path, info in report.items():
+        memory_mb = (info["memory_bytes"] or 0) / 1024 ** 2
+        st.markdown(f"**{os.path.basename(path)}**")
+        st.caption(
+            f"Carga: {info['load_seconds']:.2f}s · "
+            f"Disco: {info['file_bytes'] / 1024 ** 2:.1f} MB · "
+            f"Memória: ~{memory_mb:.1f} MB · "
+            f"Versão: {info['generation']}"
+        )
+    cache_stats = result_cache.results.stats()
+    st.caption(
+        f"Cache de consultas: {cache_stats['entries']} itens · "
+        f"{cache_stats['bytes'] / 1024 ** 2:.1f}/{cache_stats['max_bytes'] / 1024 ** 2:.0f} MB · "
+        f"acertos {cache_stats['hit_rate']:.0%} ({cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']})"
+    )
+    startup = instrumentation.startup_report()
+    if startup:
+        with st.expander("🚀 Inicialização"):
+            for phase in startup:
+                st.caption(f"{phase['name']}: {phase['duration_ms']:.0f} ms (em +{phase['offset_ms']:.0f} ms, {phase['thread']})")
+
+
+# Detalhamento da execução atual e exportação dos histogramas (Prometheus)
+perf_request = instrumentation.finish_request()
+if show_perf_panel and perf_request is not None:
+    import pandas as pd
+
+    with st.sidebar:
+        st.subheader("⏱️ Desempenho")
+        st.caption(f"Execução completa: {perf_request['total_ms']:.1f} ms")
+        spans = sorted(perf_request["spans"], key=lambda item: item["offset_ms"])
+        st.dataframe(
+            pd.DataFrame({
+                "Etapa": ["  " * item["depth"] + item["name"] for item in spans],
+                "ms": [round(item["duration_ms"], 2) for item in spans],
+            }),
+            hide_index=True,
+            use_container_width=True
+        )
+        for name, value in sorted(perf_request["counters"].items()):
+            st.caption(f"{name}: {value:,}")
+        st.caption(f"Histogramas em {instrumentation.export_prometheus()}")
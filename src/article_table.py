@@ -0,0 +1,91 @@
+"""
+Tabela paginada de artigos (aba "Dados Detalhados" do app)
+    - O DataFrame é montado uma única vez por resultado e anos, a partir de listas por coluna
+      (sem dict de dicts nem transpose), e fica no cache compartilhado entre sessões
+    - O frame guarda só o que filtra e ordena (ano, título, termos); abstract e URL
+      são lidos do store de registros apenas para a página visível
+    - Filtro por ano e ordenação são feitos sobre as colunas inteiras (vetorizados)
+    - Formatação para exibição (N/A, abstract truncado, termos unidos) só na página visível
+"""
+
+import pandas as pd
+
+import result_cache
+import search_mechanism
+
+COLUMNS = ("Ano", "Título", "Abstract", "URL", "Termos")
+SORT_COLUMNS = ("Ano", "Título")
+PAGE_SIZES = (25, 50, 100, 250)
+ABSTRACT_PREVIEW = 200
+
+
+def build_frame(columns):
+    """
+    DataFrame com uma linha por artigo, indexado pelo id, com os valores originais
+
+    Args:
+        columns: Retorno de search_mechanism.article_columns()
+    """
+    return pd.DataFrame(
+        {
+            "Ano": columns["year"],
+            "Título": columns["title"],
+            "Termos": columns["terms_founded"],
+        },
+        index=pd.Index(columns["id"], name="id"),
+    )
+
+
+def cached_frame(handle, years):
+    """Frame do resultado (search_mechanism.search_handle) nos anos, compartilhado (não modificar)"""
+    key = result_cache.query_key("article_frame", handle["key"][1], handle["key"][2], years)
+    return result_cache.results.get_or_compute(
+        key, search_mechanism.corpus_token(),
+        lambda: build_frame(search_mechanism.article_columns(handle, list(key[3] or []))),
+    )
+
+
+def sort_frame(df, column=None, ascending=True):
+    """Ordena pela coluna (estável; títulos sem diferenciar maiúsculas); None mantém a ordem atual"""
+    if column is None:
+        return df
+    key = (lambda values: values.str.lower()) if column == "Título" else None
+    return df.sort_values(column, ascending=ascending, kind="stable", na_position="last", key=key)
+
+
+def page_count(n_rows, page_size):
+    return max(1, -(-n_rows // page_size))
+
+
+def _or_na(values):
+    values = values.fillna("")
+    return values.mask(values == "", "N/A")
+
+
+def format_rows(rows):
+    """Valores prontos para exibição (mesmo formato da tabela/CSV anteriores)"""
+    return pd.DataFrame(
+        {
+            "Ano": rows["Ano"],
+            "Título": _or_na(rows["Título"]),
+            "Abstract": _or_na(rows["Abstract"]).str.slice(0, ABSTRACT_PREVIEW) + "...",
+            "URL": _or_na(rows["URL"]),
+            "Termos": rows["Termos"].map(lambda terms: ", ".join(terms or [])),
+        },
+        index=rows.index,
+    )
+
+
+def with_details(rows, fetch=search_mechanism.fetch_articles):
+    """rows com Abstract e URL lidos dos registros completos (fetch: ids -> registros)"""
+    records = [record or {} for record in fetch(list(rows.index))]
+    return rows.assign(
+        Abstract=pd.Series([record.get("abstract") for record in records], index=rows.index, dtype=object),
+        URL=pd.Series([record.get("url") for record in records], index=rows.index, dtype=object),
+    )[list(COLUMNS)]
+
+
+def page(df, number, page_size, fetch=search_mechanism.fetch_articles):
+    """Linhas formatadas da página number (a partir de 1)"""
+    start = (number - 1) * page_size
+    return format_rows(with_details(df.iloc[start:start + page_size], fetch))
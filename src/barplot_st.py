@@ -1,5 +1,35 @@
+"""
+Gráficos do app (Plotly)
+    - RankedCombinations: combinações de uma busca já ordenadas, com rótulos formatados
+      e uma figura base validada uma única vez
+    - figure(top_n) só troca os dados do traço: layout e atributos já validados são
+      reutilizados, sem construir e validar uma figura nova a cada mudança do slider
+    - cached_figure: figuras (e combinações ordenadas) memorizadas por (consulta, anos,
+      parâmetros) no cache de resultados compartilhado entre sessões (ver result_cache.py)
+    - Séries numéricas vão como arrays NumPy de tipo compacto (int32/float32), que o
+      Plotly serializa em binário (base64) em vez de listas de números em texto
+
+As figuras devolvidas são compartilhadas entre sessões e não devem ser modificadas.
+"""
+
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
+from heavy_hitters import top_items
+from instrumentation import timed
+import result_cache
+
+# Máximo de barras do gráfico de combinações (limite do slider do app)
+MAX_BARS = 30
+
+AXIS_STYLE = dict(
+    showgrid=True,
+    gridcolor='rgba(128, 128, 128, 0.2)',
+    showline=True,
+    linecolor='black',
+    mirror=True
+)
+
 
 def format_tuple_label(tuple_data):
     """Formata a tupla para exibição no gráfico"""
@@ -7,75 +37,205 @@ def format_tuple_label(tuple_data):
     env_terms = ", ".join(tuple_data[1]) if tuple_data[1] else "N/A"
     return f"TEC: {tec_terms} | ENV: {env_terms}"
 
+
+def _bar_height(n_bars):
+    return max(400, n_bars * 35)  # Altura dinâmica
+
+
+def _figure_size(figure):
+    return len(figure.to_json(validate=False))
+
+
+def cached_figure(name, tec, env, years, params, version, build):
+    """
+    Figura (ou RankedCombinations) memorizada por consulta, anos e params, compartilhada entre sessões
+
+    Args:
+        params: Demais parâmetros que mudam a figura (ex.: top_n), hasheáveis
+        version: Versão da base (search_mechanism.corpus_token())
+        build: Função sem argumentos que monta a figura
+    """
+    key = (*result_cache.query_key(f"figure:{name}", tec, env, years), params)
+    figure = result_cache.results.get(key, version)
+    if figure is None:
+        figure = build()
+        size = figure.nbytes if isinstance(figure, RankedCombinations) else _figure_size(figure)
+        result_cache.results.put(key, figure, version, size=size)
+    return figure
+
+
+class RankedCombinations:
+    def __init__(self, items, title="Combinações de Termos", max_n=MAX_BARS):
+        """
+        Args:
+            items: [(combinação, contagem, ...)] já da maior para a menor contagem
+                   (ex.: top_term_tuples(...)["items"])
+        """
+        items = items[:max_n]
+        self.labels = np.array([format_tuple_label(item[0]) for item in items], dtype=object)
+        self.counts = np.array([item[1] for item in items], dtype=np.int32)
+        self.colors = px.colors.qualitative.Bold[:len(items)]
+        base = self._build(title)
+        spec = base.to_dict()
+        self._trace, self._layout = spec["data"][0], spec["layout"]
+        self._base = base
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def nbytes(self):
+        return _figure_size(self._base)
+
+    def _build(self, title):
+        # Criar figura
+        fig = go.Figure()
+
+        fig.add_trace(go.Bar(
+            y=self.labels,
+            x=self.counts,
+            orientation='h',
+            marker=dict(
+                color=self.colors,
+                line=dict(color='rgba(255, 255, 255, 0.6)', width=1)
+            ),
+            # Rótulo das barras a partir de x (não repete as contagens no payload)
+            texttemplate='%{x}',
+            textposition='outside',
+            textfont=dict(size=12, color='#333'),
+            hovertemplate='<b>%{y}</b><br>Contagem: %{x}<extra></extra>'
+        ))
+
+        # Configurar layout
+        fig.update_layout(
+            title=dict(
+                text=title,
+                font=dict(size=20, color='#2c3e50'),
+                x=0.5,
+                xanchor='center'
+            ),
+            xaxis=dict(
+                title='Contagem',
+                showgrid=True,
+                gridcolor='#e0e0e0',
+                title_font=dict(size=14)
+            ),
+            yaxis=dict(
+                title='',
+                autorange='reversed',  # Maior valor no topo
+                title_font=dict(size=14)
+            ),
+            plot_bgcolor='white',
+            paper_bgcolor='white',
+            height=_bar_height(len(self.labels)),
+            margin=dict(l=20, r=100, t=80, b=50),
+            showlegend=False,
+            hoverlabel=dict(
+                bgcolor="white",
+                font_size=12,
+                font_family="Arial"
+            )
+        )
+
+        return fig
+
+    def figure(self, top_n=15):
+        """Figura com as top_n primeiras combinações (apenas os dados do traço mudam)"""
+        top_n = min(top_n, len(self.labels))
+        if top_n == len(self.labels):
+            return self._base
+
+        trace = {
+            **self._trace,
+            "x": self.counts[:top_n],
+            "y": self.labels[:top_n],
+            "marker": {**self._trace["marker"], "color": self.colors[:top_n]},
+        }
+        layout = {**self._layout, "height": _bar_height(top_n)}
+        # Atributos já validados na figura base; validar de novo custaria mais que montar o traço
+        return go.Figure({"data": [trace], "layout": layout}, _validate=False)
+
+
+@timed("plot_term_tuples")
 def plot_term_tuples(result_dict, top_n=15, title="Combinações de Termos"):
     """
     Cria um gráfico de barras horizontais com as tuplas de termos
-    
+
     Args:
         result_dict: Dicionário retornado por find_terms_in_tuples()
         top_n: Número de combinações a exibir (padrão: 15)
         title: Título do gráfico
     """
-    
-    # Ordenar por contagem (decrescente)
-    sorted_items = sorted(result_dict.items(), key=lambda x: x[1], reverse=True)
-    
-    # Pegar apenas os top_n
-    top_items = sorted_items[:top_n]
-    
-    # Preparar dados
-    labels = [format_tuple_label(item[0]) for item in top_items]
-    counts = [item[1] for item in top_items]
-    
-    # Criar cores vibrantes para cada barra
-    colors = px.colors.qualitative.Bold[:len(labels)]
-    
-    # Criar figura
+    # Apenas os top_n por contagem (decrescente), selecionados por heap sem ordenar tudo
+    return RankedCombinations(top_items(result_dict.items(), top_n), title, top_n).figure(top_n)
+
+
+@timed("plot_year_series")
+def plot_year_series(series, title):
+    """
+    Linha de artigos por ano com a média móvel
+
+    Args:
+        series: Retorno de search_mechanism.yearly_series()
+    """
+    years = series["years"]
     fig = go.Figure()
-    
-    fig.add_trace(go.Bar(
-        y=labels,
-        x=counts,
-        orientation='h',
-        marker=dict(
-            color=colors,
-            line=dict(color='rgba(255, 255, 255, 0.6)', width=1)
-        ),
-        text=counts,
-        textposition='outside',
-        textfont=dict(size=12, color='#333'),
-        hovertemplate='<b>%{y}</b><br>Contagem: %{x}<extra></extra>'
+
+    fig.add_trace(go.Scatter(
+        x=years,
+        y=series["articles"].astype(np.int32),
+        mode='lines+markers',
+        line=dict(color='#1f77b4', width=3),
+        marker=dict(color='#1f77b4', size=10, line=dict(color='white', width=2)),
+        fill='tozeroy',
+        fillcolor='rgba(31, 119, 180, 0.1)',
+        name='Artigos',
+        hovertemplate='<b>Ano:</b> %{x}<br><b>Artigos:</b> %{y}<extra></extra>'
+    ))
+    fig.add_trace(go.Scatter(
+        x=years,
+        y=series["moving_average"].astype(np.float32),
+        mode='lines',
+        line=dict(color='#ff7f0e', width=2, dash='dash'),
+        name=f'Média móvel ({series["window"]} anos)',
+        hovertemplate='<b>Média móvel:</b> %{y:.1f}<extra></extra>'
     ))
-    
-    # Configurar layout
+
     fig.update_layout(
-        title=dict(
-            text=title,
-            font=dict(size=20, color='#2c3e50'),
-            x=0.5,
-            xanchor='center'
-        ),
-        xaxis=dict(
-            title='Contagem',
-            showgrid=True,
-            gridcolor='#e0e0e0',
-            title_font=dict(size=14)
-        ),
-        yaxis=dict(
-            title='',
-            autorange='reversed',  # Maior valor no topo
-            title_font=dict(size=14)
-        ),
+        title=title,
+        xaxis=dict(title="Ano", **AXIS_STYLE),
+        yaxis=dict(title="Número de Artigos", **AXIS_STYLE),
         plot_bgcolor='white',
         paper_bgcolor='white',
-        height=max(400, len(labels) * 35),  # Altura dinâmica
-        margin=dict(l=20, r=100, t=80, b=50),
-        showlegend=False,
-        hoverlabel=dict(
-            bgcolor="white",
-            font_size=12,
-            font_family="Arial"
-        )
+        hovermode='x unified',
+        height=500
+    )
+    return fig
+
+
+@timed("plot_trends")
+def plot_trends(years, trends, title):
+    """
+    Uma linha por termo (ou par)
+
+    Args:
+        trends: {nome: valores por ano}
+    """
+    fig = go.Figure()
+    for name, values in trends.items():
+        fig.add_trace(go.Scatter(
+            x=years,
+            y=np.asarray(values, dtype=np.float32),
+            mode='lines+markers',
+            name=name,
+            hovertemplate=f'<b>{name}</b><br><b>Ano:</b> %{{x}}<br><b>Artigos:</b> %{{y:.4~g}}<extra></extra>'
+        ))
+    fig.update_layout(
+        title=title,
+        xaxis=dict(title="Ano", **AXIS_STYLE),
+        yaxis=dict(title="Número de Artigos", **AXIS_STYLE),
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        height=450
     )
-    
-    return fig
\ No newline at end of file
+    return fig
@@ -0,0 +1,202 @@
+"""
+Consultas tec/env/anos em lote, sem o app
+    - Os artigos são agrupados uma única vez por assinatura (ano, termos tec, termos env),
+      percorrendo os bitmaps do índice; artigos com a mesma assinatura respondem
+      igual a qualquer consulta
+    - Todas as consultas são avaliadas juntas sobre as assinaturas (matriz
+      assinaturas × consultas), então o custo por consulta não depende do número de artigos
+    - Para cada consulta: total de artigos, total por ano, tabela de combinações
+      (mesmas contagens de find_terms_in_tuples, da maior para a menor) e, opcionalmente, os ids
+
+Arquivo de consultas (JSON com uma lista ou JSON Lines):
+    {"name": "ml-eia", "tec": ["Machine Learning"], "env": ["Impact Assessment"], "years": ["2023"]}
+
+Uso:
+    python src/batch_query.py consultas.jsonl --out resultados.json --ids
+    python src/batch_query.py --all-pairs --out pares.jsonl
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+
+import search_mechanism
+from consts import SearchParams
+
+FIELD_TYPES = ("tec", "env")
+
+
+def normalize(term):
+    return "_".join(term.lower().split())
+
+
+def read_queries(path_file):
+    """Lista de consultas de um arquivo JSON (lista) ou JSON Lines"""
+    with open(path_file, "r", encoding="utf-8") as file:
+        if path_file.endswith(".jsonl"):
+            return [json.loads(line) for line in file if line.strip()]
+        return json.load(file)
+
+
+def all_pairs(years=None):
+    """Uma consulta para cada par (tec, env) de SearchParams"""
+    params = SearchParams()
+    return [
+        {"name": f"{normalize(tec)}|{normalize(env)}", "tec": [tec], "env": [env], "years": years}
+        for tec, env in itertools.product(params.tec, params.environment)
+    ]
+
+
+class Signatures:
+    def __init__(self, index):
+        """
+        Args:
+            index: BitmapIndex (search_mechanism.load_index())
+        """
+        self.index = index
+        self.terms = {field_type: list(index.terms[field_type]) for field_type in FIELD_TYPES}
+        if any(len(terms) > 64 for terms in self.terms.values()):
+            raise ValueError("Batch queries support at most 64 terms per field")
+
+        masks = {}
+        for field_type, terms in self.terms.items():
+            mask = np.zeros(index.size, dtype=np.uint64)
+            for bit, term in enumerate(terms):
+                mask[index.ordinals(index.term_bitmap(field_type, term))] |= np.uint64(1) << np.uint64(bit)
+            masks[field_type] = mask
+
+        self.years, article_years = np.unique(np.array(index.years, dtype=str), return_inverse=True)
+        keys = np.empty(index.size, dtype=[("year", np.int64), ("tec", np.uint64), ("env", np.uint64)])
+        keys["year"], keys["tec"], keys["env"] = article_years, masks["tec"], masks["env"]
+
+        unique, inverse, self.weights = np.unique(keys, return_inverse=True, return_counts=True)
+        self.year = unique["year"]
+        self.tec = unique["tec"]
+        self.env = unique["env"]
+
+        # Assinatura de cada artigo (ordinal)
+        self.signature = inverse.reshape(-1)
+
+        # Combinação (termos tec, termos env) de cada assinatura, como em year_term_tuples
+        pairs, self.pair = np.unique(unique[["tec", "env"]], return_inverse=True)
+        self.pair_keys = [(self.decode("tec", p["tec"]), self.decode("env", p["env"])) for p in pairs]
+
+    def __len__(self):
+        return len(self.weights)
+
+    def decode(self, field_type, mask):
+        mask = int(mask)
+        return tuple(sorted(t for bit, t in enumerate(self.terms[field_type]) if mask >> bit & 1))
+
+    def encode(self, field_type, terms):
+        terms = {normalize(t) for t in terms}
+        mask = 0
+        for bit, term in enumerate(self.terms[field_type]):
+            if term in terms:
+                mask |= 1 << bit
+        return mask
+
+    def evaluate(self, queries):
+        """Matriz (assinaturas × consultas) com as assinaturas que satisfazem cada consulta"""
+        tec = np.array([self.encode("tec", q.get("tec") or []) for q in queries], dtype=np.uint64)
+        env = np.array([self.encode("env", q.get("env") or []) for q in queries], dtype=np.uint64)
+        years = np.ones((len(self.years), len(queries)), dtype=bool)
+        for j, query in enumerate(queries):
+            if query.get("years"):
+                years[:, j] = np.isin(self.years, [str(y) for y in query["years"]])
+
+        return (
+            ((self.tec[:, None] & tec[None, :]) != 0)
+            & ((self.env[:, None] & env[None, :]) != 0)
+            & years[self.year]
+        )
+
+    def result(self, query, hits, with_ids=False):
+        """
+        Args:
+            hits: Coluna de evaluate() da consulta
+        """
+        selected = np.flatnonzero(hits)
+        weights = self.weights[selected]
+        by_year = np.bincount(self.year[selected], weights=weights, minlength=len(self.years))
+        by_pair = np.bincount(self.pair[selected], weights=weights, minlength=len(self.pair_keys))
+        pairs = np.flatnonzero(by_pair)
+        pairs = pairs[np.argsort(-by_pair[pairs], kind="stable")]
+
+        result = {
+            "name": query.get("name"),
+            "tec": query.get("tec"),
+            "env": query.get("env"),
+            "years": query.get("years"),
+            "articles": int(weights.sum()),
+            "by_year": {str(self.years[y]): int(by_year[y]) for y in np.flatnonzero(by_year)[::-1]},
+            "combinations": [
+                {"tec": list(self.pair_keys[p][0]), "env": list(self.pair_keys[p][1]), "count": int(by_pair[p])}
+                for p in pairs
+            ],
+        }
+        if with_ids:
+            ids = self.index.ids
+            result["ids"] = [ids[ordinal] for ordinal in np.flatnonzero(hits[self.signature])]
+        return result
+
+
+def run_batch(queries, with_ids=False, signatures=None):
+    """
+    Avalia todas as consultas juntas
+
+    Args:
+        queries: Lista de {"tec", "env", "years" (opcional), "name" (opcional)}
+        signatures: Signatures já construídas (padrão: a partir do índice atual)
+
+    Returns:
+        Um resultado por consulta, na mesma ordem
+    """
+    signatures = signatures or Signatures(search_mechanism.load_index())
+    hits = signatures.evaluate(queries)
+    return [signatures.result(query, hits[:, j], with_ids) for j, query in enumerate(queries)]
+
+
+def write_results(results, path_file):
+    temp_path = f"{path_file}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        if path_file.endswith(".jsonl"):
+            for result in results:
+                file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        else:
+            json.dump(results, file, ensure_ascii=False)
+    os.replace(temp_path, path_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa muitas consultas tec/env/anos de uma vez")
+    parser.add_argument("queries", nargs="?", help="Arquivo de consultas (.json ou .jsonl)")
+    parser.add_argument("--all-pairs", action="store_true", help="Uma consulta por par (tec, env) de SearchParams")
+    parser.add_argument("--years", nargs="*", help="Anos das consultas de --all-pairs")
+    parser.add_argument("--ids", action="store_true", help="Inclui os ids dos artigos de cada consulta")
+    parser.add_argument("--out", required=True, help="Resultados (.json ou .jsonl)")
+    args = parser.parse_args()
+
+    queries = read_queries(args.queries) if args.queries else []
+    if args.all_pairs:
+        queries += all_pairs(args.years)
+    if not queries:
+        parser.error("informe um arquivo de consultas ou --all-pairs")
+
+    start = time.perf_counter()
+    signatures = Signatures(search_mechanism.load_index())
+    loaded = time.perf_counter()
+    results = run_batch(queries, args.ids, signatures)
+    write_results(results, args.out)
+    print(
+        f"{len(queries)} consultas sobre {signatures.index.size} artigos ({len(signatures)} assinaturas): "
+        f"carga {loaded - start:.2f}s, consultas {time.perf_counter() - loaded:.2f}s; gravado em {args.out}"
+    )
+
+
+if __name__ == "__main__":
+    main()
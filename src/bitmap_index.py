@@ -0,0 +1,265 @@
+"""
+Índice invertido em bitmaps
+    - Cada artigo recebe um ordinal (posição na base, agrupada por ano)
+    - Cada termo tec/env aponta para um bitmap com os ordinais onde aparece (contagem > 0)
+    - Cada ano aponta para o bitmap dos seus artigos
+    - Consultas tec/env/anos viram operações bit a bit (&, |) sem varrer a base
+
+Os bitmaps são inteiros Python: as operações &, | e bit_count rodam em C
+e ocupam apenas ceil(n/8) bytes por termo. Como inteiros são imutáveis, os lotes
+de extend() ficam pendentes e são incorporados de uma vez na primeira consulta.
+"""
+
+import sys
+import threading
+
+import numpy as np
+
+FIELD_TYPES = ("tec", "env")
+
+
+def bitmap_from_ordinals(ordinals, size):
+    bits = np.zeros(size, dtype=bool)
+    bits[np.asarray(ordinals, dtype=np.int64)] = True
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+
+def ordinals_from_bitmap(bitmap, size):
+    """Ordinais (ordenados) dos bits ligados"""
+    if not bitmap:
+        return np.empty(0, dtype=np.int64)
+    raw = np.frombuffer(bitmap.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder="little")[:size])
+
+
+class BitmapIndex:
+    def __init__(self, years, ids, terms, term_ordinals):
+        """
+        Args:
+            years: Ano de cada ordinal
+            ids: Id do artigo de cada ordinal
+            terms: {"tec": [...], "env": [...]} na ordem original das chaves dos artigos
+            term_ordinals: {(field_type, termo): ordinais onde o termo aparece}
+        """
+        self.years = []
+        self.ids = []
+        self.size = 0
+        self.terms = {field_type: [] for field_type in FIELD_TYPES}
+        self._term_bitmaps = {}
+        self._year_bitmaps = {}
+        self._all_bitmap = 0
+        # Lotes ainda não incorporados aos bitmaps: [(offset, bitmaps dos termos, bitmaps dos anos)]
+        self._pending = []
+        self._merge_lock = threading.Lock()
+        self._ordinal_of = None
+
+        self.extend(years, ids, terms, term_ordinals)
+        # Artigos da base; ordinais a partir daqui vieram de segmentos delta
+        self.base_size = self.size
+
+    def extend(self, years, ids, terms, term_ordinals):
+        """
+        Acrescenta artigos ao final do índice (ordinais relativos ao lote)
+
+        Custo proporcional ao lote: os bitmaps do lote ficam pendentes até a próxima
+        consulta, que paga uma única cópia de cada bitmap alterado por todos os lotes.
+        """
+        offset = self.size
+        batch_size = len(ids)
+
+        self.years.extend(years)
+        self.ids.extend(ids)
+        self.size += batch_size
+        if self._ordinal_of is not None:
+            self._ordinal_of.update((id, offset + i) for i, id in enumerate(ids))
+
+        for field_type in FIELD_TYPES:
+            known = set(self.terms[field_type])
+            self.terms[field_type].extend(t for t in terms.get(field_type, []) if t not in known)
+
+        term_bitmaps = {key: bitmap_from_ordinals(ordinals, batch_size) for key, ordinals in term_ordinals.items()}
+        year_ordinals = {}
+        for ordinal, year in enumerate(years):
+            year_ordinals.setdefault(year, []).append(ordinal)
+        year_bitmaps = {year: bitmap_from_ordinals(ordinals, batch_size) for year, ordinals in year_ordinals.items()}
+
+        with self._merge_lock:
+            self._pending.append((offset, term_bitmaps, year_bitmaps))
+
+    def _merge_pending(self):
+        """Incorpora os lotes pendentes (os dicts são trocados inteiros: leitores nunca veem um meio-termo)"""
+        if not self._pending:
+            return
+        with self._merge_lock:
+            if not self._pending:
+                return
+            # Os lotes são combinados entre si relativos ao primeiro; só então deslocados para a base
+            start = self._pending[0][0]
+            merged = ({}, {})
+            for offset, *bitmaps in self._pending:
+                for parts, batch in zip(merged, bitmaps):
+                    for key, bitmap in batch.items():
+                        parts[key] = parts.get(key, 0) | (bitmap << (offset - start))
+
+            term_bitmaps, year_bitmaps = dict(self._term_bitmaps), dict(self._year_bitmaps)
+            for bitmaps, parts in ((term_bitmaps, merged[0]), (year_bitmaps, merged[1])):
+                for key, part in parts.items():
+                    bitmaps[key] = bitmaps.get(key, 0) | (part << start)
+
+            self._term_bitmaps, self._year_bitmaps = term_bitmaps, year_bitmaps
+            self._all_bitmap = (1 << self.size) - 1
+            self._pending = []
+
+    @property
+    def term_bitmaps(self):
+        self._merge_pending()
+        return self._term_bitmaps
+
+    @property
+    def year_bitmaps(self):
+        self._merge_pending()
+        return self._year_bitmaps
+
+    @property
+    def all_bitmap(self):
+        self._merge_pending()
+        return self._all_bitmap
+
+    @staticmethod
+    def _collect(year_ocurrencies):
+        years, ids = [], []
+        terms = {field_type: {} for field_type in FIELD_TYPES}
+        term_ordinals = {}
+
+        for year, articles in year_ocurrencies.items():
+            for id, article in articles.items():
+                ordinal = len(ids)
+                years.append(year)
+                ids.append(id)
+
+                for field_type in FIELD_TYPES:
+                    for k, v in article[field_type].items():
+                        terms[field_type].setdefault(k, None)
+                        if v > 0:
+                            term_ordinals.setdefault((field_type, k), []).append(ordinal)
+
+        return years, ids, {f: list(t) for f, t in terms.items()}, term_ordinals
+
+    @classmethod
+    def from_year_ocurrencies(cls, year_ocurrencies):
+        """Constrói a partir do conteúdo de terms-by-year-complete.json"""
+        return cls(*cls._collect(year_ocurrencies))
+
+    def extend_from_year_ocurrencies(self, year_ocurrencies):
+        """Acrescenta um lote no formato de terms-by-year-complete.json"""
+        self.extend(*self._collect(year_ocurrencies))
+
+    def ordinal_of(self, id):
+        if self._ordinal_of is None:
+            self._ordinal_of = {id: ordinal for ordinal, id in enumerate(self.ids)}
+        return self._ordinal_of.get(id)
+
+    @classmethod
+    def from_term_table(cls, table):
+        """Constrói a partir da tabela de contagens do formato colunar"""
+        import columnar_corpus
+
+        terms = {}
+        term_ordinals = {}
+        for field_type in FIELD_TYPES:
+            columns = columnar_corpus.term_columns(table, field_type)
+            terms[field_type] = [columnar_corpus.split_term_column(c)[1] for c in columns]
+            for column, term in zip(columns, terms[field_type]):
+                term_ordinals[(field_type, term)] = np.flatnonzero(table.column(column).to_numpy() > 0)
+
+        return cls(
+            table.column("year").to_pylist(),
+            table.column("id").to_pylist(),
+            terms,
+            term_ordinals
+        )
+
+    @classmethod
+    def from_term_matrix(cls, matrix, min_count=1):
+        """Constrói a partir das linhas da base de uma TermMatrix (sem os segmentos delta)"""
+        counts = matrix.counts[:matrix.base_size]
+        term_ordinals = {
+            key: np.flatnonzero(counts[:, column] >= min_count)
+            for key, column in matrix.column.items()
+        }
+        rows = np.arange(matrix.base_size)
+        return cls(
+            matrix.year_list(rows),
+            matrix.id_list(rows),
+            {field_type: list(terms) for field_type, terms in matrix.terms.items()},
+            term_ordinals
+        )
+
+    @property
+    def nbytes(self):
+        bitmaps = [*self.term_bitmaps.values(), *self.year_bitmaps.values()]
+        return sum(sys.getsizeof(b) for b in bitmaps) + sum(sys.getsizeof(i) for i in self.ids)
+
+    def term_bitmap(self, field_type, term):
+        return self.term_bitmaps.get((field_type, term), 0)
+
+    def any_of(self, field_type, terms):
+        bitmap = 0
+        for term in terms:
+            bitmap |= self.term_bitmap(field_type, term)
+        return bitmap
+
+    def year_bitmap(self, years=None):
+        if not years:
+            return self.all_bitmap
+        bitmap = 0
+        for year in years:
+            bitmap |= self.year_bitmaps.get(year, 0)
+        return bitmap
+
+    def doc_frequency(self, field_type, term):
+        return self.term_bitmap(field_type, term).bit_count()
+
+    def query(self, tec, env, years=None):
+        """Bitmap dos artigos com algum termo tec E algum termo env (E algum dos anos)"""
+        return self.any_of("tec", tec) & self.any_of("env", env) & self.year_bitmap(years)
+
+    def ordinals(self, bitmap):
+        return ordinals_from_bitmap(bitmap, self.size)
+
+    def matched_terms(self, bitmap, tec, env):
+        """
+        Termos encontrados por artigo, na mesma ordem que a varredura produz
+
+        Returns:
+            (ordinals, terms) com terms[i] a lista de termos do artigo ordinals[i]
+        """
+        ordinals = self.ordinals(bitmap)
+        selected = [
+            (field_type, term)
+            for field_type, chosen in (("tec", tec), ("env", env))
+            for term in self.terms[field_type]
+            if term in chosen
+        ]
+
+        hits = np.column_stack([
+            np.isin(ordinals, self.ordinals(bitmap & self.term_bitmap(*key)), assume_unique=True)
+            for key in selected
+        ]) if selected else np.zeros((len(ordinals), 0), dtype=bool)
+
+        terms = [[selected[j][1] for j in np.flatnonzero(hit)] for hit in hits]
+        return ordinals, terms
+
+    def group_by_year(self, ordinals, values):
+        grouped = {}
+        for ordinal, value in zip(ordinals, values):
+            year = self.years[ordinal]
+            if year not in grouped:
+                grouped[year] = {}
+            grouped[year][self.ids[ordinal]] = value
+        return grouped
+
+    def find_terms(self, tec, env, years=None):
+        """Mesmo formato de search_mechanism.find_terms: {ano: {id: [termos]}}"""
+        ordinals, terms = self.matched_terms(self.query(tec, env, years), tec, env)
+        return self.group_by_year(ordinals, terms)
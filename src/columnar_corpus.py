@@ -0,0 +1,192 @@
+"""
+Formato colunar (Parquet) da base
+    - Uma linha por artigo: ano, id, contagem de cada termo tec/env, título, abstract e url
+    - Buscas por termos leem apenas as colunas de contagem (nunca os abstracts)
+    - Textos são lidos somente dos row groups que contêm artigos encontrados
+
+Conversão a partir dos JSON:
+    python src/columnar_corpus.py
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from consts import data_files
+from corpus_loader import file_hash, load_shared
+from term_matrix import _ordered_terms
+
+TERM_SEP = "__"
+FIELD_TYPES = ("tec", "env")
+TEXT_COLUMNS = ("title", "abstract", "url")
+MAX_COUNT = np.iinfo(np.uint16).max
+
+
+def term_column(field_type, term):
+    return f"{field_type}{TERM_SEP}{term}"
+
+
+def split_term_column(column):
+    field_type, _, term = column.partition(TERM_SEP)
+    return field_type, term
+
+
+def convert(terms_path=data_files["terms_by_year"],
+            complete_path=data_files["complete_results"],
+            out_path=data_files["columnar"],
+            row_group_size=4096):
+    """Gera o arquivo Parquet a partir dos dois JSON da base"""
+
+    with open(terms_path, "r", encoding="utf-8") as file:
+        year_ocurrencies = json.load(file)
+    with open(complete_path, "r", encoding="utf-8") as file:
+        complete_data = json.load(file)
+
+    terms = {field_type: _ordered_terms(year_ocurrencies, field_type) for field_type in FIELD_TYPES}
+    n_rows = sum(len(articles) for articles in year_ocurrencies.values())
+
+    years, ids = [], []
+    texts = {column: [] for column in TEXT_COLUMNS}
+    counts = {
+        term_column(field_type, term): np.zeros(n_rows, dtype=np.uint16)
+        for field_type in FIELD_TYPES
+        for term in terms[field_type]
+    }
+
+    row = 0
+    for year, articles in year_ocurrencies.items():
+        for id, article in articles.items():
+            years.append(year)
+            ids.append(id)
+
+            for field_type in FIELD_TYPES:
+                for term, v in article[field_type].items():
+                    counts[term_column(field_type, term)][row] = min(v, MAX_COUNT)
+
+            record = complete_data.get(id) or {}
+            for column in TEXT_COLUMNS:
+                texts[column].append(record.get(column))
+
+            row += 1
+
+    table = pa.table({
+        "year": pa.array(years, pa.string()),
+        "id": pa.array(ids, pa.string()),
+        **{column: pa.array(values) for column, values in counts.items()},
+        **{column: pa.array(values, pa.string()) for column, values in texts.items()},
+    })
+    table = table.replace_schema_metadata({
+        "tec_terms": json.dumps(terms["tec"]),
+        "env_terms": json.dumps(terms["env"]),
+        "terms_by_year_sha256": file_hash(terms_path),
+        "complete_results_sha256": file_hash(complete_path),
+    })
+
+    # Escrita atômica: leitores nunca veem um Parquet truncado
+    temp_path = f"{out_path}.tmp"
+    pq.write_table(table, temp_path, row_group_size=row_group_size, compression="zstd")
+    os.replace(temp_path, out_path)
+    return out_path
+
+
+def read_term_table(path_file):
+    """Tabela com ano, id e contagens (sem textos), lida do arquivo"""
+    parquet_file = pq.ParquetFile(path_file)
+    columns = [c for c in parquet_file.schema_arrow.names if c not in TEXT_COLUMNS]
+    return parquet_file.read(columns=columns)
+
+
+def load_term_table(path_file=data_files["columnar"]):
+    """Tabela com ano, id e contagens (sem textos), compartilhada pelo processo"""
+    return load_shared(path_file, parser=read_term_table)
+
+
+def term_columns(table, field_type, selected=None):
+    prefix = field_type + TERM_SEP
+    return [
+        c for c in table.column_names
+        if c.startswith(prefix) and (selected is None or c[len(prefix):] in selected)
+    ]
+
+
+def match_rows(table, tec, env, min_count=1):
+    """
+    Linhas com ao menos um termo tec e um termo env selecionados (contagem >= min_count)
+
+    Returns:
+        (rows, terms) onde terms[i] é a lista de termos encontrados na linha rows[i]
+    """
+    tec_cols = term_columns(table, "tec", tec)
+    env_cols = term_columns(table, "env", env)
+    if not tec_cols or not env_cols:
+        return np.empty(0, dtype=np.int64), []
+
+    columns = tec_cols + env_cols
+    hits = np.column_stack([table.column(c).to_numpy() >= min_count for c in columns])
+    mask = hits[:, :len(tec_cols)].any(axis=1) & hits[:, len(tec_cols):].any(axis=1)
+    rows = np.flatnonzero(mask)
+
+    names = [split_term_column(c)[1] for c in columns]
+    terms = [[names[j] for j in np.flatnonzero(hit)] for hit in hits[rows]]
+
+    return rows, terms
+
+
+def group_by_year(table, rows, values):
+    """Monta {ano: {id: valor}} preservando a ordem das linhas"""
+    years = table.column("year").take(rows).to_pylist()
+    ids = table.column("id").take(rows).to_pylist()
+
+    grouped = {}
+    for year, id, value in zip(years, ids, values):
+        if year not in grouped:
+            grouped[year] = {}
+        grouped[year][id] = value
+
+    return grouped
+
+
+def find_terms(table, tec, env, min_count=1):
+    rows, terms = match_rows(table, tec, env, min_count)
+    return group_by_year(table, rows, terms)
+
+
+def read_records(path_file, rows, columns=TEXT_COLUMNS):
+    """Lê os textos apenas dos row groups que contêm as linhas pedidas"""
+    parquet_file = pq.ParquetFile(path_file)
+    metadata = parquet_file.metadata
+    group_ends = np.cumsum([metadata.row_group(g).num_rows for g in range(metadata.num_row_groups)])
+
+    rows = np.asarray(rows, dtype=np.int64)
+    records = [None] * len(rows)
+    groups = np.searchsorted(group_ends, rows, side="right")
+
+    for group in np.unique(groups):
+        positions = np.flatnonzero(groups == group)
+        start = group_ends[group - 1] if group > 0 else 0
+        chunk = parquet_file.read_row_group(int(group), columns=list(columns))
+        chunk = chunk.take(rows[positions] - start).to_pylist()
+        for position, record in zip(positions, chunk):
+            records[position] = record
+
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte a base JSON para Parquet")
+    parser.add_argument("--terms", default=data_files["terms_by_year"])
+    parser.add_argument("--complete", default=data_files["complete_results"])
+    parser.add_argument("--out", default=data_files["columnar"])
+    parser.add_argument("--row-group-size", type=int, default=4096)
+    args = parser.parse_args()
+
+    out = convert(args.terms, args.complete, args.out, args.row_group_size)
+    print(f"Parquet gerado em {out}")
+
+
+if __name__ == "__main__":
+    main()
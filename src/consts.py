@@ -4,10 +4,24 @@ class SearchParams:
         self.environment = search_keywords["environment"]
         self.tec_var = variations["tec"]
         self.env_var = variations["environment"]
+        self.canonical = canonical_terms
+
+data_files = {
+    'terms_by_year': 'src/terms-by-year-complete.json',
+    'complete_results': 'src/complete-unique-results-scopus.json',
+    'columnar': 'src/corpus.parquet',
+    'deltas': 'src/deltas',
+    'record_store': 'src/records.bin',
+    'record_index': 'src/records.idx.npy',
+    'text_index': 'src/text-index.npz',
+    'snapshot': 'src/corpus.snapshot',
+    'shards': 'src/shards'
+}
 
 repo_endpoints = {
     'sciencedirect': 'https://www.sciencedirect.com/search',
-    'elsevier': 'https://api.elsevier.com/content/search/scopus'
+    'elsevier': 'https://api.elsevier.com/content/search/scopus',
+    'sciencedirect_api': 'https://api.elsevier.com/content/search/sciencedirect'
 }
 
 environment = [
@@ -66,4 +80,15 @@ env_vars = [
 variations = {
     "environment": env_vars,
     "tec": tec_vars
+}
+
+# Termo canônico de cada variação (usado na contagem de termos)
+canonical_terms = {
+    "Digital Twin": "Digital Twins",
+    "Digital Technology": "Digital Technologies",
+    "Internet of Thing": "Internet of Things",
+    "Environment IoT": "Environmental Internet of Things",
+    "Environments IoT": "Environmental Internet of Things",
+    "Impacts Assessment": "Impact Assessment",
+    "Environmental Modelling": "Environmental Modeling",
 }
\ No newline at end of file
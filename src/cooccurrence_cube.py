@@ -0,0 +1,158 @@
+"""
+Cubo de coocorrência (ano x combinação tec x combinação env)
+    - Construído uma vez a partir de year_term_tuples()
+    - Apenas as células observadas são guardadas: cada par (combinação tec, combinação env)
+      recebe um id e counts[ano, par] guarda a contagem
+    - Filtro de anos: fatia das linhas + soma
+    - Filtro de termos: máscara vetorizada sobre a matriz booleana par × termo
+      (sem limite de tamanho do vocabulário)
+    - Artigos por ano de uma busca: soma das colunas dos pares selecionados pela máscara
+"""
+
+import numpy as np
+
+from corpus_loader import heap_nbytes
+
+ABSENT = np.iinfo(np.int32).max
+
+
+class CooccurrenceCube:
+    def __init__(self, year_tuples):
+        """
+        Args:
+            year_tuples: Retorno de search_mechanism.year_term_tuples()
+        """
+        self.years = []
+        self.year_index = {}
+        self.pair_keys = []
+        self.pair_id = {}
+        self.counts = np.zeros((0, 0), dtype=np.int64)
+        # Posição da primeira ocorrência do par dentro de cada ano (ordem do Counter original)
+        self.ranks = np.zeros((0, 0), dtype=np.int32)
+
+        self.add(year_tuples)
+
+    def add(self, year_tuples):
+        """
+        Soma contagens de um lote (mesmo formato de year_term_tuples) ao cubo
+
+        Anos e pares novos viram novas linhas/colunas; o custo é proporcional
+        ao lote e ao número de pares distintos, nunca ao número de artigos.
+        """
+        for year, ts in year_tuples.items():
+            if year not in self.year_index:
+                self.year_index[year] = len(self.years)
+                self.years.append(year)
+            for _tuple in ts:
+                if _tuple not in self.pair_id:
+                    self.pair_id[_tuple] = len(self.pair_keys)
+                    self.pair_keys.append(_tuple)
+
+        grow = (len(self.years) - self.counts.shape[0], len(self.pair_keys) - self.counts.shape[1])
+        if grow != (0, 0):
+            self.counts = np.pad(self.counts, ((0, grow[0]), (0, grow[1])))
+            self.ranks = np.pad(self.ranks, ((0, grow[0]), (0, grow[1])), constant_values=ABSENT)
+        elif year_tuples and not self.counts.flags.writeable:
+            # Contagens mapeadas do snapshot são somente leitura: o primeiro lote ganha uma cópia própria
+            self.counts, self.ranks = np.array(self.counts), np.array(self.ranks)
+
+        for year, ts in year_tuples.items():
+            y = self.year_index[year]
+            next_rank = int((self.ranks[y] != ABSENT).sum())
+            for _tuple, count in ts.items():
+                p = self.pair_id[_tuple]
+                self.counts[y, p] += count
+                if self.ranks[y, p] == ABSENT:
+                    self.ranks[y, p] = next_rank
+                    next_rank += 1
+
+        self._index_combos()
+
+    @classmethod
+    def from_arrays(cls, years, pair_keys, counts, ranks):
+        """Reconstrói a partir das contagens já agregadas (ver snapshot.py)"""
+        cube = cls({})
+        cube.years = list(years)
+        cube.year_index = {year: y for y, year in enumerate(cube.years)}
+        cube.pair_keys = list(pair_keys)
+        cube.pair_id = {key: p for p, key in enumerate(cube.pair_keys)}
+        cube.counts, cube.ranks = counts, ranks
+        cube._index_combos()
+        return cube
+
+    def _index_combos(self):
+        # Combinações distintas de cada eixo e seus termos (matriz booleana combinação × termo)
+        self.vocabulary = sorted({t for key in self.pair_keys for side in key for t in side})
+        column = {t: i for i, t in enumerate(self.vocabulary)}
+
+        self.combos = []
+        self.pair_combos = np.zeros((2, len(self.pair_keys)), dtype=np.int64)
+        for axis in range(2):
+            combo_id = {}
+            for p, key in enumerate(self.pair_keys):
+                combo = key[axis]
+                if combo not in combo_id:
+                    combo_id[combo] = len(combo_id)
+                self.pair_combos[axis, p] = combo_id[combo]
+
+            combo_terms = np.zeros((len(combo_id), len(self.vocabulary)), dtype=bool)
+            for combo, c in combo_id.items():
+                combo_terms[c, [column[t] for t in combo]] = True
+            self.combos.append(combo_terms)
+
+        self.pair_terms = self.combos[0][self.pair_combos[0]] | self.combos[1][self.pair_combos[1]]
+
+    @property
+    def nbytes(self):
+        return heap_nbytes(self.counts, self.ranks, self.pair_combos, self.pair_terms)
+
+    def year_rows(self, years=[]):
+        if len(years) == 0:
+            return np.arange(len(self.years))
+        return np.array(sorted({self.year_index[y] for y in years if y in self.year_index}), dtype=np.int64)
+
+    def terms_columns(self, terms):
+        return np.array([i for i, t in enumerate(self.vocabulary) if t in terms], dtype=np.int64)
+
+    def terms_mask(self, tec, env):
+        """Pares com ao menos um termo em tec e ao menos um termo em env"""
+        return (
+            self.pair_terms[:, self.terms_columns(tec)].any(axis=1)
+            & self.pair_terms[:, self.terms_columns(env)].any(axis=1)
+        )
+
+    def find_terms_in_tuples(self, tec, env, years=[]):
+        """Mesmo resultado de search_mechanism.find_terms_in_tuples"""
+        rows = self.year_rows(years)
+        counts = self.counts[rows]
+        present = counts > 0
+        selected = np.flatnonzero(self.terms_mask(tec, env) & present.any(axis=0))
+        if len(selected) == 0:
+            return {}
+
+        totals = counts[:, selected].sum(axis=0)
+        first_year = present[:, selected].argmax(axis=0)
+        first_rank = self.ranks[rows][first_year, selected]
+        order = np.lexsort((first_rank, first_year))
+
+        return {self.pair_keys[selected[i]]: int(totals[i]) for i in order}
+
+    def year_counts(self, tec, env):
+        """Artigos da busca tec/env em cada ano (na ordem de self.years)"""
+        return self.counts[:, self.terms_mask(tec, env)].sum(axis=1)
+
+    def year_tuples(self):
+        """Conteúdo do cubo no formato de year_term_tuples (pares na ordem de primeira ocorrência)"""
+        result = {}
+        for y, year in enumerate(self.years):
+            present = np.flatnonzero(self.counts[y] > 0)
+            order = present[np.argsort(self.ranks[y, present], kind="stable")]
+            result[year] = {self.pair_keys[p]: int(self.counts[y, p]) for p in order}
+        return result
+
+    def tuple_count(self, nested_tuple, years=[]):
+        """Contagem exata de uma combinação (sem varrer as demais)"""
+        p = self.pair_id.get(nested_tuple)
+        if p is None:
+            return 0
+        return int(self.counts[self.year_rows(years), p].sum())
@@ -0,0 +1,203 @@
+"""
+Carregamento compartilhado dos arquivos da base
+    - Cada arquivo é lido e parseado uma única vez por processo
+    - Todas as sessões do Streamlit reutilizam o mesmo objeto (somente leitura)
+    - Recarrega automaticamente quando o mtime/tamanho e o hash do arquivo mudam
+    - Registra tempo de carga e memória ocupada por arquivo
+    - map_npz(): arrays de .npz mapeados em memória, compartilhados entre processos
+      pelo cache de páginas do SO (snapshot, índice de texto)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+import zipfile
+
+import numpy as np
+
+from instrumentation import count, span
+
+logger = logging.getLogger(__name__)
+
+_entries = {}
+_lock = threading.Lock()
+_path_locks = {}
+
+
+def file_hash(path_file, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path_file, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def deep_sizeof(obj):
+    """Estimativa (em bytes) da memória ocupada por uma estrutura JSON já carregada"""
+    seen = set()
+    stack = [obj]
+    total = 0
+
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+
+    return total
+
+
+def heap_nbytes(*arrays):
+    """Bytes dos arrays no heap do processo (arrays mapeados de arquivo não contam)"""
+    return sum(int(array.nbytes) for array in arrays if not isinstance(array, np.memmap))
+
+
+def map_npz(path_file):
+    """
+    Arrays de um .npz (np.savez, sem compressão) mapeados em memória, somente leitura
+
+    Nada é copiado para o heap: as páginas vêm do cache do SO e são compartilhadas
+    por todos os processos que mapeiam o mesmo arquivo. Membros comprimidos ou
+    vazios são lidos normalmente.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path_file) as archive, open(path_file, "rb") as file:
+        for info in archive.infolist():
+            name = info.filename.removesuffix(".npy")
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member, allow_pickle=False)
+                continue
+
+            # Cabeçalho local do zip: 30 bytes fixos + nome + campo extra, seguido do .npy
+            file.seek(info.header_offset)
+            name_length, extra_length = struct.unpack("<HH", file.read(30)[26:30])
+            file.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+            if dtype.hasobject:
+                raise ValueError(f"{path_file}: member {name} holds Python objects and cannot be mapped")
+
+            if 0 in shape:
+                arrays[name] = np.empty(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(
+                    path_file, dtype=dtype, mode="r", shape=shape,
+                    order="F" if fortran_order else "C", offset=file.tell(),
+                )
+    return arrays
+
+
+def _memory_of(data):
+    # Tabelas Arrow/arrays NumPy informam o próprio tamanho
+    if hasattr(data, "nbytes"):
+        return int(data.nbytes)
+    return deep_sizeof(data)
+
+
+def _path_lock(path):
+    with _lock:
+        if path not in _path_locks:
+            _path_locks[path] = threading.RLock()
+        return _path_locks[path]
+
+
+def _json_parser(path_file):
+    with open(path_file, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def load_shared(path_file, parser=_json_parser, measure_memory=True):
+    """
+    Retorna o conteúdo do arquivo, parseando apenas na primeira chamada
+    ou quando o arquivo foi alterado em disco.
+
+    Args:
+        path_file: Caminho do arquivo
+        parser: Função que recebe o caminho e devolve o objeto carregado
+        measure_memory: Se deve estimar a memória ocupada após a carga
+    """
+    path = os.path.abspath(path_file)
+    key = (path, parser)
+
+    with _path_lock(path):
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        entry = _entries.get(key)
+
+        if entry is not None and entry["signature"] == signature:
+            return entry["data"]
+
+        digest = file_hash(path)
+        if entry is not None and entry["hash"] == digest:
+            # Apenas o mtime mudou (ex.: touch/cópia), o conteúdo é o mesmo
+            entry["signature"] = signature
+            return entry["data"]
+
+        start = time.perf_counter()
+        with span(f"load:{os.path.basename(path)}:{getattr(parser, '__name__', 'parser')}"):
+            data = parser(path)
+        load_seconds = time.perf_counter() - start
+        count("bytes_loaded", stat.st_size)
+
+        _entries[key] = {
+            "data": data,
+            "signature": signature,
+            "hash": digest,
+            "generation": (entry["generation"] + 1) if entry else 1,
+            "load_seconds": load_seconds,
+            "memory_bytes": _memory_of(data) if measure_memory else None,
+            "file_bytes": stat.st_size,
+            "loaded_at": time.time(),
+        }
+        logger.info(
+            "Loaded %s in %.3fs (%s bytes on disk, ~%s bytes in memory)",
+            path, load_seconds, stat.st_size, _entries[key]["memory_bytes"]
+        )
+
+        return data
+
+
+def corpus_version(path_file):
+    """Hash do conteúdo atualmente carregado para o arquivo (None se ainda não carregado)"""
+    path = os.path.abspath(path_file)
+    for (entry_path, _), entry in _entries.items():
+        if entry_path == path:
+            return entry["hash"]
+    return None
+
+
+def load_report():
+    """Tempo de carga e memória de cada arquivo carregado no processo"""
+    return {
+        path: {k: v for k, v in entry.items() if k != "data"}
+        for (path, _), entry in _entries.items()
+    }
+
+
+def forget(path_file):
+    """Descarta do cache um arquivo removido do disco"""
+    path = os.path.abspath(path_file)
+    with _lock:
+        for key in [key for key in _entries if key[0] == path]:
+            del _entries[key]
+
+
+def clear():
+    with _lock:
+        _entries.clear()
@@ -0,0 +1,141 @@
+"""
+Exportação dos artigos de uma busca para CSV, Parquet ou JSON Lines
+    - Registros completos (abstract inteiro), lidos em blocos da base
+      (search_mechanism.iter_complete_articles) e gravados bloco a bloco:
+      a memória não cresce com o tamanho do resultado
+    - No app o arquivo só é gerado quando o download é pedido
+    - Sem termos tec/env, exporta todos os artigos com algum termo de cada campo
+
+Uso:
+    python src/exporter.py --format parquet --out artigos.parquet
+    python src/exporter.py --tec machine_learning --env impact_assessment --years 2023 2024 --out ml.csv
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import tempfile
+
+import search_mechanism
+from consts import SearchParams
+
+FIELDS = ("id", "year", "title", "abstract", "url", "terms")
+FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "jsonl": "application/x-ndjson",
+}
+
+
+def _values(row):
+    return (row["id"], row["year"], row["title"], row["abstract"], row["url"], row["terms_founded"])
+
+
+def write_csv(chunks, file):
+    text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(FIELDS)
+    rows = 0
+    for chunk in chunks:
+        for row in chunk:
+            *values, terms = _values(row)
+            writer.writerow([*values, ", ".join(terms)])
+        rows += len(chunk)
+    text.flush()
+    text.detach()
+    return rows
+
+
+def write_jsonl(chunks, file):
+    rows = 0
+    for chunk in chunks:
+        lines = (json.dumps(dict(zip(FIELDS, _values(row))), ensure_ascii=False) for row in chunk)
+        file.write(("\n".join(lines) + "\n").encode("utf-8"))
+        rows += len(chunk)
+    return rows
+
+
+def write_parquet(chunks, file):
+    """Um row group por bloco"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        *((field, pa.string()) for field in FIELDS[:-1]),
+        ("terms", pa.list_(pa.string())),
+    ])
+    rows = 0
+    with pq.ParquetWriter(file, schema) as writer:
+        for chunk in chunks:
+            columns = list(zip(*map(_values, chunk)))
+            writer.write_table(pa.table(dict(zip(FIELDS, columns)), schema=schema))
+            rows += len(chunk)
+    return rows
+
+
+WRITERS = {
+    "csv": write_csv,
+    "parquet": write_parquet,
+    "jsonl": write_jsonl,
+}
+
+
+def default_terms():
+    params = SearchParams()
+    return (
+        ["_".join(t.lower().split()) for t in params.tec],
+        ["_".join(t.lower().split()) for t in params.environment],
+    )
+
+
+def export(file, tec, env, years=None, format="csv", chunk_size=search_mechanism.EXPORT_CHUNK_SIZE):
+    """
+    Grava os artigos da busca em file (arquivo binário aberto)
+
+    Returns:
+        Número de artigos exportados
+    """
+    if format not in WRITERS:
+        raise ValueError(f"Unknown export format {format!r}")
+    chunks = search_mechanism.iter_complete_articles(tec, env, years, chunk_size)
+    return WRITERS[format](chunks, file)
+
+
+def export_file(tec, env, years=None, format="csv"):
+    """
+    Exporta para um arquivo temporário (removido ao ser fechado), já posicionado no início
+
+    Usado pelo botão de download do app (lido só quando o usuário pede o arquivo).
+    """
+    file = tempfile.TemporaryFile()
+    export(file, tec, env, years, format)
+    file.seek(0)
+    return file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta os artigos de uma busca (CSV, Parquet ou JSON Lines)")
+    parser.add_argument("--tec", nargs="*", help="Termos tec (padrão: todos)")
+    parser.add_argument("--env", nargs="*", help="Termos env (padrão: todos)")
+    parser.add_argument("--years", nargs="*", help="Anos (padrão: todos)")
+    parser.add_argument("--format", choices=list(WRITERS), help="Padrão: extensão de --out")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--chunk-size", type=int, default=search_mechanism.EXPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    default_tec, default_env = default_terms()
+    format = args.format or os.path.splitext(args.out)[1].lstrip(".")
+    if format not in WRITERS:
+        parser.error(f"formato desconhecido: {format!r} (use --format)")
+
+    temp_path = f"{args.out}.tmp"
+    with open(temp_path, "wb") as file:
+        rows = export(file, args.tec or default_tec, args.env or default_env, args.years, format, args.chunk_size)
+    os.replace(temp_path, args.out)
+    print(f"{rows} artigos exportados para {args.out}")
+
+
+if __name__ == "__main__":
+    main()
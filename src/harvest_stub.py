@@ -0,0 +1,111 @@
+"""
+Servidor local que reproduz respostas gravadas das APIs de busca da Elsevier
+    - Respostas em JSON: {endpoint: {consulta: [entradas]}}, ex.:
+      {"scopus": {"TITLE-ABS-KEY(\"Machine Learning\") AND ...": [{"eid": ..., "dc:title": ...}]}}
+    - Pagina por start/count e responde no formato "search-results" da API real
+    - fail_every=N: a cada N requisições responde 429 ou 503, para exercitar as novas tentativas
+    - delay: atraso (s) por resposta, para observar a concorrência do harvester
+
+Permite testar harvester.py de ponta a ponta sem acessar a rede:
+    python src/harvest_stub.py respostas.json --port 8765
+    python src/harvester.py --endpoint scopus=http://localhost:8765/scopus --jsonl coleta.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+
+import tornado.web
+
+
+class SearchHandler(tornado.web.RequestHandler):
+    def initialize(self, server):
+        self.server = server
+
+    async def get(self, endpoint):
+        server = self.server
+        server.requests += 1
+        if server.delay:
+            await asyncio.sleep(server.delay)
+        if server.fail_every and server.requests % server.fail_every == 0:
+            server.failures += 1
+            self.set_status(429 if server.failures % 2 else 503)
+            self.set_header("Retry-After", "0")
+            self.finish({"error-response": {"error-message": "Stub failure"}})
+            return
+
+        query = self.get_argument("query", "")
+        start = int(self.get_argument("start", "0"))
+        count = int(self.get_argument("count", "25"))
+        entries = server.responses.get(endpoint, {}).get(query)
+        if entries is None:
+            self.set_status(404)
+            self.finish({"error-response": {"error-message": f"No canned response for {query!r}"}})
+            return
+
+        page = entries[start:start + count] or [{"@_fa": "true", "error": "Result set was empty"}]
+        self.finish({
+            "search-results": {
+                "opensearch:totalResults": str(len(entries)),
+                "opensearch:startIndex": str(start),
+                "opensearch:itemsPerPage": str(count),
+                "entry": page,
+            }
+        })
+
+
+class StubServer:
+    def __init__(self, responses, fail_every=0, delay=0.0, quiet=False):
+        self.responses = responses
+        self.quiet = quiet
+        self.fail_every = fail_every
+        self.delay = delay
+        self.requests = 0
+        self.failures = 0
+        self.http_server = None
+
+    def app(self):
+        return tornado.web.Application(
+            [(r"/(\w+)", SearchHandler, {"server": self})],
+            log_function=self.log if self.quiet else None,
+        )
+
+    @staticmethod
+    def log(handler):
+        """Não registra as requisições (quiet=True)"""
+
+    def listen(self, port=0, address="127.0.0.1"):
+        """Inicia o servidor no loop de eventos atual; port=0 escolhe uma porta livre"""
+        self.http_server = self.app().listen(port, address)
+        port = next(iter(self.http_server._sockets.values())).getsockname()[1]
+        return f"http://{address}:{port}"
+
+    def stop(self):
+        if self.http_server is not None:
+            self.http_server.stop()
+
+
+def load_responses(path_file):
+    with open(path_file, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+async def serve(responses, port, fail_every, delay):
+    base_url = StubServer(responses, fail_every, delay).listen(port)
+    print(f"Servidor de respostas gravadas em {base_url}/<endpoint>")
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local com respostas gravadas da API de busca")
+    parser.add_argument("responses", help="JSON {endpoint: {consulta: [entradas]}}")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-every", type=int, default=0, help="Responde 429/503 a cada N requisições")
+    parser.add_argument("--delay", type=float, default=0.0, help="Atraso por resposta (s)")
+    args = parser.parse_args()
+
+    asyncio.run(serve(load_responses(args.responses), args.port, args.fail_every, args.delay))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+Coleta assíncrona de artigos nas APIs de busca da Elsevier (Scopus e ScienceDirect)
+    - Cada combinação tec × env de search_keywords vira uma consulta por endpoint
+    - As páginas de cada consulta são buscadas em paralelo por um cliente HTTP
+      assíncrono com número máximo de conexões (AsyncHTTPClient do tornado)
+    - Limite de requisições por segundo por endpoint e novas tentativas com
+      backoff exponencial (respeitando Retry-After) em 429, 5xx e falhas de conexão
+    - Os artigos são contados com o mesmo autômato de term_counter.py e gravados
+      em lotes no formato da base (segmentos delta de ingest.py ou um arquivo JSONL)
+    - Checkpoint: as páginas cujos artigos já foram gravados ficam registradas,
+      então uma coleta interrompida continua de onde parou
+
+A chave da API vem de ELSEVIER_API_KEY.
+
+Uso:
+    python src/harvester.py --endpoints scopus sciencedirect
+    python src/harvester.py --endpoint scopus=http://localhost:8765/scopus --jsonl coleta.jsonl
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import time
+from urllib.parse import urlencode
+
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError, HTTPRequest
+
+from consts import repo_endpoints, search_keywords
+from term_counter import TermMatcher, count_record, vocabulary
+
+ENDPOINTS = {
+    "scopus": repo_endpoints["elsevier"],
+    "sciencedirect": repo_endpoints["sciencedirect_api"],
+}
+# Limites padrão da Elsevier (requisições por segundo)
+RATE_LIMITS = {
+    "scopus": 9,
+    "sciencedirect": 2,
+}
+PAGE_SIZE = 25
+MAX_RESULTS = 5000
+RETRY_STATUS = {429, 500, 502, 503, 504, 599}
+CHECKPOINT_FILE = "harvest-checkpoint.json"
+
+
+class RateLimiter:
+    """Espaça as requisições de um endpoint em intervalos de 1/rate segundos"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class Checkpoint:
+    """Páginas já gravadas de cada consulta: {consulta: {"total": n, "done": [starts]}}"""
+
+    def __init__(self, path_file):
+        self.path_file = path_file
+        self.queries = {}
+        if path_file and os.path.exists(path_file):
+            with open(path_file, "r", encoding="utf-8") as file:
+                self.queries = json.load(file)["queries"]
+
+    def total(self, query_id):
+        return self.queries.get(query_id, {}).get("total")
+
+    def done(self, query_id):
+        return set(self.queries.get(query_id, {}).get("done", []))
+
+    def set_total(self, query_id, total):
+        self.queries.setdefault(query_id, {"total": None, "done": []})["total"] = total
+
+    def mark_done(self, query_id, start):
+        self.queries.setdefault(query_id, {"total": None, "done": []})["done"].append(start)
+
+    def save(self):
+        if not self.path_file:
+            return
+        temp_path = f"{self.path_file}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"queries": self.queries}, file)
+        os.replace(temp_path, self.path_file)
+
+
+def search_query(endpoint, tec, env):
+    if endpoint == "scopus":
+        return f'TITLE-ABS-KEY("{tec}") AND TITLE-ABS-KEY("{env}")'
+    return f'"{tec}" AND "{env}"'
+
+
+def combinations(endpoints):
+    """(endpoint, tec, env) para todas as combinações de search_keywords"""
+    return list(itertools.product(endpoints, search_keywords["technologies"], search_keywords["environment"]))
+
+
+def parse_entry(entry):
+    """Registro no formato da base a partir de uma entrada da API, ou None se incompleta"""
+    id = entry.get("eid") or entry.get("dc:identifier")
+    year = (entry.get("prism:coverDate") or "")[:4]
+    if "error" in entry or not id or not year:
+        return None
+
+    url = entry.get("prism:url")
+    for link in entry.get("link", []):
+        if link.get("@ref") in ("scopus", "scidir"):
+            url = link.get("@href")
+            break
+
+    return {
+        "id": id,
+        "year": year,
+        "title": entry.get("dc:title") or "",
+        "abstract": entry.get("dc:description") or "",
+        "url": url,
+    }
+
+
+class JsonlWriter:
+    """
+    Acrescenta os lotes a um arquivo JSON Lines (lido por ingest.read_batch)
+
+    Ids já presentes no arquivo (de uma coleta anterior interrompida) não são regravados.
+    """
+
+    def __init__(self, path_file):
+        self.path_file = path_file
+        self.ids = set()
+        if os.path.exists(path_file):
+            with open(path_file, "r", encoding="utf-8") as file:
+                self.ids = {json.loads(line)["id"] for line in file if line.strip()}
+
+    def __call__(self, records):
+        written = 0
+        with open(self.path_file, "a", encoding="utf-8") as file:
+            for record in records:
+                if record["id"] in self.ids:
+                    continue
+                self.ids.add(record["id"])
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                written += 1
+            file.flush()
+            os.fsync(file.fileno())
+        return written
+
+
+def delta_writer(records):
+    """Grava o lote como segmento delta da base (ingest.append_batch)"""
+    import ingest
+
+    _, written, _ = ingest.append_batch(records)
+    return written
+
+
+class Harvester:
+    def __init__(self, endpoints, writer=delta_writer, checkpoint=None, api_key=None, concurrency=8,
+                 rate_limits=None, batch_size=500, page_size=PAGE_SIZE, max_results=MAX_RESULTS,
+                 max_retries=5, backoff=1.0, timeout=30):
+        """
+        Args:
+            endpoints: {nome: url}
+            writer: Função que grava um lote de registros e devolve quantos gravou
+            checkpoint: Checkpoint (None = coleta sem retomada)
+            rate_limits: {nome: requisições por segundo} (padrão: RATE_LIMITS)
+        """
+        rate_limits = {**RATE_LIMITS, **(rate_limits or {})}
+        self.endpoints = endpoints
+        self.writer = writer
+        self.checkpoint = checkpoint or Checkpoint(None)
+        self.api_key = api_key
+        self.batch_size = batch_size
+        self.page_size = page_size
+        self.max_results = max_results
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.rate_limits = rate_limits
+        self.client = None
+        self.requests = None
+        self.limiters = None
+
+        patterns, self.keys = vocabulary()
+        self.matcher = TermMatcher(patterns)
+        self.buffer = []
+        self.pending_pages = []
+        self.seen = set()
+        self.stats = {"requests": 0, "retries": 0, "pages": 0, "records": 0, "written": 0}
+
+    def retry_delay(self, attempt, retry_after=None):
+        """Retry-After do servidor, se houver; senão backoff exponencial com jitter"""
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            return self.backoff * 2 ** attempt * (1 + random.random())
+
+    async def fetch_page(self, endpoint, query, start):
+        """(total de resultados, entradas) de uma página"""
+        params = {"query": query, "start": start, "count": self.page_size}
+        if endpoint == "scopus":
+            params["view"] = "COMPLETE"
+        headers = {"Accept": "application/json"}
+        if self.api_key:
+            headers["X-ELS-APIKey"] = self.api_key
+        request = HTTPRequest(
+            f"{self.endpoints[endpoint]}?{urlencode(params)}", headers=headers, request_timeout=self.timeout
+        )
+
+        for attempt in range(self.max_retries + 1):
+            await self.limiters[endpoint].wait()
+            async with self.requests:
+                self.stats["requests"] += 1
+                try:
+                    response = await self.client.fetch(request)
+                    break
+                except HTTPClientError as error:
+                    if error.code not in RETRY_STATUS or attempt == self.max_retries:
+                        raise
+                    retry_after = error.response.headers.get("Retry-After") if error.response else None
+                except OSError:
+                    if attempt == self.max_retries:
+                        raise
+                    retry_after = None
+
+            self.stats["retries"] += 1
+            await asyncio.sleep(self.retry_delay(attempt, retry_after))
+
+        results = json.loads(response.body)["search-results"]
+        return int(results.get("opensearch:totalResults") or 0), results.get("entry", [])
+
+    def add_page(self, query_id, start, entries):
+        for entry in entries:
+            record = parse_entry(entry)
+            if record is None or record["id"] in self.seen:
+                continue
+            self.seen.add(record["id"])
+            record.update(count_record(record, self.matcher, self.keys))
+            self.buffer.append(record)
+
+        self.stats["pages"] += 1
+        self.pending_pages.append((query_id, start))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Grava o lote acumulado e só então marca as páginas dele no checkpoint"""
+        if self.buffer:
+            self.stats["records"] += len(self.buffer)
+            self.stats["written"] += self.writer(self.buffer)
+        for query_id, start in self.pending_pages:
+            self.checkpoint.mark_done(query_id, start)
+        self.checkpoint.save()
+        self.buffer = []
+        self.pending_pages = []
+
+    async def harvest_query(self, endpoint, tec, env):
+        query = search_query(endpoint, tec, env)
+        query_id = f"{endpoint}|{query}"
+        done = self.checkpoint.done(query_id)
+        total = self.checkpoint.total(query_id)
+
+        if total is None:
+            total, entries = await self.fetch_page(endpoint, query, 0)
+            self.checkpoint.set_total(query_id, total)
+            if 0 not in done:
+                self.add_page(query_id, 0, entries)
+                done.add(0)
+
+        starts = [
+            start for start in range(0, min(total, self.max_results), self.page_size)
+            if start not in done
+        ]
+
+        async def page(start):
+            _, entries = await self.fetch_page(endpoint, query, start)
+            self.add_page(query_id, start, entries)
+
+        await asyncio.gather(*(page(start) for start in starts))
+
+    async def run(self, queries):
+        """
+        Args:
+            queries: Lista de (endpoint, tec, env)
+        """
+        # O cliente e os limitadores pertencem ao loop de eventos em execução
+        self.client = AsyncHTTPClient(force_instance=True, max_clients=self.concurrency)
+        self.requests = asyncio.Semaphore(self.concurrency)
+        self.limiters = {name: RateLimiter(self.rate_limits.get(name)) for name in self.endpoints}
+        try:
+            await asyncio.gather(*(self.harvest_query(*query) for query in queries))
+        finally:
+            # Páginas completas já recebidas são gravadas mesmo se a coleta falhar
+            self.flush()
+            self.client.close()
+        return self.stats
+
+
+def parse_endpoints(names, overrides):
+    endpoints = {name: ENDPOINTS[name] for name in names}
+    for override in overrides or []:
+        name, url = override.split("=", 1)
+        endpoints[name] = url
+    return endpoints
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coleta artigos nas APIs da Elsevier para as combinações tec × env")
+    parser.add_argument("--endpoints", nargs="*", default=["scopus"], choices=list(ENDPOINTS))
+    parser.add_argument("--endpoint", action="append", metavar="NOME=URL",
+                        help="Substitui a URL de um endpoint (ex.: servidor local de harvest_stub.py)")
+    parser.add_argument("--jsonl", help="Grava os lotes neste arquivo JSONL em vez de segmentos delta")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE)
+    parser.add_argument("--concurrency", type=int, default=8, help="Requisições simultâneas")
+    parser.add_argument("--rate", action="append", metavar="NOME=N", help="Requisições por segundo de um endpoint")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--max-results", type=int, default=MAX_RESULTS, help="Resultados por consulta")
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--backoff", type=float, default=1.0, help="Espera base entre tentativas (s)")
+    args = parser.parse_args()
+
+    endpoints = parse_endpoints(args.endpoints, args.endpoint)
+    rate_limits = {name: float(rate) for name, rate in (r.split("=", 1) for r in args.rate or [])}
+    harvester = Harvester(
+        endpoints,
+        writer=JsonlWriter(args.jsonl) if args.jsonl else delta_writer,
+        checkpoint=Checkpoint(args.checkpoint),
+        api_key=os.environ.get("ELSEVIER_API_KEY"),
+        concurrency=args.concurrency,
+        rate_limits=rate_limits,
+        batch_size=args.batch_size,
+        max_results=args.max_results,
+        max_retries=args.max_retries,
+        backoff=args.backoff,
+    )
+
+    start = time.perf_counter()
+    stats = asyncio.run(harvester.run(combinations(list(endpoints))))
+    print(
+        f"{stats['written']} artigos gravados ({stats['pages']} páginas, {stats['requests']} requisições, "
+        f"{stats['retries']} novas tentativas) em {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Combinações mais frequentes com memória limitada (Space-Saving)
+    - SpaceSaving(capacity): monitora no máximo capacity chaves; contagens com peso
+    - Cada contagem estimada superestima a real em no máximo error (count - error <= real <= count),
+      e error <= total / capacity; chaves fora do sketch ocorreram no máximo bound() vezes
+    - Sketches são mescláveis: o sketch de vários anos é a mescla dos sketches de cada ano
+    - top(n) e top_items(n) usam seleção por heap (heapq.nlargest), sem ordenar tudo
+
+Referências: Metwally, Agrawal e El Abbadi (2005), "Efficient Computation of Frequent
+and Top-k Elements in Data Streams"; Agarwal et al. (2012), "Mergeable Summaries".
+"""
+
+import heapq
+from operator import itemgetter
+
+
+def top_items(items, n):
+    """
+    As n maiores (chave, contagem) de items, da maior para a menor
+
+    Empates mantêm a ordem de items, igual a sorted(items, key=contagem, reverse=True)[:n].
+    """
+    return heapq.nlargest(n, items, key=itemgetter(1))
+
+
+class SpaceSaving:
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("Space-Saving capacity must be at least 1")
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        # Heap (contagem, ordem de inserção, chave) com entradas obsoletas descartadas sob demanda
+        self._heap = []
+        self._serial = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __contains__(self, key):
+        return key in self.counts
+
+    def _push(self, key):
+        self._serial += 1
+        heapq.heappush(self._heap, (self.counts[key], self._serial, key))
+
+    def _pop_min(self):
+        while True:
+            count, _, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                return key, count
+
+    def _compact_heap(self):
+        # Entradas obsoletas se acumulam quando chaves monitoradas são incrementadas
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = []
+            for key in self.counts:
+                self._push(key)
+
+    def add(self, key, count=1):
+        self.total += count
+        if key in self.counts:
+            self.counts[key] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = count
+            self.errors[key] = 0
+        else:
+            # Substitui a chave de menor contagem; a nova herda essa contagem como erro
+            evicted, minimum = self._pop_min()
+            del self.counts[evicted], self.errors[evicted]
+            self.counts[key] = minimum + count
+            self.errors[key] = minimum
+        self._push(key)
+        self._compact_heap()
+
+    def update(self, counts):
+        """Soma um lote {chave: contagem}"""
+        for key, count in counts.items():
+            self.add(key, count)
+
+    def bound(self):
+        """Contagem máxima possível de uma chave que não está no sketch"""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def merge(self, other):
+        """
+        Novo sketch equivalente a ter contado os dois fluxos (capacidade do maior)
+
+        Chaves ausentes de um sketch cheio recebem o bound() dele como contagem e erro,
+        mantendo count - error <= real <= count.
+        """
+        merged = SpaceSaving(max(self.capacity, other.capacity))
+        self_bound, other_bound = self.bound(), other.bound()
+
+        entries = []
+        for key in {**self.counts, **other.counts}:
+            count = self.counts.get(key, self_bound) + other.counts.get(key, other_bound)
+            error = self.errors.get(key, self_bound) + other.errors.get(key, other_bound)
+            entries.append((key, count, error))
+
+        for key, count, error in heapq.nlargest(merged.capacity, entries, key=itemgetter(1)):
+            merged.counts[key] = count
+            merged.errors[key] = error
+            merged._push(key)
+        merged.total = self.total + other.total
+        return merged
+
+    @classmethod
+    def merge_all(cls, sketches, capacity):
+        merged = cls(capacity)
+        for sketch in sketches:
+            merged = merged.merge(sketch)
+        return merged
+
+    def top(self, n, keep=None):
+        """
+        As n chaves de maior contagem estimada: lista de (chave, contagem, erro máximo)
+
+        Args:
+            keep: Função chave -> bool para filtrar antes da seleção
+        """
+        entries = ((key, count, self.errors[key]) for key, count in self.counts.items() if keep is None or keep(key))
+        return heapq.nlargest(n, entries, key=itemgetter(1))
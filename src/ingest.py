@@ -0,0 +1,166 @@
+"""
+Ingestão incremental de novos artigos
+    - append_batch(records): grava o lote como um segmento delta em src/deltas/
+      (custo proporcional ao lote; a base não é relida nem regravada)
+    - Índice de bitmaps e cubo já carregados aplicam o segmento na próxima consulta
+    - compact(): incorpora os segmentos aos JSON base (e ao Parquet/store de registros/snapshot/shards/índice de texto, se existirem)
+
+Cada registro do lote traz id, year, as contagens tec/env e os campos do
+registro completo (title, abstract, url, ...):
+    {"id": "...", "year": "2024", "tec": {...}, "env": {...}, "title": "...", ...}
+
+Uso:
+    python src/ingest.py append novos.jsonl
+    python src/ingest.py compact
+"""
+
+import argparse
+import json
+import os
+import time
+
+import corpus_loader
+import record_store
+import search_mechanism
+import snapshot
+import text_index
+import year_shards
+from consts import data_files
+
+TERM_FIELDS = ("tec", "env")
+
+
+def _write_json(path_file, data):
+    """Escrita atômica: grava em arquivo temporário e substitui"""
+    temp_path = f"{path_file}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(data, file, ensure_ascii=False)
+    os.replace(temp_path, path_file)
+
+
+def read_batch(path_file):
+    """Lê um lote em JSON (lista de registros) ou JSON Lines"""
+    with open(path_file, "r", encoding="utf-8") as file:
+        if path_file.endswith(".jsonl"):
+            return [json.loads(line) for line in file if line.strip()]
+        return json.load(file)
+
+
+def append_batch(records):
+    """
+    Grava um lote de artigos novos como segmento delta
+
+    Artigos cujo id já existe na base (ou nos deltas) são ignorados.
+
+    Returns:
+        (caminho do segmento ou None, artigos gravados, artigos ignorados)
+    """
+    index = search_mechanism.load_index()
+    terms_by_year = {}
+    complete_results = {}
+    skipped = 0
+
+    for record in records:
+        id = record["id"]
+        if index.ordinal_of(id) is not None or id in complete_results:
+            skipped += 1
+            continue
+
+        missing = [field for field in TERM_FIELDS if field not in record]
+        if missing:
+            raise ValueError(f"Record {id} has no {', '.join(missing)} term counts")
+
+        year = str(record["year"])
+        terms_by_year.setdefault(year, {})[id] = {field: dict(record[field]) for field in TERM_FIELDS}
+        complete_results[id] = {k: v for k, v in record.items() if k not in (*TERM_FIELDS, "id")}
+
+    if not complete_results:
+        return None, 0, skipped
+
+    os.makedirs(data_files["deltas"], exist_ok=True)
+    segment_path = os.path.join(data_files["deltas"], f"segment-{time.time_ns()}.json")
+    _write_json(segment_path, {
+        "terms_by_year": terms_by_year,
+        "complete_results": complete_results,
+    })
+
+    return segment_path, len(complete_results), skipped
+
+
+def compact():
+    """
+    Incorpora todos os segmentos delta à base e remove os segmentos
+
+    Os segmentos são removidos antes de a base ser substituída: um leitor
+    concorrente pode deixar de ver os artigos novos por um instante, mas
+    nunca os vê duplicados.
+
+    Returns:
+        Número de artigos incorporados
+    """
+    segments = search_mechanism.delta_segments()
+    if not segments:
+        return 0
+
+    with open(data_files["terms_by_year"], "r", encoding="utf-8") as file:
+        terms_by_year = json.load(file)
+    with open(data_files["complete_results"], "r", encoding="utf-8") as file:
+        complete_results = json.load(file)
+
+    merged = 0
+    for segment_path in segments:
+        with open(segment_path, "r", encoding="utf-8") as file:
+            segment = json.load(file)
+        for year, articles in segment["terms_by_year"].items():
+            terms_by_year.setdefault(year, {}).update(articles)
+        complete_results.update(segment["complete_results"])
+        merged += len(segment["complete_results"])
+
+    staged = []
+    for key, data in (("terms_by_year", terms_by_year), ("complete_results", complete_results)):
+        temp_path = f"{data_files[key]}.compact"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False)
+        staged.append((temp_path, data_files[key]))
+
+    for segment_path in segments:
+        os.remove(segment_path)
+        corpus_loader.forget(segment_path)
+    for temp_path, path_file in staged:
+        os.replace(temp_path, path_file)
+
+    # Caminhos sempre explícitos: os padrões dos builders são fixados na importação
+    # e não acompanham data_files alterado em tempo de execução
+    terms_path, complete_path = data_files["terms_by_year"], data_files["complete_results"]
+    if os.path.exists(data_files["columnar"]) and search_mechanism.import_columnar() is not None:
+        search_mechanism.columnar_corpus.convert(terms_path, complete_path, data_files["columnar"])
+    if os.path.exists(data_files["record_index"]):
+        record_store.build(complete_path, data_files["record_store"], data_files["record_index"])
+    if os.path.exists(data_files["snapshot"]):
+        snapshot.build(data_files["snapshot"], (terms_path,))
+    if os.path.isdir(data_files["shards"]):
+        year_shards.build(data_files["shards"], terms_path)
+    if os.path.exists(data_files["text_index"]):
+        # Depois dos demais: os ordinais vêm do índice de bitmaps da base já compactada
+        text_index.build(search_mechanism.load_index(), complete_path).save(data_files["text_index"])
+
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestão incremental da base")
+    commands = parser.add_subparsers(dest="command", required=True)
+    append_parser = commands.add_parser("append", help="Grava um lote (.json ou .jsonl) como segmento delta")
+    append_parser.add_argument("batch")
+    commands.add_parser("compact", help="Incorpora os segmentos delta à base")
+    args = parser.parse_args()
+
+    if args.command == "append":
+        segment_path, written, skipped = append_batch(read_batch(args.batch))
+        print(f"{written} artigos gravados em {segment_path} ({skipped} já existentes ignorados)")
+    else:
+        print(f"{compact()} artigos incorporados à base")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Instrumentação leve de desempenho
+    - span("nome"): mede a duração de um trecho (aninhável)
+    - count("nome", n): soma contadores (registros varridos, bytes carregados, ...)
+    - Cada execução do app (start_request) guarda o detalhamento da última requisição
+    - Durações são agregadas em histogramas exportáveis no formato texto do Prometheus
+    - startup_phase("nome"): fases da partida do processo (imports, carga, aquecimento),
+      registradas e logadas sempre, apenas na primeira vez de cada nome
+
+Desligada por padrão (PERF_INSTRUMENTATION=1 ou set_enabled(True) para ligar no processo).
+start_request(label, active) liga ou desliga apenas a requisição da thread atual
+(ex.: o painel de desempenho de uma sessão do app), sem afetar as demais.
+Desligada, span() devolve sempre o mesmo contexto vazio e count() retorna
+logo na primeira linha, então o custo fica em uma checagem de flag.
+"""
+
+import contextlib
+import functools
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_enabled = os.environ.get("PERF_INSTRUMENTATION") == "1"
+_local = threading.local()
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_NOOP = contextlib.nullcontext()
+# Referência das fases de partida: importação deste módulo (início do app)
+_process_started = time.perf_counter()
+_startup_phases = {}
+
+
+def enabled():
+    """Se a instrumentação está ligada na requisição da thread atual ou, fora de uma, no processo"""
+    active = getattr(_local, "active", None)
+    return _enabled if active is None else active
+
+
+def set_enabled(value):
+    """Liga ou desliga o padrão do processo (requisições com active explícito não mudam)"""
+    global _enabled
+    _enabled = bool(value)
+
+
+def _request():
+    return getattr(_local, "request", None)
+
+
+def start_request(label, active=None):
+    """
+    Inicia o registro de uma requisição (uma execução do script do app) na thread atual
+
+    Args:
+        active: Liga/desliga a instrumentação só nesta requisição (None: padrão do processo)
+    """
+    _local.active = None if active is None else bool(active)
+    if not enabled():
+        _local.request = None
+        return
+    _local.request = {"label": label, "started": time.perf_counter(), "spans": [], "counters": {}, "depth": 0}
+
+
+def finish_request():
+    """Encerra a requisição da thread atual"""
+    request = _request()
+    _local.active = None
+    if request is None:
+        return None
+
+    request["total_ms"] = (time.perf_counter() - request["started"]) * 1000
+    _local.request = None
+    return request
+
+
+class _Span:
+    __slots__ = ("name", "start", "request", "depth")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.request = _request()
+        if self.request is not None:
+            self.depth = self.request["depth"]
+            self.request["depth"] += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed_ms = (time.perf_counter() - self.start) * 1000
+        _observe(self.name, elapsed_ms)
+
+        request = self.request
+        if request is not None:
+            request["depth"] -= 1
+            request["spans"].append({
+                "name": self.name,
+                "depth": self.depth,
+                "offset_ms": (self.start - request["started"]) * 1000,
+                "duration_ms": elapsed_ms,
+            })
+        return False
+
+
+def span(name):
+    if not enabled():
+        return _NOOP
+    return _Span(name)
+
+
+def timed(name):
+    """Decorador equivalente a envolver a função em span(name)"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    if not enabled():
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+    request = _request()
+    if request is not None:
+        request["counters"][name] = request["counters"].get(name, 0) + value
+
+
+def _record_startup(name, start, elapsed_ms):
+    phase = {
+        "name": name,
+        "thread": threading.current_thread().name,
+        "offset_ms": (start - _process_started) * 1000,
+        "duration_ms": elapsed_ms,
+    }
+    with _lock:
+        _startup_phases[name] = phase
+    _observe(f"startup:{name}", elapsed_ms)
+    logger.info("Startup phase %s: %.1f ms (at +%.1f ms, %s)", name, elapsed_ms, phase["offset_ms"], phase["thread"])
+
+
+@contextlib.contextmanager
+def _startup_span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_startup(name, start, (time.perf_counter() - start) * 1000)
+
+
+def startup_phase(name):
+    """Mede uma fase da partida; repetições do mesmo nome (novas execuções do app) não são medidas"""
+    with _lock:
+        if name in _startup_phases:
+            return _NOOP
+        _startup_phases[name] = None
+    return _startup_span(name)
+
+
+def startup_mark(name):
+    """Registra o instante (desde o início do processo) em que algo aconteceu pela primeira vez"""
+    with _lock:
+        if name in _startup_phases:
+            return
+        _startup_phases[name] = None
+    _record_startup(name, time.perf_counter(), 0.0)
+
+
+def startup_report():
+    """Fases de partida concluídas, na ordem em que começaram"""
+    with _lock:
+        phases = [phase for phase in _startup_phases.values() if phase is not None]
+    return sorted(phases, key=lambda phase: phase["offset_ms"])
+
+
+def _observe(name, elapsed_ms):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = {"buckets": [0] * len(BUCKETS_MS), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(BUCKETS_MS):
+            if elapsed_ms <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += elapsed_ms
+        histogram["count"] += 1
+
+
+def _label(name):
+    return name.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def prometheus_text():
+    """Histogramas e contadores agregados no formato texto do Prometheus"""
+    with _lock:
+        histograms = {k: {**v, "buckets": list(v["buckets"])} for k, v in _histograms.items()}
+        counters = dict(_counters)
+
+    lines = [
+        "# HELP petrobras_stage_duration_seconds Duration of instrumented stages",
+        "# TYPE petrobras_stage_duration_seconds histogram",
+    ]
+    for name, histogram in sorted(histograms.items()):
+        stage = _label(name)
+        for bound, value in zip(BUCKETS_MS, histogram["buckets"]):
+            lines.append(f'petrobras_stage_duration_seconds_bucket{{stage="{stage}",le="{bound / 1000:g}"}} {value}')
+        lines.append(f'petrobras_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram["count"]}')
+        lines.append(f'petrobras_stage_duration_seconds_sum{{stage="{stage}"}} {histogram["sum"] / 1000:.6f}')
+        lines.append(f'petrobras_stage_duration_seconds_count{{stage="{stage}"}} {histogram["count"]}')
+
+    lines += [
+        "# HELP petrobras_stage_total Counters recorded by instrumented stages",
+        "# TYPE petrobras_stage_total counter",
+    ]
+    for name, value in sorted(counters.items()):
+        lines.append(f'petrobras_stage_total{{counter="{_label(name)}"}} {value}')
+
+    return "\n".join(lines) + "\n"
+
+
+def export_prometheus(path_file=None):
+    """Grava prometheus_text() em path_file (padrão: PERF_METRICS_FILE ou perf-metrics.prom)"""
+    path_file = path_file or os.environ.get("PERF_METRICS_FILE", "perf-metrics.prom")
+    temp_path = f"{path_file}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        file.write(prometheus_text())
+    os.replace(temp_path, path_file)
+    return path_file
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
@@ -0,0 +1,271 @@
+"""
+Linguagem de consulta booleana sobre o índice de bitmaps
+    - Termos: tec:"Machine Learning", env:digital_eia ou apenas "Remote Sensing"
+    - Anos: year:2015 ou year:2010..2020
+    - Operadores: AND, OR, NOT e parênteses (precedência NOT > AND > OR)
+
+Exemplo:
+    (tec:"Machine Learning" OR tec:"Deep Learning") AND env:"Impact Assessment" AND NOT year:..2010
+
+O planejador ordena os operandos de cada AND pela seletividade estimada
+(frequência de documentos de cada termo), avalia primeiro os mais raros e
+interrompe assim que o conjunto de candidatos fica vazio.
+"""
+
+import re
+
+from consts import SearchParams
+
+FIELDS = ("tec", "env")
+TOKEN = re.compile(r'\s*(\(|\)|[A-Za-z]+:"[^"]*"|"[^"]*"|[^\s()"]+)')
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+def normalize_term(term):
+    return "_".join(term.lower().split())
+
+
+def vocabularies():
+    params = SearchParams()
+    return {
+        "tec": [normalize_term(t) for t in params.tec],
+        "env": [normalize_term(t) for t in params.environment],
+    }
+
+
+def tokenize(text):
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if not match:
+            raise QuerySyntaxError(f"Invalid token at position {position}: {text[position:]!r}")
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+
+class Parser:
+    def __init__(self, text, vocab):
+        self.tokens = tokenize(text)
+        self.position = 0
+        self.vocab = vocab
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise QuerySyntaxError("Empty query")
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise QuerySyntaxError(f"Unexpected token {self.peek()!r}")
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while (self.peek() or "").upper() == "OR":
+            self.next()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else ("or", children)
+
+    def parse_and(self):
+        children = [self.parse_not()]
+        while (self.peek() or "").upper() == "AND":
+            self.next()
+            children.append(self.parse_not())
+        return children[0] if len(children) == 1 else ("and", children)
+
+    def parse_not(self):
+        if (self.peek() or "").upper() == "NOT":
+            self.next()
+            return ("not", self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self):
+        token = self.next()
+        if token is None:
+            raise QuerySyntaxError("Unexpected end of query")
+        if token == "(":
+            node = self.parse_or()
+            if self.next() != ")":
+                raise QuerySyntaxError("Missing closing parenthesis")
+            return node
+        if token == ")" or token.upper() in ("AND", "OR", "NOT"):
+            raise QuerySyntaxError(f"Unexpected token {token!r}")
+
+        field, sep, value = token.partition(":")
+        if not sep or token.startswith('"'):
+            field, value = None, token
+        value = value.strip('"')
+
+        if field is not None and field.lower() == "year":
+            return ("years", parse_year_range(value))
+        return ("term", *self.resolve_term(field.lower() if field else None, value))
+
+    def resolve_term(self, field, value):
+        term = normalize_term(value)
+        fields = [field] if field else [f for f in FIELDS if term in self.vocab[f]]
+
+        if field is not None and field not in FIELDS:
+            raise QuerySyntaxError(f"Unknown field {field!r} (use tec, env or year)")
+        if len(fields) != 1 or term not in self.vocab[fields[0]]:
+            raise QuerySyntaxError(f"Unknown term {value!r}")
+        return fields[0], term
+
+
+def parse_year_range(value):
+    """'2015' -> (2015, 2015); '2010..2020' -> (2010, 2020); '..2010' -> (None, 2010)"""
+    start, sep, end = value.partition("..")
+    try:
+        start = int(start) if start else None
+        end = (int(end) if end else None) if sep else start
+    except ValueError:
+        raise QuerySyntaxError(f"Invalid year range {value!r}")
+    return (start, end)
+
+
+def and_(*children):
+    return ("and", list(children))
+
+
+def or_(*children):
+    return ("or", list(children))
+
+
+def terms_query(tec, env):
+    """Consulta equivalente à busca original: algum tec E algum env"""
+    return and_(
+        or_(*[("term", "tec", t) for t in tec]),
+        or_(*[("term", "env", t) for t in env]),
+    )
+
+
+def query_terms(node, negated=False):
+    """Termos positivos citados na consulta, por campo"""
+    found = {field: set() for field in FIELDS}
+    kind = node[0]
+    if kind == "term" and not negated:
+        found[node[1]].add(node[2])
+    elif kind in ("and", "or"):
+        for child in node[1]:
+            for field, terms in query_terms(child, negated).items():
+                found[field] |= terms
+    elif kind == "not":
+        return query_terms(node[1], not negated)
+    return found
+
+
+class QueryEngine:
+    def __init__(self, index):
+        self.index = index
+
+    @property
+    def vocab(self):
+        return {f: list(dict.fromkeys([*vocabularies()[f], *self.index.terms[f]])) for f in FIELDS}
+
+    def parse(self, text):
+        return Parser(text, self.vocab).parse()
+
+    def years_in(self, year_range):
+        start, end = year_range
+        return [
+            y for y in self.index.year_bitmaps
+            if y.isdigit() and (start is None or int(y) >= start) and (end is None or int(y) <= end)
+        ]
+
+    def estimate(self, node):
+        """Cardinalidade estimada de um nó (usada para ordenar operandos)"""
+        kind = node[0]
+        if kind == "term":
+            return self.index.doc_frequency(node[1], node[2])
+        if kind == "years":
+            return sum(self.index.year_bitmaps[y].bit_count() for y in self.years_in(node[1]))
+        if kind == "not":
+            return self.index.size - self.estimate(node[1])
+        estimates = [self.estimate(child) for child in node[1]]
+        if kind == "and":
+            return min(estimates, default=self.index.size)
+        return min(self.index.size, sum(estimates))
+
+    def plan(self, node):
+        """Reordena os operandos: AND do mais raro ao mais comum, OR do mais comum ao mais raro"""
+        kind = node[0]
+        if kind == "not":
+            return ("not", self.plan(node[1]))
+        if kind not in ("and", "or"):
+            return node
+
+        children = [self.plan(child) for child in node[1]]
+        children.sort(key=self.estimate, reverse=(kind == "or"))
+        return (kind, children)
+
+    def explain(self, node, depth=0):
+        pad = "  " * depth
+        kind = node[0]
+        if kind == "term":
+            label = f"{node[1]}:{node[2]}"
+        elif kind == "years":
+            label = f"year:{node[1][0] or ''}..{node[1][1] or ''}"
+        else:
+            label = kind.upper()
+        lines = [f"{pad}{label}  (~{self.estimate(node)})"]
+        if kind == "not":
+            lines.append(self.explain(node[1], depth + 1))
+        elif kind in ("and", "or"):
+            lines.extend(self.explain(child, depth + 1) for child in node[1])
+        return "\n".join(lines)
+
+    def evaluate(self, node, candidates=None):
+        """
+        Bitmap dos artigos que satisfazem o nó
+
+        Args:
+            candidates: Bitmap que limita o resultado (conjunto já podado pelos operandos anteriores)
+        """
+        index = self.index
+        if candidates is None:
+            candidates = index.all_bitmap
+
+        kind = node[0]
+        if kind == "term":
+            return candidates & index.term_bitmap(node[1], node[2])
+        if kind == "years":
+            years = self.years_in(node[1])
+            return candidates & index.year_bitmap(years) if years else 0
+        if kind == "not":
+            return candidates & ~self.evaluate(node[1], candidates)
+        if kind == "and":
+            for child in node[1]:
+                if not candidates:
+                    break
+                candidates = self.evaluate(child, candidates)
+            return candidates
+
+        result = 0
+        for child in node[1]:
+            result |= self.evaluate(child, candidates & ~result)
+            if result == candidates:
+                break
+        return result
+
+    def search(self, query):
+        """
+        Executa a consulta (texto ou árvore)
+
+        Returns:
+            (ordinals, terms) com terms[i] os termos positivos da consulta presentes no artigo ordinals[i]
+        """
+        node = self.parse(query) if isinstance(query, str) else query
+        bitmap = self.evaluate(self.plan(node))
+        terms = query_terms(node)
+        return self.index.matched_terms(bitmap, terms["tec"], terms["env"])
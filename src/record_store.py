@@ -0,0 +1,111 @@
+"""
+Armazenamento dos registros completos em arquivo mapeado em memória
+    - records.bin: registros JSON (utf-8) concatenados
+    - records.idx.npy: ids ordenados com (offset, length) de cada registro
+    - Os dois arquivos são abertos com mmap: cada consulta lê apenas os bytes
+      dos artigos encontrados e o cache de páginas do SO é compartilhado entre processos
+
+Geração a partir do JSON:
+    python src/record_store.py
+"""
+
+import argparse
+import json
+import mmap
+import os
+
+import numpy as np
+
+from consts import data_files
+from record_stream import iter_records
+
+
+def build(complete_path=data_files["complete_results"],
+          data_path=data_files["record_store"],
+          index_path=data_files["record_index"]):
+    """Gera os arquivos do store lendo o JSON em streaming"""
+    entries = []
+    offset = 0
+
+    with open(f"{data_path}.tmp", "wb") as data_file:
+        for id, record in iter_records(complete_path):
+            raw = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            data_file.write(raw)
+            entries.append((id.encode("utf-8"), offset, len(raw)))
+            offset += len(raw)
+
+    id_width = max((len(entry[0]) for entry in entries), default=1)
+    index = np.array(entries, dtype=[("id", f"S{id_width}"), ("offset", "<u8"), ("length", "<u4")])
+    index.sort(order="id")
+
+    # O índice é gravado por último: leitores só enxergam o store novo quando ele está completo
+    os.replace(f"{data_path}.tmp", data_path)
+    with open(f"{index_path}.tmp", "wb") as index_file:
+        np.save(index_file, index)
+    os.replace(f"{index_path}.tmp", index_path)
+
+    return len(entries)
+
+
+class RecordStore:
+    def __init__(self, data_path, index_path):
+        self.index = np.load(index_path, mmap_mode="r")
+        self._file = open(data_path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    @classmethod
+    def open(cls, index_path=data_files["record_index"]):
+        return cls(data_files["record_store"], index_path)
+
+    @property
+    def nbytes(self):
+        # Nada fica no heap: índice e dados são páginas mapeadas
+        return 0
+
+    def __len__(self):
+        return len(self.index)
+
+    def locate(self, ids):
+        """Posições no índice de cada id (-1 se ausente)"""
+        encoded = [id.encode("utf-8") for id in ids]
+        if len(self.index) == 0:
+            return np.full(len(encoded), -1)
+        # Ids maiores que a largura do índice seriam truncados (e poderiam casar com outro id)
+        width = self.index.dtype["id"].itemsize
+        fits = np.array([len(key) <= width for key in encoded], dtype=bool)
+        keys = np.array([key if ok else b"" for key, ok in zip(encoded, fits)], dtype=self.index.dtype["id"])
+        positions = np.searchsorted(self.index["id"], keys)
+        positions = np.minimum(positions, len(self.index) - 1)
+        found = fits & (self.index["id"][positions] == keys)
+        return np.where(found, positions, -1)
+
+    def get_many(self, ids):
+        """Registros decodificados na ordem dos ids (None para ids ausentes)"""
+        records = []
+        for id, position in zip(ids, self.locate(ids)):
+            if position < 0:
+                records.append(None)
+                continue
+            entry = self.index[position]
+            start = int(entry["offset"])
+            records.append(json.loads(self._data[start:start + int(entry["length"])]))
+        return records
+
+    def get(self, id):
+        return self.get_many([id])[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera o store de registros mapeado em memória")
+    parser.add_argument("--complete", default=data_files["complete_results"])
+    parser.add_argument("--data", default=data_files["record_store"])
+    parser.add_argument("--index", default=data_files["record_index"])
+    args = parser.parse_args()
+
+    count = build(args.complete, args.data, args.index)
+    print(f"{count} registros gravados em {args.data}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Leitura em streaming de complete-unique-results-scopus.json
+    - Percorre o objeto {id: registro} em blocos, sem carregar o arquivo inteiro
+    - Materializa apenas os registros cujos ids foram pedidos
+    - Para assim que todos os ids pedidos forem encontrados
+
+A memória de pico fica limitada ao resultado + um registro + o bloco de leitura.
+"""
+
+import json
+
+CHUNK_SIZE = 1 << 20
+WHITESPACE = " \t\n\r"
+
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    def __init__(self, file, chunk_size):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def fill(self):
+        """Descarta o trecho já consumido e lê mais um bloco; False no fim do arquivo"""
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        self.eof = not chunk
+        return bool(chunk)
+
+    def skip_whitespace(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer) or not self.fill():
+                return
+
+    def peek(self):
+        self.skip_whitespace()
+        if self.position >= len(self.buffer):
+            raise ValueError("Unexpected end of JSON document")
+        return self.buffer[self.position]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.position}, found {self.buffer[self.position]!r}")
+        self.position += 1
+
+    def value(self):
+        """Decodifica o próximo valor JSON, lendo mais blocos se ele estiver incompleto"""
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # Um número no fim do buffer pode estar cortado
+            if end == len(self.buffer) and not self.eof and self.fill():
+                continue
+            self.position = end
+            return value
+
+
+def iter_records(path_file, ids=None, chunk_size=CHUNK_SIZE):
+    """
+    Gera (id, registro) do objeto JSON de nível superior
+
+    Args:
+        ids: Conjunto de ids desejados (None para todos)
+    """
+    wanted = None if ids is None else set(ids)
+
+    with open(path_file, "r", encoding="utf-8") as file:
+        reader = _Reader(file, chunk_size)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+
+        while wanted is None or wanted:
+            key = reader.value()
+            reader.expect(":")
+            record = reader.value()
+
+            if wanted is None or key in wanted:
+                if wanted is not None:
+                    wanted.discard(key)
+                yield key, record
+            del record
+
+            if reader.peek() == "}":
+                return
+            reader.expect(",")
+
+
+def load_records(path_file, ids, chunk_size=CHUNK_SIZE):
+    """{id: registro} apenas para os ids pedidos; ids ausentes do arquivo não aparecem"""
+    return dict(iter_records(path_file, ids, chunk_size))
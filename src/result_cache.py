@@ -0,0 +1,109 @@
+"""
+Cache LRU de resultados de consultas, compartilhado por todas as sessões
+    - Chave canônica: função + conjuntos ordenados e normalizados de termos tec/env + anos
+      (a ordem de seleção no formulário não importa)
+    - Limite de memória configurável (RESULT_CACHE_MB, padrão 256); os itens menos
+      usados recentemente são descartados primeiro
+    - Estatísticas de acertos/erros/descartes
+    - Invalidação automática: quando a versão da base muda, o cache é esvaziado
+
+Os valores devolvidos são compartilhados entre sessões e não devem ser modificados.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from corpus_loader import deep_sizeof
+
+DEFAULT_MAX_BYTES = int(float(os.environ.get("RESULT_CACHE_MB", "256")) * 1024 ** 2)
+
+
+def normalize_terms(terms):
+    return tuple(sorted({"_".join(t.lower().split()) for t in terms}))
+
+
+def query_key(name, tec, env, years=None):
+    """Chave canônica de uma consulta tec/env/anos"""
+    return (
+        name,
+        normalize_terms(tec),
+        normalize_terms(env),
+        tuple(sorted(set(map(str, years)))) if years else None,
+    )
+
+
+class ResultCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.total_bytes = 0
+            self.version = version
+
+    def get(self, key, version):
+        with self._lock:
+            self._check_version(version)
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, version, size=None):
+        size = deep_sizeof(value) if size is None else size
+        with self._lock:
+            self._check_version(version)
+            if size > self.max_bytes:
+                return
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_compute(self, key, version, compute):
+        value = self.get(key, version)
+        if value is None:
+            value = compute()
+            self.put(key, value, version)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+results = ResultCache()
@@ -4,24 +4,224 @@ Requisitos:
     - Buscas simples (pelo menos um termo existente)
     - Or (satisfazer pelo menos uma condição)
     - And (satisfazer ambas as condições)
+    - Not, agrupamento e faixas de anos via search() (linguagem em query_engine.py)
 """
 
+import importlib
 import json
-from consts import SearchParams
+import logging
+import os
+import threading
+import numpy as np
+from consts import SearchParams, data_files
 from collections import Counter
+from corpus_loader import corpus_version, load_shared
+from bitmap_index import BitmapIndex
+from term_matrix import TermMatrix
+from query_engine import QueryEngine, terms_query
+from record_stream import iter_records, load_records
+from record_store import RecordStore
+from instrumentation import count, span, startup_phase, timed
+import result_cache
+import snapshot
+import text_index
+import year_shards
+from year_series import growth_rate, moving_average
+
+# Importado por import_columnar() só quando o Parquet é usado (pyarrow é pesado)
+columnar_corpus = None
+
+logger = logging.getLogger(__name__)
+
+# Compara cada consulta do índice com a varredura completa (depuração)
+VERIFY_INDEX = os.environ.get("SEARCH_VERIFY_INDEX") == "1"
+# Ocorrências mínimas para um termo contar como presente em um artigo
+MIN_COUNT = 1
+# Registros por bloco em iter_complete_articles (exportação)
+EXPORT_CHUNK_SIZE = 2000
+# Combinações mais frequentes: "exact" (cubo) ou "sketch" (Space-Saving por ano, memória limitada)
+COMBINATION_MODE = os.environ.get("COMBINATION_MODE", "exact")
+SKETCH_CAPACITY = int(os.environ.get("SKETCH_CAPACITY", "512"))
+# Processos para consultas na base particionada por ano (ver year_shards.py); 0 desativa os shards
+SHARD_WORKERS = int(os.environ.get("SHARD_WORKERS", "0"))
 
 def load_json_data(path_file):
-    with open(path_file, "r", encoding="utf-8") as file:
-        return json.load(file)
+    """Conteúdo do arquivo, compartilhado pelo processo (não modificar o retorno)"""
+    return load_shared(path_file)
+
+
+def _fresh(path, sources):
+    """path se ele existir e não for mais antigo que nenhum dos arquivos de origem"""
+    if not os.path.exists(path):
+        return None
+
+    built_at = os.path.getmtime(path)
+    for source in sources:
+        if os.path.exists(source) and os.path.getmtime(source) > built_at:
+            return None
+
+    return path
+
+
+def import_columnar():
+    """Módulo columnar_corpus, importado na primeira chamada (None se o pyarrow não estiver instalado)"""
+    global columnar_corpus
+    if columnar_corpus is None:
+        try:
+            columnar_corpus = importlib.import_module("columnar_corpus")
+        except ImportError:  # pyarrow indisponível: apenas os JSON são usados
+            return None
+    return columnar_corpus
+
+
+def columnar_path():
+    """Caminho do Parquet se ele existir e não for mais antigo que os JSON de origem"""
+    path = _fresh(data_files["columnar"], (data_files["terms_by_year"], data_files["complete_results"]))
+    if path is None or import_columnar() is None:
+        return None
+    return path
+
+
+def snapshot_path():
+    """Caminho do snapshot binário se ele for da versão atual e do conteúdo atual do JSON (ver snapshot.py)"""
+    path = data_files["snapshot"]
+    return path if snapshot.is_valid(path, (data_files["terms_by_year"],)) else None
+
+
+def term_source():
+    """Arquivo de onde a matriz de contagens e o índice são carregados: snapshot, Parquet ou JSON"""
+    return snapshot_path() or columnar_path() or data_files["terms_by_year"]
+
+
+def load_record_store():
+    """Store de registros mapeado em memória, se gerado a partir do JSON atual (ver record_store.py)"""
+    index_path = _fresh(data_files["record_index"], (data_files["complete_results"],))
+    if index_path is None:
+        return None
+    return load_shared(index_path, parser=RecordStore.open)
+
+
+def shards_path():
+    """Manifesto dos shards por ano se eles forem da versão atual e do conteúdo atual do JSON (ver year_shards.py)"""
+    if not year_shards.is_valid(data_files["shards"], (data_files["terms_by_year"],)):
+        return None
+    return os.path.join(data_files["shards"], year_shards.MANIFEST)
+
+
+def _open_shards(path_file):
+    return year_shards.ShardedCorpus(os.path.dirname(path_file), SHARD_WORKERS)
+
+
+def load_shards():
+    """Base particionada por ano, se SHARD_WORKERS > 0 e os shards estiverem atualizados (None caso contrário)"""
+    if SHARD_WORKERS <= 0:
+        return None
+    path = shards_path()
+    if path is None:
+        return None
+    return load_shared(path, parser=_open_shards)
+
     
-def find_terms(tec, env):
-    year_ocurrencies = load_json_data("src/terms-by-year-complete.json")
-    founded_articles = {}
+_delta_lock = threading.Lock()
+
+
+def delta_segments():
+    """Segmentos delta ainda não compactados (ver ingest.py), em ordem de criação"""
+    directory = data_files["deltas"]
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".json")
+    )
+
+
+def _load_segment(path_file):
+    try:
+        return load_json_data(path_file)
+    except FileNotFoundError:  # removido por uma compactação em andamento
+        return None
+
+
+def _apply_deltas(structure, apply):
+    """Aplica em structure (uma única vez) cada segmento delta ainda não aplicado"""
+    with _delta_lock:
+        applied = structure.__dict__.setdefault("applied_segments", [])
+        for segment_path in delta_segments():
+            if segment_path in applied:
+                continue
+            segment = _load_segment(segment_path)
+            if segment is not None:
+                apply(structure, segment)
+                applied.append(segment_path)
+    return structure
+
+
+def _delta_record(id):
+    for segment_path in reversed(delta_segments()):
+        segment = _load_segment(segment_path)
+        if segment is not None and id in segment["complete_results"]:
+            return segment["complete_results"][id]
+    return None
+
+
+def _build_term_matrix(path_file):
+    if path_file == os.path.abspath(data_files["snapshot"]):
+        return snapshot.load(path_file)
+    if path_file.endswith(".parquet"):
+        return TermMatrix.from_term_table(columnar_corpus.read_term_table(path_file))
+    # O JSON aninhado é descartado assim que a matriz fica pronta
+    with open(path_file, "r", encoding="utf-8") as file:
+        return TermMatrix.from_year_ocurrencies(json.load(file))
+
+
+def load_term_matrix():
+    """Matriz de contagens (artigo × termo) da base atual, com os segmentos delta"""
+    return _apply_deltas(
+        load_shared(term_source(), parser=_build_term_matrix),
+        lambda matrix, segment: matrix.extend(segment["terms_by_year"])
+    )
+
+
+def _build_index(path_file):
+    return BitmapIndex.from_term_matrix(load_shared(path_file, parser=_build_term_matrix))
+
+
+def load_index():
+    """Índice de bitmaps da base atual, construído uma vez por versão dos arquivos"""
+    return _apply_deltas(
+        load_shared(term_source(), parser=_build_index),
+        lambda index, segment: index.extend_from_year_ocurrencies(segment["terms_by_year"])
+    )
 
+
+@timed("scan_find_terms")
+def scan_find_terms(tec, env, min_count=MIN_COUNT):
+    """Varredura completa da base e dos deltas (implementação de referência do índice)"""
+    path = columnar_path()
+    if path:
+        founded_articles = columnar_corpus.find_terms(columnar_corpus.load_term_table(path), tec, env, min_count)
+    else:
+        founded_articles = _scan_terms(load_json_data(data_files["terms_by_year"]), tec, env, {}, min_count)
+
+    return _scan_delta_terms(tec, env, founded_articles, min_count)
+
+
+def _scan_delta_terms(tec, env, founded_articles, min_count=MIN_COUNT):
+    """Acrescenta a founded_articles os artigos dos segmentos delta"""
+    for segment_path in delta_segments():
+        segment = _load_segment(segment_path)
+        if segment is not None:
+            _scan_terms(segment["terms_by_year"], tec, env, founded_articles, min_count)
+
+    return founded_articles
+
+
+def _scan_terms(year_ocurrencies, tec, env, founded_articles, min_count=MIN_COUNT):
     for year, articles in year_ocurrencies.items():
+        count("records_scanned", len(articles))
         for id, article in articles.items():
-            env_params = [k for k, v in article["env"].items() if v > 0 and k in env]
-            tec_params = [k for k, v in article["tec"].items() if v > 0 and k in tec]
+            env_params = [k for k, v in article["env"].items() if v >= min_count and k in env]
+            tec_params = [k for k, v in article["tec"].items() if v >= min_count and k in tec]
 
             if (len(env_params) != 0) and (len(tec_params) != 0):
                 if not founded_articles.get(year):
@@ -30,42 +230,219 @@ def find_terms(tec, env):
                 founded_articles[year][id] = [*tec_params, *env_params]
 
     return founded_articles
-    
 
-def find_complete_articles(tec, env):
-    articles = find_terms(tec, env)
-    complete_data = load_json_data("src/complete-unique-results-scopus.json")
-    r = {}
-    for year, art_ in articles.items():
 
-        if not r.get(year):
-            r[year] = {}
+def load_engine():
+    """Motor de consultas sobre o índice da base atual"""
+    return QueryEngine(load_index())
+
 
-        for id, search_terms in art_.items():
-            article = complete_data.get(id)
-            r[year][id] = {
-                "title": article.get("title"),
-                "abstract": article.get("abstract"),
-                "url": article.get("url"),
-                "terms_founded": search_terms
-            }
+@timed("search")
+def search(query):
+    """
+    Consulta booleana (ver query_engine) no formato de find_terms: {ano: {id: [termos]}}
 
-    return r
+    Ex.: search('(tec:"Machine Learning" OR tec:"Deep Learning") AND env:"Impact Assessment"')
+    """
+    engine = load_engine()
+    return engine.index.group_by_year(*engine.search(query))
 
 
-def year_term_tuples():
+@timed("search_complete")
+def search_complete(query):
+    """Consulta booleana no formato de find_complete_articles"""
+    engine = load_engine()
+    ordinals, terms = engine.search(query)
+    return _complete_articles(engine.index, ordinals, terms)
+
+
+def _build_text_index(path_file):
+    if path_file.endswith(".npz"):
+        return text_index.TextIndex.load(path_file)
+    return text_index.build(load_index(), path_file)
+
+
+def load_text_index():
+    """Índice de texto pré-gerado (text_index.py) ou, na falta dele, construído em memória, com os segmentos delta"""
+    sources = (data_files["terms_by_year"], data_files["complete_results"])
+    path = _fresh(data_files["text_index"], sources) or data_files["complete_results"]
+    return _apply_deltas(load_shared(path, parser=_build_text_index), text_index.extend_from_segment)
+
+
+@timed("text_search")
+def text_search(query, tec=None, env=None, ids=None, limit=None):
+    """
+    Busca BM25 (com prefixo, sem acentos) em título e abstract
+
+    Args:
+        tec, env: Restringe aos artigos da busca tec/env (interseção de ordinais)
+        ids: Restringe a estes ids
+        limit: Número máximo de resultados
+
+    Returns:
+        Lista de (id, score) do mais para o menos relevante
+    """
+    index = load_index()
+    candidates = None
+    if tec is not None or env is not None:
+        candidates = index.ordinals(index.query(tec or [], env or []))
+    if ids is not None:
+        ordinals = [index.ordinal_of(id) for id in ids]
+        ordinals = np.array([o for o in ordinals if o is not None], dtype=np.int64)
+        candidates = ordinals if candidates is None else np.intersect1d(candidates, ordinals)
+
+    ordinals, scores = load_text_index().search(query, candidates=candidates, limit=limit)
+    return [(index.ids[ordinal], float(score)) for ordinal, score in zip(ordinals, scores)]
+
+
+@timed("find_terms")
+def find_terms(tec, env, verify=VERIFY_INDEX, min_count=MIN_COUNT):
+    """
+    Artigos com ao menos um termo tec e um termo env: {ano: {id: [termos]}}
+
+    Args:
+        verify: Compara o resultado do índice com a varredura completa
+        min_count: Ocorrências mínimas para um termo contar como presente
+    """
+    shards = load_shards()
+    if shards is not None:
+        founded_articles = _scan_delta_terms(tec, env, shards.find_terms(tec, env, min_count=min_count), min_count)
+    elif min_count == 1:
+        founded_articles = search(terms_query(tec, env))
+    else:
+        # O índice de bitmaps guarda apenas presença (contagem > 0)
+        founded_articles = load_term_matrix().find_terms(tec, env, min_count=min_count)
+
+    if verify:
+        expected = scan_find_terms(tec, env, min_count)
+        if founded_articles != expected:
+            raise AssertionError(
+                f"Bitmap index diverges from scan for tec={tec} env={env}: "
+                f"{sum(map(len, founded_articles.values()))} vs {sum(map(len, expected.values()))} articles"
+            )
+
+    return founded_articles
+    
+
+@timed("find_complete_articles")
+def find_complete_articles(tec, env):
+    return search_complete(terms_query(tec, env))
+
+
+def _fetch_records(index, ordinals):
+    """Registros completos dos ordinais, na mesma ordem (None quando não encontrado)"""
+    base = ordinals[ordinals < index.base_size]
+    store = load_record_store()
+    path = columnar_path()
+    with span("fetch_records"):
+        if store is not None:
+            records = store.get_many([index.ids[ordinal] for ordinal in base])
+        elif path:
+            records = columnar_corpus.read_records(path, base)
+        else:
+            # Leitura em streaming: apenas os registros encontrados são materializados
+            ids = [index.ids[ordinal] for ordinal in base]
+            complete_data = load_records(data_files["complete_results"], ids)
+            records = [complete_data.get(id) for id in ids]
+
+        # Artigos acrescentados por segmentos delta ficam depois da base
+        records.extend(_delta_record(index.ids[ordinal]) for ordinal in ordinals[len(base):])
+    count("records_fetched", len(records))
+    return records
+
+
+def _complete_articles(index, ordinals, terms):
+    records = _fetch_records(index, ordinals)
+
+    missing = [index.ids[ordinal] for ordinal, article in zip(ordinals, records) if article is None]
+    if missing:
+        logger.warning("%d matched articles have no complete record (e.g. %s)", len(missing), missing[0])
+
+    return index.group_by_year(ordinals, [
+        {
+            "title": (article or {}).get("title"),
+            "abstract": (article or {}).get("abstract"),
+            "url": (article or {}).get("url"),
+            "terms_founded": search_terms
+        }
+        for article, search_terms in zip(records, terms)
+    ])
+
+
+def iter_complete_articles(tec, env, years=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Registros completos da busca tec/env em blocos, sem materializar o resultado inteiro
+
+    Com o store de registros ou o Parquet os blocos seguem a ordem do índice (por ano);
+    sem eles o JSON é lido uma única vez e os blocos seguem a ordem do arquivo.
+
+    Yields:
+        Listas de {"id", "year", "title", "abstract", "url", "terms_founded"}
+    """
+    index = load_index()
+    ordinals, terms = index.matched_terms(index.query(tec, env, years), tec, env)
+
+    def row(ordinal, article, search_terms):
+        article = article or {}
+        return {
+            "id": index.ids[ordinal],
+            "year": index.years[ordinal],
+            "title": article.get("title"),
+            "abstract": article.get("abstract"),
+            "url": article.get("url"),
+            "terms_founded": search_terms,
+        }
+
+    if load_record_store() is not None or columnar_path():
+        for start in range(0, len(ordinals), chunk_size):
+            chunk = ordinals[start:start + chunk_size]
+            records = _fetch_records(index, chunk)
+            yield [row(*values) for values in zip(chunk, records, terms[start:start + chunk_size])]
+        return
+
+    # Leitura em streaming: uma passada pelo JSON, apenas os registros encontrados
+    n_base = int(np.searchsorted(ordinals, index.base_size))
+    positions = {index.ids[ordinal]: i for i, ordinal in enumerate(ordinals[:n_base])}
+    chunk = []
+    for id, article in iter_records(data_files["complete_results"], positions):
+        i = positions.pop(id)
+        chunk.append(row(ordinals[i], article, terms[i]))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    count("records_fetched", n_base - len(positions))
+
+    # Artigos sem registro completo na base, seguidos dos artigos de segmentos delta
+    for i in [*sorted(positions.values()), *range(n_base, len(ordinals))]:
+        article = _delta_record(index.ids[ordinals[i]]) if i >= n_base else None
+        chunk.append(row(ordinals[i], article, terms[i]))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@timed("year_term_tuples")
+def year_term_tuples(min_count=MIN_COUNT):
     """Tuples containing the combinations of technology and environment keywords grouped by year"""
+    shards = load_shards()
+    if shards is not None:
+        return _merge_delta_tuples(shards.year_term_tuples(min_count), min_count)
+    return load_term_matrix().year_term_tuples(min_count)
+
 
-    year_ocurencies = load_json_data("src/terms-by-year-complete.json")
+def count_year_term_tuples(year_ocurencies, min_count=MIN_COUNT):
     year_term_set = {}
 
     for year, articles in year_ocurencies.items():
+        count("records_scanned", len(articles))
         existing_terms = []
         for _, article in articles.items():
             internal = []
 
             for field_type in ["tec", "env"]:
-                field_terms = sorted([k for k, v in article[field_type].items() if v > 0])
+                field_terms = sorted([k for k, v in article[field_type].items() if v >= min_count])
 
                 internal.append(tuple(field_terms))
 
@@ -76,8 +453,89 @@ def year_term_tuples():
     return year_term_set
 
 
-def find_terms_in_tuples(tec, env, years=[]):
-    year_tuples = year_term_tuples()
+def load_cube():
+    """Cubo de coocorrência da base atual (mantido pela matriz de contagens)"""
+    return load_term_matrix().cube()
+
+
+@timed("find_terms_in_tuples")
+def find_terms_in_tuples(tec, env, years=[], min_count=MIN_COUNT):
+    shards = load_shards()
+    if shards is not None:
+        # Os workers já descartam anos e combinações fora da busca; os deltas passam pelo mesmo filtro
+        year_tuples = _merge_delta_tuples(shards.year_term_tuples(min_count, years, tec, env), min_count)
+        return _tuples_matching(year_tuples, tec, env, years)
+    return load_term_matrix().find_terms_in_tuples(tec, env, years, min_count)
+
+
+@timed("top_term_tuples")
+def top_term_tuples(tec, env, years=[], n=30, mode=COMBINATION_MODE, min_count=MIN_COUNT):
+    """
+    As n combinações mais frequentes da busca (ver TermMatrix.top_term_tuples)
+
+    Args:
+        mode: "exact" (contagens exatas do cubo, usado para validação) ou "sketch"
+              (sketches Space-Saving de SKETCH_CAPACITY combinações por ano)
+    """
+    if mode not in ("exact", "sketch"):
+        raise ValueError(f"Unknown combination mode {mode!r}")
+    capacity = SKETCH_CAPACITY if mode == "sketch" else None
+    return load_term_matrix().top_term_tuples(tec, env, years, n, capacity, min_count)
+
+
+@timed("yearly_series")
+def yearly_series(tec, env, years=[], window=3, min_count=MIN_COUNT):
+    """
+    Séries anuais da busca, em ordem cronológica, a partir dos agregados (ver year_series.py)
+
+    Args:
+        years: Anos considerados (padrão: todos os da base)
+        window: Anos da média móvel
+
+    Returns:
+        {"years": anos, "articles": artigos da busca por ano, "moving_average", "window", "growth",
+         "terms": {termo: artigos por ano}, "pairs": {(tec, env): artigos por ano}}
+    """
+    matrix = load_term_matrix()
+    cube, series = matrix.cube(min_count), matrix.series(min_count)
+    by_year = dict(zip(cube.years, cube.year_counts(tec, env).tolist()))
+
+    labels, terms = series.term_series("tec", tec, years)
+    terms.update(series.term_series("env", env, years)[1])
+    articles = np.array([by_year.get(year, 0) for year in labels], dtype=np.int64)
+    return {
+        "years": labels,
+        "articles": articles,
+        "moving_average": moving_average(articles, window),
+        "window": window,
+        "growth": growth_rate(articles),
+        "terms": terms,
+        "pairs": series.pair_series(tec, env, years)[1],
+    }
+
+
+@timed("scan_find_terms_in_tuples")
+def scan_find_terms_in_tuples(tec, env, years=[], min_count=MIN_COUNT):
+    """Varredura de todas as tuplas (implementação de referência do cubo)"""
+    year_tuples = count_year_term_tuples(load_json_data(data_files["terms_by_year"]), min_count)
+    return _tuples_matching(_merge_delta_tuples(year_tuples, min_count), tec, env, years)
+
+
+def _merge_delta_tuples(year_tuples, min_count=MIN_COUNT):
+    """Soma a year_tuples ({ano: {tupla: artigos}}) as tuplas dos segmentos delta"""
+    for segment_path in delta_segments():
+        segment = _load_segment(segment_path)
+        if segment is None:
+            continue
+        for year, ts in count_year_term_tuples(segment["terms_by_year"], min_count).items():
+            merged = year_tuples.setdefault(year, {})
+            for _tuple, count in ts.items():
+                merged[_tuple] = merged.get(_tuple, 0) + count
+    return year_tuples
+
+
+def _tuples_matching(year_tuples, tec, env, years=[]):
+    """Tuplas (somadas entre os anos selecionados) com algum termo tec e algum env"""
     result = {}
 
     if len(years) > 0:
@@ -108,17 +566,148 @@ def find_terms_in_tuples(tec, env, years=[]):
     return result
 
 
+@timed("especific_tuple_by_terms")
 def especific_tuple_by_terms(tec, env, years=[]):
     nested_tuple = tuple(
         tuple(sorted(t)) for t in [tec, env]
     )
-    terms_tuples = find_terms_in_tuples(tec, env, years)
+    concat_terms = [*nested_tuple[0], *nested_tuple[1]]
 
     c = 0
-    for _tuple, count in terms_tuples.items():
-        if _tuple == nested_tuple:
-            c += count
+    if any(t in tec for t in concat_terms) and any(t in env for t in concat_terms):
+        c = load_cube().tuple_count(nested_tuple, years)
 
     return {
         nested_tuple: c
     }
+
+
+def corpus_token():
+    """Versão da base em uso: hash da origem carregada, deltas aplicados e mtime dos registros"""
+    index = load_index()
+    source = term_source()
+    complete = data_files["complete_results"]
+    return (
+        source,
+        corpus_version(source),
+        index.size,
+        os.path.getmtime(complete) if os.path.exists(complete) else None,
+    )
+
+
+def search_handle(tec, env):
+    """
+    Resultado compacto de uma busca tec/env, para guardar na sessão do app
+
+    Guarda só a chave da consulta e os ordinais (int32) dos artigos; títulos,
+    abstracts etc. são lidos das estruturas compartilhadas quando exibidos.
+
+    Returns:
+        {"key": chave canônica da consulta, "ordinals": ordinais, "token": versão da base}
+    """
+    key = result_cache.query_key("search", tec, env)
+    index = load_index()
+    ordinals = index.ordinals(index.query(list(key[1]), list(key[2])))
+    return {"key": key, "ordinals": ordinals.astype(np.int32), "token": corpus_token()}
+
+
+def current_handle(handle):
+    """O próprio handle, ou a busca refeita se a base mudou desde então (ordinais podem mudar)"""
+    if handle["token"] == corpus_token():
+        return handle
+    return search_handle(handle["key"][1], handle["key"][2])
+
+
+def handle_year_counts(handle):
+    """Artigos por ano do resultado, na mesma ordem de anos de find_complete_articles"""
+    years = load_index().years
+    counts = {}
+    for ordinal in handle["ordinals"].tolist():
+        counts[years[ordinal]] = counts.get(years[ordinal], 0) + 1
+    return counts
+
+
+def article_columns(handle, years=None, fields=("title",)):
+    """
+    Artigos do resultado nos anos selecionados, por coluna: id, year, terms_founded e fields
+
+    Dos registros completos apenas fields é mantido (ex.: sem o abstract).
+    """
+    index = load_index()
+    tec, env = list(handle["key"][1]), list(handle["key"][2])
+    ordinals, terms = index.matched_terms(index.query(tec, env, years), tec, env)
+    records = _fetch_records(index, ordinals) if fields else []
+
+    columns = {
+        "id": [index.ids[ordinal] for ordinal in ordinals],
+        "year": [index.years[ordinal] for ordinal in ordinals],
+        "terms_founded": terms,
+    }
+    for field in fields:
+        columns[field] = [(record or {}).get(field) for record in records]
+    return columns
+
+
+def fetch_articles(ids):
+    """Registros completos dos ids, na mesma ordem (None quando não encontrado)"""
+    index = load_index()
+    positions, ordinals = [], []
+    for i, id in enumerate(ids):
+        ordinal = index.ordinal_of(id)
+        if ordinal is not None:
+            positions.append(i)
+            ordinals.append(ordinal)
+
+    # _fetch_records espera ordinais crescentes (base antes dos deltas)
+    ordinals = np.array(ordinals, dtype=np.int64)
+    order = np.argsort(ordinals, kind="stable")
+    articles = [None] * len(ids)
+    for i, record in zip(order.tolist(), _fetch_records(index, ordinals[order])):
+        articles[positions[i]] = record
+    return articles
+
+
+def cached_top_term_tuples(tec, env, years=None, n=30, mode=COMBINATION_MODE):
+    """top_term_tuples com cache compartilhado (não modificar o retorno)"""
+    key = result_cache.query_key(f"top_term_tuples:{mode}:{n}", tec, env, years)
+    return result_cache.results.get_or_compute(
+        key, corpus_token(), lambda: top_term_tuples(list(key[1]), list(key[2]), list(key[3] or []), n, mode)
+    )
+
+
+_warm_up_lock = threading.Lock()
+_warm_up_thread = None
+
+
+def warm_up(imports=()):
+    """
+    Carrega o que a primeira consulta vai precisar: índice, cubo, séries anuais, store de registros,
+    módulos de imports (ex.: pandas/plotly, usados só para exibir o resultado) e índice de texto
+    """
+    try:
+        with startup_phase("warm_up:index"):
+            load_index()
+        with startup_phase("warm_up:cube"):
+            load_cube()
+        with startup_phase("warm_up:series"):
+            load_term_matrix().series()
+        with startup_phase("warm_up:records"):
+            load_record_store()
+        for module in imports:
+            with startup_phase(f"import:{module}"):
+                importlib.import_module(module)
+        with startup_phase("warm_up:text_index"):
+            load_text_index()
+    except Exception:
+        # A consulta em primeiro plano carrega de novo e mostra o erro
+        logger.exception("Background warm-up failed")
+
+
+def start_warm_up(imports=()):
+    """warm_up() em uma thread de fundo, uma única vez por processo (chamadas seguintes não fazem nada)"""
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=warm_up, args=(imports,), name="warm-up", daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
@@ -0,0 +1,156 @@
+"""
+Snapshot binário da base pronta para consulta (partida rápida do app)
+    - Matriz de contagens (termos, anos, ids) e cubo de coocorrência já agregado,
+      gravados como arrays NumPy: a carga é uma leitura de arquivo, sem parse de JSON
+    - Versionado (SNAPSHOT_VERSION) e vinculado ao hash SHA-256 do JSON de origem:
+      snapshot de outra versão ou de outro conteúdo é ignorado e a base é lida da origem
+    - Segmentos delta continuam sendo aplicados por cima, como nos demais formatos
+    - Os arrays são mapeados em memória (corpus_loader.map_npz): sessões e processos
+      do app compartilham as mesmas páginas, somente leitura
+
+Geração (no build/deploy, a partir do JSON atual):
+    python src/snapshot.py
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from consts import data_files
+from cooccurrence_cube import CooccurrenceCube
+from corpus_loader import file_hash, map_npz
+from term_matrix import TermMatrix
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+_checked = {}
+_lock = threading.Lock()
+
+
+def _signature(path_file):
+    stat = os.stat(path_file)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _source_hashes(sources):
+    return {os.path.basename(path): file_hash(path) for path in sources}
+
+
+def build(path_file=data_files["snapshot"], sources=(data_files["terms_by_year"],)):
+    """
+    Gera o snapshot a partir do JSON terms-by-year (escrita atômica)
+
+    Returns:
+        TermMatrix gravada
+    """
+    # Hash antes da leitura: se a origem mudar durante o build, o snapshot fica inválido
+    hashes = _source_hashes(sources)
+    with open(sources[0], "r", encoding="utf-8") as file:
+        matrix = TermMatrix.from_year_ocurrencies(json.load(file))
+    cube = matrix.cube()
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "sources": hashes,
+        "terms": matrix.terms,
+        "year_labels": matrix.year_labels,
+        "cube": {"min_count": 1, "years": cube.years, "pair_keys": cube.pair_keys},
+    }
+    temp_path = f"{path_file}.tmp"
+    with open(temp_path, "wb") as file:
+        np.savez(
+            file,
+            meta=np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8),
+            counts=matrix.counts, years=matrix.years, ids=matrix.ids,
+            cube_counts=cube.counts, cube_ranks=cube.ranks,
+        )
+    os.replace(temp_path, path_file)
+    with _lock:
+        _checked.pop(os.path.abspath(path_file), None)
+
+    return matrix
+
+
+def _read_meta(data):
+    return json.loads(data["meta"].tobytes().decode("utf-8"))
+
+
+def is_valid(path_file=data_files["snapshot"], sources=(data_files["terms_by_year"],)):
+    """
+    Se o snapshot existe, é da versão atual e foi gerado a partir do conteúdo atual das origens
+
+    Os hashes só são recalculados quando o mtime/tamanho do snapshot ou de uma origem muda.
+    """
+    path = os.path.abspath(path_file)
+    try:
+        signatures = tuple(_signature(p) for p in (path, *sources))
+    except FileNotFoundError:
+        return False
+
+    with _lock:
+        checked = _checked.get(path)
+        if checked is not None and checked[0] == signatures:
+            return checked[1]
+
+        try:
+            meta = _read_meta(map_npz(path))
+        except (OSError, ValueError, KeyError) as error:
+            logger.warning("Ignoring unreadable snapshot %s: %s", path, error)
+            meta = {}
+
+        if not meta:
+            valid = False
+        elif meta.get("version") != SNAPSHOT_VERSION:
+            logger.warning("Ignoring snapshot %s: version %s, expected %s", path, meta.get("version"), SNAPSHOT_VERSION)
+            valid = False
+        elif meta.get("sources") != _source_hashes(sources):
+            logger.warning("Ignoring snapshot %s: source files changed since it was built", path)
+            valid = False
+        else:
+            valid = True
+
+        _checked[path] = (signatures, valid)
+        return valid
+
+
+def load(path_file=data_files["snapshot"]):
+    """TermMatrix do snapshot (arrays mapeados, somente leitura), com o cubo de min_count 1 já pronto"""
+    data = map_npz(path_file)
+    meta = _read_meta(data)
+    if meta["version"] != SNAPSHOT_VERSION:
+        raise ValueError(f"Snapshot {path_file} has version {meta['version']}, expected {SNAPSHOT_VERSION}")
+
+    cube_meta = meta["cube"]
+    cube = CooccurrenceCube.from_arrays(
+        cube_meta["years"],
+        [tuple(tuple(side) for side in key) for key in cube_meta["pair_keys"]],
+        data["cube_counts"],
+        data["cube_ranks"],
+    )
+    return TermMatrix.from_arrays(
+        meta["terms"], meta["year_labels"], data["years"], data["ids"], data["counts"],
+        cubes={cube_meta["min_count"]: cube},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera o snapshot binário da base (partida rápida do app)")
+    parser.add_argument("--terms", default=data_files["terms_by_year"])
+    parser.add_argument("--out", default=data_files["snapshot"])
+    args = parser.parse_args()
+
+    matrix = build(args.out, (args.terms,))
+    print(
+        f"Snapshot v{SNAPSHOT_VERSION} com {matrix.size} artigos e {len(matrix.column)} termos "
+        f"gravado em {args.out} ({os.path.getsize(args.out) / 1024 ** 2:.1f} MB)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Recontagem dos termos tec/env a partir dos registros completos
+    - Varre título + abstract de cada artigo de complete-unique-results-scopus.json
+    - Casamento com um autômato Aho-Corasick sobre palavras (tokens sem acento e em
+      minúsculas): todos os termos são encontrados numa única passada pelo texto,
+      respeitando os limites de palavra ("Internet of Thing" não casa dentro de
+      "Internet of Things")
+    - As variações (SearchParams.tec_var / env_var) são somadas ao termo canônico
+      (consts.canonical_terms)
+    - Os registros são lidos em streaming e contados em blocos por um pool de processos,
+      com no máximo 2 × workers blocos em andamento
+    - Gera a mesma estrutura de terms-by-year-complete.json:
+      {ano: {id: {"tec": {termo: contagem}, "env": {...}}}}, com os anos em ordem decrescente
+
+O ano vem do campo "year" do registro; sem ele, usa o ano do artigo na base atual.
+
+Uso:
+    python src/term_counter.py --out src/terms-by-year-complete.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from consts import SearchParams, data_files
+from record_stream import iter_records
+from text_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+FIELD_TYPES = ("tec", "env")
+CHUNK_SIZE = 2000
+
+
+def term_key(term):
+    return "_".join(term.lower().split())
+
+
+def vocabulary(params=None):
+    """
+    Padrões a procurar e os termos canônicos de cada campo
+
+    Returns:
+        (padrões [(texto, campo, chave canônica)], {campo: [chaves canônicas]})
+    """
+    params = params or SearchParams()
+    canonical = {"tec": params.tec, "env": params.environment}
+    variations = {"tec": params.tec_var, "env": params.env_var}
+
+    patterns = []
+    for field_type in FIELD_TYPES:
+        for term in canonical[field_type]:
+            patterns.append((term, field_type, term_key(term)))
+        for variation in variations[field_type]:
+            target = params.canonical.get(variation)
+            if target not in canonical[field_type]:
+                raise ValueError(f"Variation {variation!r} has no canonical {field_type} term")
+            patterns.append((variation, field_type, term_key(target)))
+
+    return patterns, {f: [term_key(t) for t in canonical[f]] for f in FIELD_TYPES}
+
+
+class TermMatcher:
+    """Autômato Aho-Corasick em que cada transição é uma palavra"""
+
+    def __init__(self, patterns):
+        """
+        Args:
+            patterns: Iterável de (texto, campo, chave canônica)
+        """
+        self.goto = [{}]
+        self.outputs = [[]]
+
+        for text, field_type, key in patterns:
+            state = 0
+            for word in tokenize(text):
+                next_state = self.goto[state].get(word)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][word] = next_state
+                    self.goto.append({})
+                    self.outputs.append([])
+                state = next_state
+            if state and (field_type, key) not in self.outputs[state]:
+                self.outputs[state].append((field_type, key))
+
+        # Links de falha em largura; a saída de cada estado inclui a do seu link
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(word, 0)
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+
+    def count(self, tokens, counts):
+        """Soma em counts[campo][chave] as ocorrências (inclusive sobrepostas) em tokens"""
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        state = 0
+        for word in tokens:
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for field_type, key in outputs[state]:
+                counts[field_type][key] += 1
+        return counts
+
+
+_matcher = None
+_keys = None
+
+
+def _init_worker(patterns, keys):
+    global _matcher, _keys
+    _matcher = TermMatcher(patterns)
+    _keys = keys
+
+
+def count_record(record, matcher, keys):
+    counts = {field_type: dict.fromkeys(keys[field_type], 0) for field_type in FIELD_TYPES}
+    # Título e abstract são varridos separadamente para não casar termos entre os dois
+    matcher.count(tokenize(record.get("title")), counts)
+    matcher.count(tokenize(record.get("abstract")), counts)
+    return counts
+
+
+def _count_chunk(chunk):
+    return [(id, year, count_record(record, _matcher, _keys)) for id, year, record in chunk]
+
+
+def _chunks(path_file, chunk_size):
+    records = (
+        (id, record.get("year"), {"title": record.get("title"), "abstract": record.get("abstract")})
+        for id, record in iter_records(path_file)
+    )
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _bounded_map(executor, function, chunks, window):
+    """
+    Como executor.map, mas com no máximo window blocos em andamento: o próximo bloco só
+    é lido e submetido quando o mais antigo termina (memória independe do tamanho da base)
+    """
+    pending = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(function, chunk))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def count_terms(complete_path=data_files["complete_results"], workers=None, chunk_size=CHUNK_SIZE,
+                params=None, year_of=None):
+    """
+    Conta os termos de todos os registros de complete_path
+
+    Args:
+        workers: Processos do pool (padrão: número de CPUs; 1 conta no próprio processo)
+        year_of: Função id -> ano para registros sem o campo "year"
+
+    Returns:
+        {ano: {id: {"tec": {...}, "env": {...}}}}, anos em ordem decrescente
+    """
+    patterns, keys = vocabulary(params)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        _init_worker(patterns, keys)
+        results = map(_count_chunk, _chunks(complete_path, chunk_size))
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(patterns, keys))
+        results = _bounded_map(executor, _count_chunk, _chunks(complete_path, chunk_size), 2 * workers)
+
+    terms_by_year = {}
+    missing_year = 0
+    try:
+        for chunk in results:
+            for id, year, counts in chunk:
+                if year is None and year_of is not None:
+                    year = year_of(id)
+                if year is None:
+                    missing_year += 1
+                    continue
+                terms_by_year.setdefault(str(year), {})[id] = counts
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    if missing_year:
+        logger.warning("%d records without year were skipped", missing_year)
+    return {year: terms_by_year[year] for year in sorted(terms_by_year, reverse=True)}
+
+
+def current_year_of():
+    """Ano de cada artigo segundo a base atual (índice de bitmaps, carregado só se necessário)"""
+    import search_mechanism
+
+    index = None
+
+    def year_of(id):
+        nonlocal index
+        if index is None:
+            index = search_mechanism.load_index()
+        ordinal = index.ordinal_of(id)
+        return None if ordinal is None else index.years[ordinal]
+
+    return year_of
+
+
+def write(terms_by_year, path_file):
+    """Escrita atômica: grava em arquivo temporário e substitui"""
+    temp_path = f"{path_file}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(terms_by_year, file, ensure_ascii=False)
+    os.replace(temp_path, path_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconta os termos tec/env a partir dos registros completos")
+    parser.add_argument("--complete", default=data_files["complete_results"])
+    parser.add_argument("--out", required=True, help="Arquivo de saída (mesmo formato de terms-by-year)")
+    parser.add_argument("--workers", type=int, help="Processos do pool (padrão: número de CPUs)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Registros por tarefa")
+    parser.add_argument("--no-fallback-year", action="store_true",
+                        help="Ignora registros sem \"year\" em vez de usar o ano da base atual")
+    args = parser.parse_args()
+
+    year_of = None
+    if not args.no_fallback_year and os.path.exists(data_files["terms_by_year"]):
+        year_of = current_year_of()
+
+    start = time.perf_counter()
+    terms_by_year = count_terms(args.complete, args.workers, args.chunk_size, year_of=year_of)
+    write(terms_by_year, args.out)
+
+    articles = sum(len(ids) for ids in terms_by_year.values())
+    print(f"{articles} artigos recontados em {time.perf_counter() - start:.1f}s; gravado em {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+Matriz compacta de contagens de termos (artigo × termo)
+    - Termos internados: cada termo tec/env vira uma coluna de uma matriz densa uint16
+    - Ano (índice em year_labels) e id (bytes) em colunas numpy, uma linha por artigo
+    - Substitui os dicts aninhados {ano: {id: {"tec": {...}, "env": {...}}}} em memória
+    - find_terms, year_term_tuples e find_terms_in_tuples vetorizados sobre a matriz
+    - min_count: contagem mínima para um termo contar como presente (padrão 1, igual a v > 0)
+    - top_term_tuples: combinações mais frequentes exatas (cubo) ou aproximadas, com
+      sketches Space-Saving por ano construídos em blocos de linhas (memória limitada)
+    - series: contagens ano × termo e ano × par (tec, env) para séries temporais (ver year_series.py)
+
+As linhas seguem a ordem do arquivo (agrupadas por ano), a mesma dos ordinais do
+índice de bitmaps; segmentos delta são acrescentados ao final com extend(), em
+buffers com folga (custo amortizado proporcional ao lote, sem copiar a matriz toda).
+"""
+
+import numpy as np
+
+from cooccurrence_cube import CooccurrenceCube
+from corpus_loader import heap_nbytes
+from heavy_hitters import SpaceSaving, top_items
+from year_series import YearSeries
+
+FIELD_TYPES = ("tec", "env")
+MAX_COUNT = np.iinfo(np.uint16).max
+# Linhas por bloco na construção dos sketches
+SKETCH_CHUNK_ROWS = 4096
+# Crescimento da capacidade de linhas quando um lote não cabe nos buffers
+ROW_GROWTH = 1.25
+
+
+def _ordered_terms(year_ocurrencies, field_type, known=()):
+    """Termos na ordem em que aparecem nos artigos (mesma ordem dos dicts do JSON)"""
+    seen = dict.fromkeys(known)
+    for articles in year_ocurrencies.values():
+        for article in articles.values():
+            for term in article[field_type]:
+                seen.setdefault(term, None)
+    return list(seen)
+
+
+def count_combinations(present, tec_names, env_names, groups=None):
+    """
+    Conta as combinações (termos tec, termos env) presentes em cada linha
+
+    Args:
+        present: Matriz bool linhas × (termos tec + termos env), na ordem dos nomes
+        groups: Grupo (ex.: índice do ano, < 65536) de cada linha; None para um único grupo
+
+    Returns:
+        Lista de (grupo, combinação, contagem) na ordem da primeira ocorrência
+    """
+    if len(present) == 0:
+        return []
+
+    # Chave de cada linha: grupo (2 bytes) + bits de presença dos termos
+    keys = np.packbits(present, axis=1)
+    if groups is not None:
+        keys = np.hstack([np.asarray(groups).astype(">u2").view(np.uint8).reshape(-1, 2), keys])
+    keys = np.ascontiguousarray(keys)
+    keys = keys.view(np.dtype((np.void, keys.shape[1]))).ravel()
+
+    _, first, counts = np.unique(keys, return_index=True, return_counts=True)
+    order = np.argsort(first)
+
+    n_tec = len(tec_names)
+    tec_names = np.array(tec_names, dtype=object)
+    env_names = np.array(env_names, dtype=object)
+    combinations = []
+    for group in order:
+        row = first[group]
+        key = (
+            tuple(sorted(tec_names[present[row, :n_tec]])),
+            tuple(sorted(env_names[present[row, n_tec:]])),
+        )
+        combinations.append((None if groups is None else int(groups[row]), key, int(counts[group])))
+    return combinations
+
+
+class TermMatrix:
+    def __init__(self, terms):
+        """
+        Args:
+            terms: {"tec": [...], "env": [...]} na ordem original das chaves dos artigos
+        """
+        self.terms = {field_type: [] for field_type in FIELD_TYPES}
+        self.column = {}
+        self.year_labels = []
+        self.year_index = {}
+        # Buffers com capacidade >= size; years, ids e counts são as size primeiras linhas
+        self._counts = np.zeros((0, 0), dtype=np.uint16)
+        self._years = np.zeros(0, dtype=np.uint16)
+        self._ids = np.zeros(0, dtype="S1")
+        self.size = 0
+        self._cubes = {}
+        self._sketches = {}
+        self._series = {}
+
+        self._add_terms(terms)
+        self.base_size = 0
+
+    def _add_terms(self, terms):
+        for field_type in FIELD_TYPES:
+            for term in terms.get(field_type, []):
+                if (field_type, term) not in self.column:
+                    self.column[(field_type, term)] = len(self.column)
+                    self.terms[field_type].append(term)
+        if len(self.column) > self._counts.shape[1]:
+            # Termo novo: única situação em que a matriz inteira é copiada (vocabulário quase fixo)
+            self._counts = np.pad(self._counts, ((0, 0), (0, len(self.column) - self._counts.shape[1])))
+
+    @property
+    def years(self):
+        return self._years[:self.size]
+
+    @property
+    def ids(self):
+        return self._ids[:self.size]
+
+    @property
+    def counts(self):
+        return self._counts[:self.size]
+
+    def _reserve(self, n_rows, id_width):
+        """Garante espaço para mais n_rows linhas e ids de até id_width bytes"""
+        needed = self.size + n_rows
+        if needed > len(self._ids) or id_width > self._ids.itemsize:
+            capacity = max(needed, int(len(self._ids) * ROW_GROWTH)) if needed > len(self._ids) else len(self._ids)
+            width = max(id_width, self._ids.itemsize)
+            ids = np.zeros(capacity, dtype=f"S{width}")
+            ids[:self.size] = self.ids
+            self._ids = ids
+        if needed > len(self._years):
+            # Buffers mapeados do snapshot (somente leitura) também ganham aqui uma cópia própria
+            capacity = len(self._ids)
+            years = np.zeros(capacity, dtype=np.uint16)
+            years[:self.size] = self.years
+            counts = np.zeros((capacity, self._counts.shape[1]), dtype=np.uint16)
+            counts[:self.size] = self.counts
+            self._years, self._counts = years, counts
+
+    def _append(self, years, ids, counts):
+        """Acrescenta linhas: years (rótulos), ids (str) e counts (n × colunas atuais, uint16)"""
+        for year in years:
+            if year not in self.year_index:
+                self.year_index[year] = len(self.year_labels)
+                self.year_labels.append(year)
+
+        ids = np.array([id.encode("utf-8") for id in ids], dtype=bytes)
+        if len(ids) == 0:
+            return
+        start, stop = self.size, self.size + len(ids)
+        self._reserve(len(ids), ids.itemsize)
+        self._years[start:stop] = [self.year_index[y] for y in years]
+        self._ids[start:stop] = ids
+        self._counts[start:stop] = counts
+        self.size = stop
+
+        for min_count, cube in self._cubes.items():
+            cube.add(self._count_tuples(min_count, np.arange(start, self.size)))
+        for (capacity, min_count), sketches in self._sketches.items():
+            self._add_to_sketches(sketches, capacity, min_count, start, self.size)
+        for min_count, series in self._series.items():
+            self._add_to_series(series, min_count, np.arange(start, self.size))
+
+    def _rows_from_year_ocurrencies(self, year_ocurrencies):
+        n_rows = sum(len(articles) for articles in year_ocurrencies.values())
+        years, ids = [], []
+        counts = np.zeros((n_rows, len(self.column)), dtype=np.uint16)
+        column = self.column
+
+        row = 0
+        for year, articles in year_ocurrencies.items():
+            for id, article in articles.items():
+                years.append(year)
+                ids.append(id)
+                for field_type in FIELD_TYPES:
+                    for term, v in article[field_type].items():
+                        counts[row, column[(field_type, term)]] = min(v, MAX_COUNT)
+                row += 1
+
+        return years, ids, counts
+
+    @classmethod
+    def from_year_ocurrencies(cls, year_ocurrencies):
+        """Constrói a partir do conteúdo de terms-by-year-complete.json"""
+        matrix = cls({field_type: _ordered_terms(year_ocurrencies, field_type) for field_type in FIELD_TYPES})
+        matrix._append(*matrix._rows_from_year_ocurrencies(year_ocurrencies))
+        matrix.base_size = matrix.size
+        return matrix
+
+    @classmethod
+    def from_term_table(cls, table):
+        """Constrói a partir da tabela de contagens do formato colunar"""
+        import columnar_corpus
+
+        columns = {f: columnar_corpus.term_columns(table, f) for f in FIELD_TYPES}
+        matrix = cls({f: [columnar_corpus.split_term_column(c)[1] for c in cs] for f, cs in columns.items()})
+        counts = np.column_stack(
+            [table.column(c).to_numpy().astype(np.uint16) for f in FIELD_TYPES for c in columns[f]]
+        ) if matrix.column else np.zeros((table.num_rows, 0), dtype=np.uint16)
+        matrix._append(table.column("year").to_pylist(), table.column("id").to_pylist(), counts)
+        matrix.base_size = matrix.size
+        return matrix
+
+    @classmethod
+    def from_arrays(cls, terms, year_labels, years, ids, counts, cubes=None):
+        """
+        Reconstrói a partir das colunas já prontas (ver snapshot.py)
+
+        Args:
+            cubes: {min_count: CooccurrenceCube} já agregados sobre estas linhas
+        """
+        matrix = cls(terms)
+        matrix.year_labels = list(year_labels)
+        matrix.year_index = {year: y for y, year in enumerate(matrix.year_labels)}
+        matrix._years, matrix._ids, matrix._counts = years, ids, counts
+        matrix.size = matrix.base_size = len(ids)
+        matrix._cubes.update(cubes or {})
+        return matrix
+
+    def extend(self, year_ocurrencies):
+        """Acrescenta um lote no formato de terms-by-year-complete.json (segmento delta)"""
+        self._add_terms({f: _ordered_terms(year_ocurrencies, f, self.terms[f]) for f in FIELD_TYPES})
+        self._append(*self._rows_from_year_ocurrencies(year_ocurrencies))
+
+    @property
+    def nbytes(self):
+        cubes = sum(cube.nbytes for cube in self._cubes.values())
+        series = sum(series.nbytes for series in self._series.values())
+        return heap_nbytes(self._counts, self._years, self._ids) + cubes + series
+
+    def id_list(self, rows=None):
+        ids = self.ids if rows is None else self.ids[rows]
+        return [id.decode("utf-8") for id in ids.tolist()]
+
+    def year_list(self, rows=None):
+        years = self.years if rows is None else self.years[rows]
+        return [self.year_labels[y] for y in years.tolist()]
+
+    def columns(self, field_type, selected=None):
+        """Colunas (na ordem original) e nomes dos termos de field_type presentes em selected"""
+        names = [t for t in self.terms[field_type] if selected is None or t in selected]
+        return [self.column[(field_type, t)] for t in names], names
+
+    def year_mask(self, years=None):
+        if not years:
+            return np.ones(self.size, dtype=bool)
+        wanted = [self.year_index[y] for y in years if y in self.year_index]
+        return np.isin(self.years, wanted)
+
+    def match(self, tec, env, years=None, min_count=1):
+        """
+        Linhas com ao menos um termo tec e um termo env com contagem >= min_count
+
+        Returns:
+            (rows, terms) onde terms[i] é a lista de termos encontrados na linha rows[i]
+        """
+        tec_cols, tec_names = self.columns("tec", tec)
+        env_cols, env_names = self.columns("env", env)
+        if not tec_cols or not env_cols:
+            return np.empty(0, dtype=np.int64), []
+
+        hits = self.counts[:, tec_cols + env_cols] >= min_count
+        mask = hits[:, :len(tec_cols)].any(axis=1) & hits[:, len(tec_cols):].any(axis=1) & self.year_mask(years)
+        rows = np.flatnonzero(mask)
+
+        names = tec_names + env_names
+        terms = [[names[j] for j in np.flatnonzero(hit)] for hit in hits[rows]]
+        return rows, terms
+
+    def group_by_year(self, rows, values):
+        grouped = {}
+        for year, id, value in zip(self.year_list(rows), self.id_list(rows), values):
+            if year not in grouped:
+                grouped[year] = {}
+            grouped[year][id] = value
+        return grouped
+
+    def find_terms(self, tec, env, years=None, min_count=1):
+        """Mesmo formato de search_mechanism.find_terms: {ano: {id: [termos]}}"""
+        return self.group_by_year(*self.match(tec, env, years, min_count))
+
+    def year_term_tuples(self, min_count=1):
+        """
+        Mesmo resultado de search_mechanism.count_year_term_tuples: {ano: {(tec, env): artigos}}
+
+        Anos e combinações na ordem da primeira ocorrência; lido do cubo já construído.
+        """
+        return self.cube(min_count).year_tuples()
+
+    def _count_tuples(self, min_count, rows):
+        """year_term_tuples apenas das linhas rows"""
+        if len(rows) == 0:
+            return {}
+
+        tec_cols, tec_names = self.columns("tec")
+        env_cols, env_names = self.columns("env")
+        present = self.counts[rows][:, tec_cols + env_cols] >= min_count
+
+        year_term_set = {}
+        for y, key, count in count_combinations(present, tec_names, env_names, self.years[rows]):
+            year_term_set.setdefault(self.year_labels[y], {})[key] = count
+        return year_term_set
+
+    def cube(self, min_count=1):
+        """Cubo de coocorrência (mantido em sincronia com extend)"""
+        cube = self._cubes.get(min_count)
+        if cube is None:
+            cube = self._cubes[min_count] = CooccurrenceCube(self._count_tuples(min_count, np.arange(self.size)))
+        return cube
+
+    def find_terms_in_tuples(self, tec, env, years=[], min_count=1):
+        """Mesmo resultado de search_mechanism.find_terms_in_tuples"""
+        return self.cube(min_count).find_terms_in_tuples(tec, env, years)
+
+    def _add_to_series(self, series, min_count, rows):
+        present = self.counts[rows] >= min_count
+        columns = {field_type: self.columns(field_type) for field_type in FIELD_TYPES}
+        series.add(
+            self.year_labels, self.years[rows],
+            {field_type: (names, present[:, cols]) for field_type, (cols, names) in columns.items()}
+        )
+
+    def series(self, min_count=1):
+        """Séries anuais por termo e por par (tec, env) (mantidas em sincronia com extend)"""
+        series = self._series.get(min_count)
+        if series is None:
+            series = self._series[min_count] = YearSeries()
+            self._add_to_series(series, min_count, np.arange(self.size))
+        return series
+
+    def _add_to_sketches(self, sketches, capacity, min_count, start, stop):
+        # Cada bloco é agregado (np.unique) antes de entrar nos sketches
+        for chunk_start in range(start, stop, SKETCH_CHUNK_ROWS):
+            rows = np.arange(chunk_start, min(chunk_start + SKETCH_CHUNK_ROWS, stop))
+            for year, counts in self._count_tuples(min_count, rows).items():
+                if year not in sketches:
+                    sketches[year] = SpaceSaving(capacity)
+                sketches[year].update(counts)
+
+    def sketches(self, capacity, min_count=1):
+        """Sketch Space-Saving de cada ano: {ano: SpaceSaving} (mantidos em sincronia com extend)"""
+        key = (capacity, min_count)
+        if key not in self._sketches:
+            sketches = {}
+            self._add_to_sketches(sketches, capacity, min_count, 0, self.size)
+            self._sketches[key] = sketches
+        return self._sketches[key]
+
+    def top_term_tuples(self, tec, env, years=[], n=30, capacity=None, min_count=1):
+        """
+        As n combinações mais frequentes da busca tec/env nos anos
+
+        Args:
+            capacity: None para o resultado exato (cubo); senão, capacidade dos sketches
+                      Space-Saving por ano (memória limitada, contagens aproximadas)
+
+        Returns:
+            {"items": [(combinação, contagem, erro máximo)] da maior para a menor contagem,
+             "distinct": combinações distintas da busca (no modo aproximado, as monitoradas),
+             "approximate": bool,
+             "bound": contagem máxima de uma combinação fora do sketch (0 no modo exato)}
+        """
+        if capacity is None:
+            counts = self.find_terms_in_tuples(tec, env, years, min_count)
+            return {
+                "items": [(key, count, 0) for key, count in top_items(counts.items(), n)],
+                "distinct": len(counts),
+                "approximate": False,
+                "bound": 0,
+            }
+
+        sketches = self.sketches(capacity, min_count)
+        selected = [sketches[year] for year in (years or sketches) if year in sketches]
+        merged = selected[0] if len(selected) == 1 else SpaceSaving.merge_all(selected, capacity)
+
+        tec, env = set(tec), set(env)
+
+        def keep(key):
+            terms = (*key[0], *key[1])
+            return any(t in tec for t in terms) and any(t in env for t in terms)
+
+        return {
+            "items": merged.top(n, keep),
+            "distinct": sum(1 for key in merged.counts if keep(key)),
+            "approximate": True,
+            "bound": merged.bound(),
+        }
@@ -0,0 +1,295 @@
+"""
+Índice invertido de texto (título + abstract) com ranking BM25
+    - Tokenização sem acentos e em minúsculas ("Análise" == "analise"), igual para PT e EN
+    - Termos do título contam em dobro (BM25F simplificado)
+    - Busca por prefixo: "sens" encontra "sensing", "sensor", ...
+    - Todos os tokens da consulta precisam aparecer (AND); o score é a soma dos BM25
+    - Os documentos usam os mesmos ordinais do índice de bitmaps, então o resultado
+      de tec/env pode ser usado diretamente como conjunto de candidatos
+    - extend() acrescenta os registros dos segmentos delta (ordinais novos, ao final)
+
+Geração (a partir do JSON atual):
+    python src/text_index.py
+"""
+
+import argparse
+import math
+import os
+import re
+import unicodedata
+from array import array
+from collections import Counter
+
+import numpy as np
+
+from consts import data_files
+from corpus_loader import heap_nbytes, map_npz
+
+TOKEN = re.compile(r"[a-z0-9]+")
+MAX_TOKEN_LENGTH = 32
+TITLE_WEIGHT = 2
+MAX_EXPANSIONS = 64
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text):
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return [t[:MAX_TOKEN_LENGTH] for t in TOKEN.findall(text)]
+
+
+def document_terms(title, abstract):
+    counts = Counter(tokenize(abstract))
+    for term in tokenize(title):
+        counts[term] += TITLE_WEIGHT
+    return counts
+
+
+class TextIndex:
+    def __init__(self, terms, offsets, doc_ids, tfs, doc_lengths):
+        self._assign(terms, offsets, doc_ids, tfs, doc_lengths)
+
+    def _assign(self, terms, offsets, doc_ids, tfs, doc_lengths):
+        self.terms = terms
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_lengths = doc_lengths
+        self.size = len(doc_lengths)
+        indexed = doc_lengths > 0
+        self.avg_length = float(doc_lengths[indexed].mean()) if indexed.any() else 1.0
+        self.doc_frequencies = np.diff(offsets)
+
+    @classmethod
+    def build(cls, documents, size):
+        """
+        Args:
+            documents: Iterável de (ordinal, título, abstract)
+            size: Número de ordinais (tamanho do índice de bitmaps)
+        """
+        postings = {}
+        doc_lengths = np.zeros(size, dtype=np.float32)
+
+        for ordinal, title, abstract in documents:
+            counts = document_terms(title, abstract)
+            doc_lengths[ordinal] = sum(counts.values())
+            for term, tf in counts.items():
+                if term not in postings:
+                    postings[term] = (array("i"), array("H"))
+                postings[term][0].append(ordinal)
+                postings[term][1].append(min(tf, 65535))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        doc_ids, tfs = [], []
+        for i, term in enumerate(terms):
+            docs = np.frombuffer(postings[term][0], dtype=np.int32)
+            order = np.argsort(docs, kind="stable")
+            doc_ids.append(docs[order])
+            tfs.append(np.frombuffer(postings[term][1], dtype=np.uint16)[order])
+            offsets[i + 1] = offsets[i] + len(docs)
+
+        return cls(
+            np.array(terms, dtype=f"U{MAX_TOKEN_LENGTH}"),
+            offsets,
+            np.concatenate(doc_ids) if doc_ids else np.empty(0, dtype=np.int32),
+            np.concatenate(tfs) if tfs else np.empty(0, dtype=np.uint16),
+            doc_lengths,
+        )
+
+    def extend(self, documents, size):
+        """
+        Acrescenta documentos com ordinais maiores que os já indexados (segmentos delta)
+
+        Args:
+            documents: Iterável de (ordinal, título, abstract)
+            size: Número de ordinais (tamanho atual do índice de bitmaps)
+        """
+        size = max(size, self.size)
+        batch = TextIndex.build(documents, size)
+        if len(batch.doc_ids) == 0:
+            self._assign(self.terms, self.offsets, self.doc_ids, self.tfs, self._padded_lengths(size))
+            return
+        if len(self.doc_ids) and batch.doc_ids.min() <= self.doc_ids.max():
+            raise ValueError("Text index batches must only contain ordinals after the indexed ones")
+
+        terms = np.union1d(self.terms, batch.terms).astype(f"U{MAX_TOKEN_LENGTH}")
+        old_position = np.searchsorted(terms, self.terms)
+        new_position = np.searchsorted(terms, batch.terms)
+        old_frequencies = np.zeros(len(terms), dtype=np.int64)
+        old_frequencies[old_position] = self.doc_frequencies
+        frequencies = old_frequencies.copy()
+        frequencies[new_position] += batch.doc_frequencies
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(frequencies, out=offsets[1:])
+
+        # Em cada termo, as postagens do lote vêm depois das existentes (ordinais maiores)
+        doc_ids = np.empty(offsets[-1], dtype=np.int32)
+        tfs = np.empty(offsets[-1], dtype=np.uint16)
+        no_shift = np.zeros(len(terms), dtype=np.int64)
+        for source, positions, shift in ((self, old_position, no_shift), (batch, new_position, old_frequencies)):
+            term = np.repeat(positions, source.doc_frequencies)
+            rank = np.arange(len(source.doc_ids)) - np.repeat(source.offsets[:-1], source.doc_frequencies)
+            target = offsets[term] + rank + shift[term]
+            doc_ids[target] = source.doc_ids
+            tfs[target] = source.tfs
+
+        self._assign(terms, offsets, doc_ids, tfs, self._padded_lengths(size) + batch.doc_lengths)
+
+    def _padded_lengths(self, size):
+        doc_lengths = np.zeros(size, dtype=np.float32)
+        doc_lengths[:self.size] = self.doc_lengths
+        return doc_lengths
+
+    def save(self, path_file):
+        # Escrita atômica: processos podem estar com o arquivo atual mapeado
+        temp_path = f"{path_file}.tmp"
+        with open(temp_path, "wb") as file:
+            np.savez(
+                file, terms=self.terms, offsets=self.offsets, doc_ids=self.doc_ids,
+                tfs=self.tfs, doc_lengths=self.doc_lengths
+            )
+        os.replace(temp_path, path_file)
+
+    @classmethod
+    def load(cls, path_file):
+        """Arrays mapeados em memória (compartilhados entre processos), somente leitura"""
+        data = map_npz(path_file)
+        return cls(data["terms"], data["offsets"], data["doc_ids"], data["tfs"], data["doc_lengths"])
+
+    @property
+    def nbytes(self):
+        return heap_nbytes(self.terms, self.offsets, self.doc_ids, self.tfs, self.doc_lengths, self.doc_frequencies)
+
+    def expand(self, token, prefix=True):
+        """Posições (no vocabulário) dos termos iguais a token ou que começam com ele"""
+        lo = int(np.searchsorted(self.terms, token))
+        hi = int(np.searchsorted(self.terms, token + "\uffff")) if prefix else lo + 1
+        if hi <= lo or (not prefix and self.terms[lo] != token):
+            return np.empty(0, dtype=np.int64)
+
+        positions = np.arange(lo, hi)
+        if len(positions) > MAX_EXPANSIONS:
+            # O próprio token (em lo, se existir) sempre fica; o resto são as expansões mais frequentes
+            exact = bool(self.terms[lo] == token)
+            others = positions[1:] if exact else positions
+            top = others[np.argsort(-self.doc_frequencies[others], kind="stable")[:MAX_EXPANSIONS - exact]]
+            positions = np.sort(np.concatenate([[lo], top]) if exact else top)
+        return positions
+
+    def token_scores(self, token, candidates=None, prefix=True):
+        """(ordinais, scores) dos documentos que contêm token, somando as expansões"""
+        docs, scores = [], []
+        for position in self.expand(token, prefix):
+            start, end = self.offsets[position], self.offsets[position + 1]
+            term_docs = self.doc_ids[start:end]
+            term_tfs = self.tfs[start:end].astype(np.float32)
+
+            if candidates is not None:
+                keep = np.isin(term_docs, candidates, assume_unique=True)
+                term_docs, term_tfs = term_docs[keep], term_tfs[keep]
+            if len(term_docs) == 0:
+                continue
+
+            df = end - start
+            idf = math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+            norm = K1 * (1 - B + B * self.doc_lengths[term_docs] / self.avg_length)
+            docs.append(term_docs)
+            scores.append(idf * term_tfs * (K1 + 1) / (term_tfs + norm))
+
+        if not docs:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+        docs = np.concatenate(docs)
+        unique, inverse = np.unique(docs, return_inverse=True)
+        return unique, np.bincount(inverse, weights=np.concatenate(scores)).astype(np.float32)
+
+    def search(self, query, candidates=None, limit=None, prefix=True):
+        """
+        Documentos que contêm todos os tokens da consulta, do maior para o menor score
+
+        Args:
+            candidates: Ordinais permitidos (ex.: resultado de uma busca tec/env)
+            limit: Número máximo de resultados
+
+        Returns:
+            (ordinals, scores)
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        if candidates is not None:
+            candidates = np.unique(np.asarray(candidates, dtype=np.int32))
+
+        docs, scores = None, None
+        for token in tokens:
+            token_docs, token_scores = self.token_scores(token, candidates, prefix)
+            if docs is None:
+                docs, scores = token_docs, token_scores
+            else:
+                docs, left, right = np.intersect1d(docs, token_docs, assume_unique=True, return_indices=True)
+                scores = scores[left] + token_scores[right]
+            if len(docs) == 0:
+                break
+            # Os próximos tokens só precisam olhar para os documentos que sobraram
+            candidates = docs
+
+        order = np.argsort(-scores, kind="stable")
+        if limit is not None:
+            order = order[:limit]
+        return docs[order], scores[order]
+
+
+def build(index, complete_path=data_files["complete_results"]):
+    """
+    Constrói o índice de texto para os artigos da base do índice de bitmaps
+
+    Artigos dos segmentos delta ficam de fora (ver extend_from_segment).
+    """
+    from record_stream import iter_records
+
+    def documents():
+        for id, record in iter_records(complete_path):
+            ordinal = index.ordinal_of(id)
+            if ordinal is not None and ordinal < index.base_size:
+                yield ordinal, record.get("title"), record.get("abstract")
+
+    return TextIndex.build(documents(), index.base_size)
+
+
+def extend_from_segment(text_index, segment):
+    """
+    Acrescenta os registros de um segmento delta (ver ingest.py)
+
+    Os artigos do segmento ocupam os próximos ordinais, na ordem de terms_by_year,
+    como no índice de bitmaps, que aplica os mesmos segmentos na mesma ordem.
+    """
+    start = text_index.size
+    ids = [id for articles in segment["terms_by_year"].values() for id in articles]
+    records = segment["complete_results"]
+    text_index.extend(
+        (
+            (start + i, records[id].get("title"), records[id].get("abstract"))
+            for i, id in enumerate(ids) if id in records
+        ),
+        start + len(ids),
+    )
+
+
+def main():
+    import search_mechanism
+
+    parser = argparse.ArgumentParser(description="Gera o índice de texto (BM25) da base")
+    parser.add_argument("--out", default=data_files["text_index"])
+    args = parser.parse_args()
+
+    text_index = build(search_mechanism.load_index())
+    text_index.save(args.out)
+    print(f"Índice de texto com {len(text_index.terms)} termos gravado em {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Séries anuais pré-agregadas (aba "Distribuição Temporal")
+    - term_counts[campo][ano, termo]: artigos do ano em que o termo aparece
+    - pair_counts[ano, tec, env]: artigos do ano com o termo tec e o termo env
+    - Agregadas uma vez sobre a matriz de contagens e somadas a cada lote de extend(),
+      como o cubo de coocorrência; consultas são somas vetorizadas, sem ler artigos
+    - Anos sempre em ordem cronológica (a ordem das chaves do JSON não importa)
+    - moving_average e growth_rate valem para qualquer série
+"""
+
+import numpy as np
+
+from corpus_loader import heap_nbytes
+
+FIELD_TYPES = ("tec", "env")
+
+
+def moving_average(values, window=3):
+    """Média dos últimos window valores de cada posição (as primeiras usam os que existem)"""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return values
+    sums = np.cumsum(values)
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums / np.minimum(np.arange(1, len(values) + 1), window)
+
+
+def growth_rate(values):
+    """Variação relativa em relação ao ano anterior (NaN no primeiro ano e após anos sem artigos)"""
+    values = np.asarray(values, dtype=np.float64)
+    rates = np.full(len(values), np.nan)
+    previous = values[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates[1:] = np.where(previous > 0, (values[1:] - previous) / previous, np.nan)
+    return rates
+
+
+class YearSeries:
+    def __init__(self):
+        self.year_labels = []
+        self.year_index = {}
+        self.terms = {field_type: [] for field_type in FIELD_TYPES}
+        self.term_index = {field_type: {} for field_type in FIELD_TYPES}
+        self.term_counts = {field_type: np.zeros((0, 0), dtype=np.int64) for field_type in FIELD_TYPES}
+        self.pair_counts = np.zeros((0, 0, 0), dtype=np.int64)
+
+    def _grow(self):
+        n_years = len(self.year_labels)
+        for field_type in FIELD_TYPES:
+            counts = self.term_counts[field_type]
+            shape = (n_years, len(self.terms[field_type]))
+            self.term_counts[field_type] = np.pad(counts, [(0, s - c) for s, c in zip(shape, counts.shape)])
+        shape = (n_years, len(self.terms["tec"]), len(self.terms["env"]))
+        self.pair_counts = np.pad(self.pair_counts, [(0, s - c) for s, c in zip(shape, self.pair_counts.shape)])
+
+    def add(self, labels, years, present):
+        """
+        Soma um lote de artigos
+
+        Args:
+            labels: Rótulos dos anos (years indexa esta lista)
+            years: Ano de cada artigo
+            present: {"tec": (termos, presença artigos × termos), "env": (...)}
+        """
+        for label in labels:
+            if label not in self.year_index:
+                self.year_index[label] = len(self.year_labels)
+                self.year_labels.append(label)
+        for field_type, (terms, _) in present.items():
+            for term in terms:
+                if term not in self.term_index[field_type]:
+                    self.term_index[field_type][term] = len(self.terms[field_type])
+                    self.terms[field_type].append(term)
+        self._grow()
+
+        columns = {f: [self.term_index[f][t] for t in terms] for f, (terms, _) in present.items()}
+        tec, env = present["tec"][1], present["env"][1]
+        rows_year = np.array([self.year_index[label] for label in labels], dtype=np.int64)[years]
+        for y in np.unique(rows_year):
+            rows = rows_year == y
+            tec_rows, env_rows = tec[rows].astype(np.int64), env[rows].astype(np.int64)
+            self.term_counts["tec"][y, columns["tec"]] += tec_rows.sum(axis=0)
+            self.term_counts["env"][y, columns["env"]] += env_rows.sum(axis=0)
+            self.pair_counts[y][np.ix_(columns["tec"], columns["env"])] += tec_rows.T @ env_rows
+
+    @property
+    def nbytes(self):
+        return heap_nbytes(self.pair_counts, *self.term_counts.values())
+
+    def year_rows(self, years=None):
+        """Anos (rótulos, em ordem cronológica) e suas linhas; years restringe aos selecionados"""
+        labels = sorted(self.year_labels if not years else {str(y) for y in years} & set(self.year_labels))
+        return labels, np.array([self.year_index[label] for label in labels], dtype=np.int64)
+
+    def term_series(self, field_type, terms, years=None):
+        """
+        Artigos por ano de cada termo
+
+        Returns:
+            (anos, {termo: contagens por ano}) com termos na ordem de terms
+        """
+        labels, rows = self.year_rows(years)
+        counts = self.term_counts[field_type]
+        return labels, {
+            term: counts[rows, self.term_index[field_type][term]] if term in self.term_index[field_type]
+            else np.zeros(len(rows), dtype=np.int64)
+            for term in terms
+        }
+
+    def pair_series(self, tec, env, years=None):
+        """
+        Artigos por ano com os dois termos de cada par (tec, env)
+
+        Returns:
+            (anos, {(tec, env): contagens por ano})
+        """
+        labels, rows = self.year_rows(years)
+        series = {}
+        for t in tec:
+            for e in env:
+                i, j = self.term_index["tec"].get(t), self.term_index["env"].get(e)
+                if i is None or j is None:
+                    series[(t, e)] = np.zeros(len(rows), dtype=np.int64)
+                else:
+                    series[(t, e)] = self.pair_counts[rows, i, j]
+        return labels, series
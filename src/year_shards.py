@@ -0,0 +1,320 @@
+"""
+Base particionada por ano (um shard por ano) com consultas em paralelo
+    - src/shards/manifest.json: versão, hash SHA-256 do JSON de origem, vocabulário de
+      termos (colunas comuns a todos os shards) e os anos na ordem do arquivo de origem
+    - is_valid: shards de outra versão ou de outro conteúdo da origem são ignorados,
+      como no snapshot (ver snapshot.py)
+    - src/shards/year-<ano>.npz: contagens uint16 (artigos × termos) e ids do ano,
+      mapeados em memória pelos processos que os consultam
+    - Cada consulta vira uma tarefa por shard, executada em um pool de processos;
+      consultas com filtro de anos abrem apenas os shards desses anos
+    - Os resultados parciais são combinados na ordem dos anos do manifesto, então o
+      resultado não depende da ordem em que os processos terminam
+
+Geração e consulta:
+    python src/year_shards.py build
+    python src/year_shards.py query --tec machine_learning --env impact_assessment --workers 4
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from consts import data_files
+from corpus_loader import file_hash, map_npz
+from term_matrix import FIELD_TYPES, TermMatrix, count_combinations
+
+logger = logging.getLogger(__name__)
+
+SHARDS_VERSION = 2
+MANIFEST = "manifest.json"
+
+# Validade dos shards já verificada: manifesto -> (assinaturas do manifesto e das origens, válido)
+_checked = {}
+_lock = threading.Lock()
+
+# Shards já mapeados neste processo (workers do pool ou o próprio app): caminho -> (assinatura, arrays)
+_opened = {}
+
+
+def shard_file(year):
+    return f"year-{year}.npz"
+
+
+def _signature(path_file):
+    stat = os.stat(path_file)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _source_hashes(sources):
+    return {os.path.basename(path): file_hash(path) for path in sources}
+
+
+def build(directory=data_files["shards"], terms_path=data_files["terms_by_year"]):
+    """
+    Gera um shard por ano a partir do JSON terms-by-year (o diretório é substituído por inteiro)
+
+    Returns:
+        Manifesto gravado
+    """
+    # Hash antes da leitura: se a origem mudar durante o build, os shards ficam inválidos
+    hashes = _source_hashes((terms_path,))
+    with open(terms_path, "r", encoding="utf-8") as file:
+        matrix = TermMatrix.from_year_ocurrencies(json.load(file))
+
+    temp_dir = f"{directory}.tmp"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    os.makedirs(temp_dir)
+
+    columns = [matrix.column[(f, t)] for f in FIELD_TYPES for t in matrix.terms[f]]
+    shards = []
+    for y, year in enumerate(matrix.year_labels):
+        rows = np.flatnonzero(matrix.years == y)
+        with open(os.path.join(temp_dir, shard_file(year)), "wb") as file:
+            np.savez(file, counts=matrix.counts[rows][:, columns], ids=matrix.ids[rows])
+        shards.append({"year": year, "file": shard_file(year), "articles": len(rows)})
+
+    manifest = {
+        "version": SHARDS_VERSION,
+        "sources": hashes,
+        "terms": matrix.terms,
+        "shards": shards,
+    }
+    with open(os.path.join(temp_dir, MANIFEST), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, ensure_ascii=False)
+
+    # Troca o diretório inteiro: leitores nunca veem shards de duas gerações misturados
+    old_dir = f"{directory}.old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(directory):
+        os.replace(directory, old_dir)
+    os.replace(temp_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    with _lock:
+        _checked.pop(os.path.abspath(os.path.join(directory, MANIFEST)), None)
+
+    return manifest
+
+
+def read_manifest(directory=data_files["shards"]):
+    with open(os.path.join(directory, MANIFEST), "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def is_valid(directory=data_files["shards"], sources=(data_files["terms_by_year"],)):
+    """
+    Se os shards existem, são da versão atual e foram gerados a partir do conteúdo atual das origens
+
+    Os hashes só são recalculados quando o mtime/tamanho do manifesto ou de uma origem muda.
+    """
+    path = os.path.abspath(os.path.join(directory, MANIFEST))
+    try:
+        signatures = tuple(_signature(p) for p in (path, *sources))
+    except FileNotFoundError:
+        return False
+
+    with _lock:
+        checked = _checked.get(path)
+        if checked is not None and checked[0] == signatures:
+            return checked[1]
+
+        try:
+            manifest = read_manifest(directory)
+        except (OSError, ValueError) as error:
+            logger.warning("Ignoring unreadable shards manifest %s: %s", path, error)
+            manifest = {}
+
+        if not manifest:
+            valid = False
+        elif manifest.get("version") != SHARDS_VERSION:
+            logger.warning("Ignoring shards %s: version %s, expected %s", directory, manifest.get("version"), SHARDS_VERSION)
+            valid = False
+        elif manifest.get("sources") != _source_hashes(sources):
+            logger.warning("Ignoring shards %s: source files changed since they were built", directory)
+            valid = False
+        else:
+            valid = True
+
+        _checked[path] = (signatures, valid)
+        return valid
+
+
+def _open_shard(path):
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    opened = _opened.get(path)
+    if opened is None or opened[0] != signature:
+        opened = _opened[path] = (signature, map_npz(path))
+    return opened[1]
+
+
+def _shard_find_terms(task):
+    """Ids e termos encontrados dos artigos de um shard com algum termo tec e algum env"""
+    path, n_tec, columns, names, min_count = task
+    data = _open_shard(path)
+    hits = data["counts"][:, columns] >= min_count
+    rows = np.flatnonzero(hits[:, :n_tec].any(axis=1) & hits[:, n_tec:].any(axis=1))
+    ids = [id.decode("utf-8") for id in data["ids"][rows].tolist()]
+    terms = [[names[j] for j in np.flatnonzero(hit)] for hit in hits[rows]]
+    return ids, terms
+
+
+def _shard_combinations(task):
+    """Combinações (tec, env) do shard com contagens; com tec/env, só as que têm termos de ambos"""
+    path, tec_names, env_names, min_count, tec, env = task
+    data = _open_shard(path)
+    present = data["counts"] >= min_count
+    combinations = [(key, count) for _, key, count in count_combinations(present, tec_names, env_names)]
+    if tec is None:
+        return combinations
+
+    def matches(key):
+        terms = (*key[0], *key[1])
+        return any(t in tec for t in terms) and any(t in env for t in terms)
+
+    return [(key, count) for key, count in combinations if matches(key)]
+
+
+class ShardedCorpus:
+    def __init__(self, directory=data_files["shards"], workers=None):
+        """
+        Args:
+            workers: Processos do pool (padrão: número de CPUs; 1 consulta no próprio processo)
+        """
+        self.directory = directory
+        self.manifest = read_manifest(directory)
+        if self.manifest["version"] != SHARDS_VERSION:
+            raise ValueError(f"Shards in {directory} have version {self.manifest['version']}, expected {SHARDS_VERSION}")
+
+        self.terms = self.manifest["terms"]
+        self.years = [shard["year"] for shard in self.manifest["shards"]]
+        self.paths = {shard["year"]: os.path.join(directory, shard["file"]) for shard in self.manifest["shards"]}
+        self.size = sum(shard["articles"] for shard in self.manifest["shards"])
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+
+    @property
+    def nbytes(self):
+        # Shards ficam mapeados nos processos que os consultam
+        return 0
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _map(self, fn, tasks):
+        """Executa as tarefas (uma por shard) e devolve os resultados na ordem das tarefas"""
+        if self.workers == 1 or len(tasks) <= 1:
+            return list(map(fn, tasks))
+        if self._executor is None:
+            # spawn: o app roda em várias threads, e fork com threads ativas pode travar o filho
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            # Encerra os processos quando o corpus é descartado (ex.: recarga após novos shards)
+            weakref.finalize(self, self._executor.shutdown, wait=False)
+        return list(self._executor.map(fn, tasks))
+
+    def select(self, years=None):
+        """Anos (na ordem do manifesto) cujos shards a consulta precisa abrir"""
+        if not years:
+            return list(self.years)
+        wanted = set(map(str, years))
+        return [year for year in self.years if year in wanted]
+
+    def _columns(self, field_type, selected):
+        """Colunas (na ordem do vocabulário) e nomes dos termos de field_type presentes em selected"""
+        offset = 0 if field_type == "tec" else len(self.terms["tec"])
+        names = [t for t in self.terms[field_type] if t in selected]
+        return [offset + self.terms[field_type].index(t) for t in names], names
+
+    def find_terms(self, tec, env, years=None, min_count=1):
+        """Mesmo formato de search_mechanism.find_terms: {ano: {id: [termos]}}"""
+        tec_cols, tec_names = self._columns("tec", tec)
+        env_cols, env_names = self._columns("env", env)
+        if not tec_cols or not env_cols:
+            return {}
+
+        selected = self.select(years)
+        tasks = [
+            (self.paths[year], len(tec_cols), tec_cols + env_cols, tec_names + env_names, min_count)
+            for year in selected
+        ]
+        founded_articles = {}
+        for year, (ids, terms) in zip(selected, self._map(_shard_find_terms, tasks)):
+            if ids:
+                founded_articles[year] = dict(zip(ids, terms))
+        return founded_articles
+
+    def _combinations(self, years, min_count, tec, env):
+        selected = self.select(years)
+        tasks = [
+            (self.paths[year], self.terms["tec"], self.terms["env"], min_count, tec, env)
+            for year in selected
+        ]
+        return zip(selected, self._map(_shard_combinations, tasks))
+
+    def year_term_tuples(self, min_count=1, years=None, tec=None, env=None):
+        """
+        Mesmo formato de search_mechanism.year_term_tuples: {ano: {(tec, env): artigos}}
+
+        Args:
+            years: Apenas os shards destes anos
+            tec, env: Apenas combinações com algum termo de cada (filtradas nos próprios workers)
+        """
+        tec, env = (None, None) if tec is None else (set(tec), set(env))
+        return {year: dict(combinations) for year, combinations in self._combinations(years, min_count, tec, env)}
+
+    def find_terms_in_tuples(self, tec, env, years=[], min_count=1):
+        """Mesmo resultado de search_mechanism.find_terms_in_tuples (sem segmentos delta)"""
+        result = {}
+        for combinations in self.year_term_tuples(min_count, years, tec, env).values():
+            for key, count in combinations.items():
+                result[key] = result.get(key, 0) + count
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Base particionada por ano")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="Gera um shard por ano a partir do JSON")
+    build_parser.add_argument("--terms", default=data_files["terms_by_year"])
+    build_parser.add_argument("--out", default=data_files["shards"])
+    query_parser = commands.add_parser("query", help="Consulta tec/env nos shards, em paralelo")
+    query_parser.add_argument("--tec", nargs="+", required=True)
+    query_parser.add_argument("--env", nargs="+", required=True)
+    query_parser.add_argument("--years", nargs="*")
+    query_parser.add_argument("--workers", type=int)
+    query_parser.add_argument("--dir", default=data_files["shards"])
+    args = parser.parse_args()
+
+    if args.command == "build":
+        manifest = build(args.out, args.terms)
+        print(f"{len(manifest['shards'])} shards gravados em {args.out}")
+        return
+
+    corpus = ShardedCorpus(args.dir, args.workers)
+    try:
+        start = time.perf_counter()
+        found = corpus.find_terms(args.tec, args.env, args.years)
+        combinations = corpus.find_terms_in_tuples(args.tec, args.env, args.years or [])
+        elapsed = time.perf_counter() - start
+    finally:
+        corpus.close()
+
+    print(
+        f"{sum(map(len, found.values()))} artigos em {len(found)} anos, {len(combinations)} combinações "
+        f"({len(corpus.select(args.years))} shards, {corpus.workers} processos, {elapsed:.2f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
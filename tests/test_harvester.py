@@ -0,0 +1,125 @@
+"""
+Coleta de ponta a ponta contra o servidor de respostas gravadas (harvest_stub.py)
+    - Novas tentativas em 429/503 (fail_every)
+    - Conteúdo do checkpoint: total e páginas gravadas de cada consulta
+    - Retomada após uma coleta interrompida, sem registros duplicados
+
+    python -m pytest tests
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from harvest_stub import StubServer  # noqa: E402
+from harvester import Checkpoint, Harvester, JsonlWriter, combinations, search_query  # noqa: E402
+
+PAGE_SIZE = 10
+QUERIES = combinations(["scopus"])[:3]
+
+
+def canned_responses():
+    """Entradas distintas por consulta (nenhum id repetido entre consultas)"""
+    responses = {"scopus": {}}
+    for q, (endpoint, tec, env) in enumerate(QUERIES):
+        responses["scopus"][search_query(endpoint, tec, env)] = [
+            {
+                "eid": f"2-s2.0-{q}{i:04d}",
+                "dc:title": f"{tec} applied to {env}",
+                "dc:description": f"Study {i} on {tec} and {env}",
+                "prism:coverDate": f"{2015 + i % 10}-01-01",
+                "link": [{"@ref": "scopus", "@href": f"https://example.org/{q}/{i}"}],
+            }
+            for i in range(23 + 7 * q)
+        ]
+    return responses
+
+
+def harvest(responses, writer, checkpoint_path, fail_every=0, batch_size=500):
+    """Roda uma coleta contra um stub novo; devolve (stats, stub)"""
+    async def run():
+        stub = StubServer(responses, fail_every=fail_every, quiet=True)
+        url = stub.listen(0)
+        harvester = Harvester(
+            {"scopus": f"{url}/scopus"}, writer=writer, checkpoint=Checkpoint(checkpoint_path),
+            concurrency=4, rate_limits={"scopus": 1000}, batch_size=batch_size, page_size=PAGE_SIZE,
+            backoff=0.01,
+        )
+        try:
+            return await harvester.run(QUERIES), stub
+        finally:
+            stub.stop()
+
+    return asyncio.run(run())
+
+
+def read_ids(path_file):
+    with open(path_file, "r", encoding="utf-8") as file:
+        return [json.loads(line)["id"] for line in file if line.strip()]
+
+
+def test_retries_and_checkpoint(tmp_path):
+    responses = canned_responses()
+    out, checkpoint_path = tmp_path / "out.jsonl", tmp_path / "checkpoint.json"
+
+    stats, stub = harvest(responses, JsonlWriter(out), checkpoint_path, fail_every=3)
+
+    assert stub.failures > 0
+    assert stats["retries"] == stub.failures
+    assert stats["requests"] == stub.requests
+
+    expected = [e["eid"] for entries in responses["scopus"].values() for e in entries]
+    ids = read_ids(out)
+    assert sorted(ids) == sorted(expected)
+    assert stats["written"] == len(expected)
+
+    with open(checkpoint_path, "r", encoding="utf-8") as file:
+        queries = json.load(file)["queries"]
+    assert set(queries) == {f"scopus|{query}" for query in responses["scopus"]}
+    for query, entries in responses["scopus"].items():
+        saved = queries[f"scopus|{query}"]
+        assert saved["total"] == len(entries)
+        assert sorted(saved["done"]) == list(range(0, len(entries), PAGE_SIZE))
+
+
+class Interrupted(Exception):
+    pass
+
+
+class InterruptedWriter(JsonlWriter):
+    """Falha no segundo lote, como uma coleta interrompida no meio"""
+
+    def __init__(self, path_file):
+        super().__init__(path_file)
+        self.calls = 0
+
+    def __call__(self, records):
+        self.calls += 1
+        if self.calls == 2:
+            raise Interrupted()
+        return super().__call__(records)
+
+
+def test_resume_does_not_duplicate(tmp_path):
+    responses = canned_responses()
+    out, checkpoint_path = tmp_path / "out.jsonl", tmp_path / "checkpoint.json"
+    expected = {e["eid"] for entries in responses["scopus"].values() for e in entries}
+
+    try:
+        harvest(responses, InterruptedWriter(out), checkpoint_path, batch_size=15)
+    except Interrupted:
+        pass
+    first = read_ids(out)
+    assert 0 < len(first) < len(expected)
+
+    stats, _ = harvest(responses, JsonlWriter(out), checkpoint_path)
+
+    ids = read_ids(out)
+    assert len(ids) == len(set(ids))
+    assert set(ids) == expected
+    # Páginas já gravadas não são buscadas de novo
+    assert stats["records"] == len(expected) - len(first)
+    assert stats["written"] == len(expected) - len(first)